@@ -2,7 +2,96 @@ try:
     from ._version import __version__
 except ImportError:
     __version__ = "unkown"
-from .generic import *
-from .helpers import *
-from .pyplot import *
-from .utils import *
+
+import importlib
+
+# The public functions are imported lazily (PEP 562) so that ``import mpl_interactions``
+# doesn't import matplotlib.pyplot, ipywidgets and IPython until they are actually needed.
+# Keep this in sync with the ``__all__`` of each submodule.
+_lazy_submodules = {
+    "caching": [
+        "LRUCache",
+        "CompressedLRUCache",
+        "fingerprint",
+        "function_fingerprint",
+        "SharedResultCache",
+        "shared_result_cache",
+    ],
+    "generic": [
+        "heatmap_slicer",
+        "zoom_factory",
+        "panhandler",
+        "image_segmenter",
+        "hyperslicer",
+        "ortho_slicer",
+        "video_slicer",
+    ],
+    "helpers": [
+        "sca",
+        "decompose_bbox",
+        "update_datalim_from_xy",
+        "update_datalim_from_bbox",
+        "notebook_backend",
+        "callable_else_value",
+        "callable_else_value_no_cast",
+        "kwarg_to_ipywidget",
+        "kwarg_to_mpl_widget",
+        "extract_num_options",
+        "changeify",
+        "create_slider_format_dict",
+        "gogogo_figure",
+        "create_mpl_controls_fig",
+        "eval_xy",
+        "choose_fmt_str",
+    ],
+    "playback": [
+        "Player",
+    ],
+    "pool": [
+        "FigurePool",
+    ],
+    "pyplot": [
+        "interactive_plot",
+        "interactive_hist",
+        "interactive_hist2d",
+        "interactive_scatter",
+        "interactive_imshow",
+        "interactive_axhline",
+        "interactive_axvline",
+        "interactive_title",
+        "interactive_xlabel",
+        "interactive_ylabel",
+        "interactive_text",
+    ],
+    "spec": [
+        "ImportRef",
+        "DashboardSpec",
+    ],
+    "utils": [
+        "figure",
+        "nearest_idx",
+        "ioff",
+        "indexer",
+        "minmax_decimate",
+        "lttb_decimate",
+    ],
+}
+_lazy_names = {name: mod for mod, names in _lazy_submodules.items() for name in names}
+
+__all__ = list(_lazy_names)
+
+
+def __getattr__(name):
+    if name in _lazy_names:
+        module = importlib.import_module(f".{_lazy_names[name]}", __name__)
+        value = getattr(module, name)
+        # cache so that __getattr__ is only hit the first time
+        globals()[name] = value
+        return value
+    if name in _lazy_submodules:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_lazy_submodules))
@@ -0,0 +1,531 @@
+"""Caches used to avoid recomputing or re-rendering things."""
+
+import hashlib
+import threading
+import types
+import weakref
+import zlib
+from collections import Counter, OrderedDict
+from functools import partial
+
+import numpy as np
+
+__all__ = [
+    "LRUCache",
+    "CompressedLRUCache",
+    "fingerprint",
+    "function_fingerprint",
+    "SharedResultCache",
+    "shared_result_cache",
+]
+
+
+class LRUCache:
+    """A thread safe mapping that only keeps the *maxsize* most recently used items.
+
+    Parameters
+    ----------
+    maxsize : int or None, default: 128
+        The maximum number of items to keep. If None the cache will grow without bound.
+    max_bytes : int, optional
+        The most memory the items may take up, as given by their ``nbytes``. Items
+        without ``nbytes`` (i.e. that aren't arrays) count as nothing.
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self):
+        """The total size of the items in the cache."""
+        return self._nbytes
+
+    def _sizeof(self, value):
+        return getattr(value, "nbytes", 0)
+
+    def __contains__(self, key):
+        """Return whether *key* is in the cache."""
+        with self._lock:
+            return key in self._data
+
+    def __getitem__(self, key):
+        """Return the value for *key* and mark it as the most recently used."""
+        with self._lock:
+            value = self._data[key]
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        """Store *value*, evicting the least recently used items if the cache is full."""
+        with self._lock:
+            if key in self._data:
+                self._nbytes -= self._sizeof(self._data[key])
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._nbytes += self._sizeof(value)
+            self._evict()
+
+    def __delitem__(self, key):
+        """Remove *key* from the cache."""
+        with self._lock:
+            self._nbytes -= self._sizeof(self._data.pop(key))
+
+    def __len__(self):
+        """Return the number of items in the cache."""
+        return len(self._data)
+
+    def __iter__(self):
+        """Iterate over a snapshot of the keys, from least to most recently used."""
+        with self._lock:
+            return iter(list(self._data))
+
+    def _evict(self):
+        if self.maxsize is not None:
+            while len(self._data) > self.maxsize:
+                self._nbytes -= self._sizeof(self._data.popitem(last=False)[1])
+        if self.max_bytes is not None:
+            while self._data and self._nbytes > self.max_bytes:
+                self._nbytes -= self._sizeof(self._data.popitem(last=False)[1])
+
+    def get(self, key, default=None):
+        """Return the value for *key* if it is cached, otherwise *default*.
+
+        This also keeps track of the hits and misses of the cache.
+        """
+        with self._lock:
+            try:
+                value = self[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def clear(self):
+        """Remove everything from the cache."""
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+
+class _ZlibCodec:
+    """The standard library's zlib with the same interface as numcodecs."""
+
+    def __init__(self, level=1):
+        self.level = level
+
+    def encode(self, buf):
+        return zlib.compress(buf, self.level)
+
+    def decode(self, buf):
+        return zlib.decompress(buf)
+
+
+def get_codec(codec=None):
+    """Get something to compress arrays with.
+
+    Parameters
+    ----------
+    codec : {None, "lz4", "zlib"} or codec, optional
+        If None use lz4 from numcodecs if it is installed, otherwise zlib. Anything
+        with ``encode`` and ``decode`` methods, such as a numcodecs codec, is used as is.
+
+    Returns
+    -------
+    codec
+        An object with ``encode`` and ``decode`` methods.
+    """
+    if hasattr(codec, "encode") and hasattr(codec, "decode"):
+        return codec
+    if codec not in (None, "lz4", "zlib"):
+        raise ValueError(f"codec must be one of None, 'lz4' or 'zlib' but it is {codec!r}")
+    try:
+        import numcodecs
+    except ImportError:
+        if codec == "lz4":
+            raise ImportError("numcodecs must be installed to use lz4 compression") from None
+        return _ZlibCodec()
+    if codec == "zlib":
+        return numcodecs.Zlib(level=1)
+    return numcodecs.LZ4()
+
+
+class CompressedLRUCache(LRUCache):
+    """An `LRUCache` of numpy arrays that stores them compressed.
+
+    Compressing makes items slower to get, but many more of them fit in memory,
+    which can be much faster than reading them from disk again.
+
+    Parameters
+    ----------
+    maxsize : int or None, default: 128
+        The maximum number of arrays to keep.
+    codec : {None, "lz4", "zlib"} or codec, optional
+        How to compress the arrays, see `get_codec`.
+    max_bytes : int, optional
+        The most memory the compressed arrays may take up.
+    """
+
+    def __init__(self, maxsize=128, codec=None, max_bytes=None):
+        super().__init__(maxsize, max_bytes)
+        self.codec = get_codec(codec)
+
+    def _sizeof(self, value):
+        return len(value[0])
+
+    def __getitem__(self, key):
+        """Return the decompressed array for *key*."""
+        buf, dtype, shape = super().__getitem__(key)
+        return np.frombuffer(self.codec.decode(buf), dtype=dtype).reshape(shape)
+
+    def __setitem__(self, key, value):
+        """Compress and store the array *value*."""
+        value = np.ascontiguousarray(value)
+        super().__setitem__(key, (self.codec.encode(value), value.dtype, value.shape))
+
+
+def fingerprint(obj):
+    """Convert parameters into something hashable to use as a cache key.
+
+    Parameters
+    ----------
+    obj : object
+        Usually a dictionary of parameters. Arrays, lists, tuples and dictionaries
+        are converted recursively.
+
+    Returns
+    -------
+    hashable
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted((k, fingerprint(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return (type(obj).__name__, *(fingerprint(v) for v in obj))
+    if isinstance(obj, np.ndarray):
+        return _array_fingerprint(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    try:
+        hash(obj)
+    except TypeError:
+        return ("repr", repr(obj))
+    return obj
+
+
+# id -> (weakref, fingerprint) of the arrays fingerprinted so far, arrays can't be
+# the keys of a WeakKeyDictionary as they aren't hashable
+_array_fingerprints = {}
+
+
+def _array_fingerprint(arr):
+    """Fingerprint *arr* by a digest of its contents, computed once per array object.
+
+    Like the other caches this assumes that arrays are not changed in place.
+    """
+    key = id(arr)
+    cached = _array_fingerprints.get(key)
+    if cached is not None and cached[0]() is arr:
+        return cached[1]
+    if arr.dtype.hasobject:
+        data = arr.tobytes()
+    else:
+        data = memoryview(np.ascontiguousarray(arr)).cast("B")
+    fp = ("ndarray", arr.dtype.str, arr.shape, hashlib.blake2b(data, digest_size=16).digest())
+    try:
+        ref = weakref.ref(arr, partial(_forget_array, key))
+    except TypeError:
+        return fp
+    _array_fingerprints[key] = (ref, fp)
+    return fp
+
+
+def _forget_array(key, ref):
+    # the id may already belong to a newer array
+    if _array_fingerprints.get(key, (None,))[0] is ref:
+        del _array_fingerprints[key]
+
+
+# computed once per function object, see `function_fingerprint`
+_function_fingerprints = weakref.WeakKeyDictionary()
+
+
+def function_fingerprint(func):
+    """Create a key that is the same for functions that will compute the same thing.
+
+    Two functions defined by running the same code (e.g. the same notebook cell in two
+    sessions) are different objects but get the same fingerprint. This includes the
+    code, the names it uses, defaults, the values captured by closures and the values
+    of the globals that the function reads. The closure and global values are only
+    looked at the first time.
+
+    Parameters
+    ----------
+    func : callable
+        The function to fingerprint.
+
+    Returns
+    -------
+    hashable
+    """
+    return _function_fingerprint(func, ())[0]
+
+
+def _code_names(code):
+    """Return the names used by *code* and the functions defined inside of it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_names"):
+            names |= _code_names(const)
+    return names
+
+
+def _global_fingerprint(value, seen):
+    """Return the fingerprint of *value* and whether it is only the identity of *value*."""
+    if isinstance(value, types.ModuleType):
+        return ("module", value.__name__), False
+    if isinstance(value, partial) or hasattr(value, "__code__"):
+        if value in seen:
+            # recursion
+            return ("function", getattr(value, "__qualname__", None)), False
+        return _function_fingerprint(value, seen)
+    if isinstance(value, (np.ndarray, np.generic)):
+        return fingerprint(value), False
+    try:
+        hash(value)
+    except TypeError:
+        # e.g. a list that is appended to, the contents now may not be the contents
+        # when the function is called
+        return ("object", type(value).__name__, id(value)), True
+    return value, False
+
+
+def _function_fingerprint(func, seen):
+    """Return the fingerprint of *func* and whether it depends on the identity of objects.
+
+    Ids are reused once their objects are garbage collected, so fingerprints that
+    depend on them are only good for as long as *func* is alive.
+    """
+    try:
+        return _function_fingerprints[func]
+    except (KeyError, TypeError):
+        pass
+    seen = (*seen, func)
+    if isinstance(func, partial):
+        inner, by_identity = _function_fingerprint(func.func, seen)
+        fp = ("partial", inner, fingerprint(func.args), fingerprint(func.keywords))
+    elif hasattr(func, "__code__"):
+        closure = [_global_fingerprint(c.cell_contents, seen) for c in func.__closure__ or ()]
+        code = func.__code__
+        names = sorted(_code_names(code))
+        # attribute names are in co_names too, only the globals have values
+        global_values = getattr(func, "__globals__", {})
+        globals_ = [
+            (name, _global_fingerprint(global_values[name], seen))
+            for name in names
+            if name in global_values
+        ]
+        by_identity = any(i for _, i in closure) or any(i for _, (_, i) in globals_)
+        fp = (
+            func.__module__,
+            func.__qualname__,
+            code.co_code,
+            tuple(names),
+            fingerprint(code.co_consts),
+            fingerprint(func.__defaults__),
+            fingerprint(func.__kwdefaults__),
+            fingerprint(tuple(c for c, _ in closure)),
+            tuple((name, g) for name, (g, _) in globals_),
+        )
+    else:
+        # e.g. builtins and ufuncs, the object itself is as good as it gets
+        return func, False
+    try:
+        _function_fingerprints[func] = (fp, by_identity)
+    except TypeError:
+        # not weakref-able
+        pass
+    return fp, by_identity
+
+
+class SharedResultCache:
+    """Results of functions that are shared between many `Controls`.
+
+    Pass this to several `~mpl_interactions.controller.Controls` using the
+    *shared_cache* argument and any function that they call with the same params is
+    only computed once. This is intended for identical dashboards, e.g. for several
+    users in one process. The results are looked up using `function_fingerprint`,
+    the params and any other inputs (e.g. the *x* given to ``y(x, **params)``). If
+    functions depend on other data that differs between dashboards then give each
+    kind of dashboard its own `SharedResultCache`. Functions that read unhashable
+    objects other than arrays (e.g. a global list) are only known by the identity
+    of those objects, so their results are not shared.
+
+    Parameters
+    ----------
+    maxsize : int, default: 1024
+        The maximum number of results to keep in total.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (owner, value)
+        self._owner_counts = Counter()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """Return the number of results stored."""
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Return the result stored for *key*, otherwise *default*."""
+        with self._lock:
+            try:
+                _, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, owner=None, quota=None):
+        """Store *value* for *key*.
+
+        Parameters
+        ----------
+        key : hashable
+            What to store the result under.
+        value : object
+            The result.
+        owner : hashable, optional
+            Who is storing the result, this is counted towards their *quota*.
+        quota : int, optional
+            The maximum number of results that *owner* may have stored. Once this is
+            reached the least recently used result of *owner* is removed, so one owner
+            can not push out everyone else's results.
+        """
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if quota is not None and owner is not None:
+                excess = self._owner_counts[owner] - quota + 1
+                if excess > 0:
+                    owned = [k for k, (o, _) in self._data.items() if o == owner]
+                    for k in owned[:excess]:
+                        self._remove(k)
+            self._data[key] = (owner, value)
+            self._owner_counts[owner] += 1
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key):
+        owner, _ = self._data.pop(key)
+        self._owner_counts[owner] -= 1
+        if self._owner_counts[owner] <= 0:
+            del self._owner_counts[owner]
+
+    def count(self, owner):
+        """Return how many results *owner* has stored."""
+        return self._owner_counts[owner]
+
+    def clear(self):
+        """Remove all of the results."""
+        with self._lock:
+            self._data.clear()
+            self._owner_counts.clear()
+
+
+shared_result_cache = SharedResultCache()
+"""The process wide `SharedResultCache` used by ``Controls(shared_cache=True)``."""
+
+
+class _Call:
+    """A function and the positional arguments it is called with besides the params.
+
+    Use this as the key in the caches given to the update functions for functions that
+    take more than the params, e.g. ``y(x, **params)``, so that a shared cache can tell
+    calls with different inputs apart.
+    """
+
+    __slots__ = ("func", "inputs")
+
+    def __init__(self, func, *inputs):
+        self.func = func
+        self.inputs = inputs
+
+    def __hash__(self):
+        """Hash the function and the identity of the inputs."""
+        return hash((self.func, *(id(i) for i in self.inputs)))
+
+    def __eq__(self, other):
+        """Return whether *other* is the same function with the same input objects."""
+        return (
+            isinstance(other, _Call)
+            and other.func is self.func
+            and len(other.inputs) == len(self.inputs)
+            and all(a is b for a, b in zip(other.inputs, self.inputs))
+        )
+
+
+class _SharedCacheView:
+    """The cache given to the update functions when a `SharedResultCache` is in use.
+
+    This acts like the plain dictionary of ``function -> result`` that is otherwise
+    used during one update, but looks results up in the shared cache using the
+    function's fingerprint and the current params.
+    """
+
+    def __init__(self, shared, params, owner=None, quota=None):
+        self._shared = shared
+        self._params = params
+        self._params_fp = None
+        self._owner = owner
+        self._quota = quota
+        self._local = {}
+
+    def _key(self, func):
+        """Return the key of *func* in the shared cache, None if it can't be shared."""
+        fp, by_identity = _function_fingerprint(func.func if isinstance(func, _Call) else func, ())
+        if by_identity:
+            # another function could later get the same fingerprint once the objects
+            # it depends on are gone, so only keep the results for this Controls
+            return None
+        if self._params_fp is None:
+            self._params_fp = fingerprint(self._params)
+        if isinstance(func, _Call):
+            return (fp, fingerprint(func.inputs), self._params_fp)
+        return (fp, self._params_fp)
+
+    def __contains__(self, func):
+        if func in self._local:
+            return True
+        key = self._key(func)
+        if key is None:
+            return False
+        value = self._shared.get(key, _missing)
+        if value is _missing:
+            return False
+        self._local[func] = value
+        return True
+
+    def __getitem__(self, func):
+        if func not in self:
+            raise KeyError(func)
+        return self._local[func]
+
+    def __setitem__(self, func, value):
+        self._local[func] = value
+        key = self._key(func)
+        if key is not None:
+            self._shared.set(key, value, owner=self._owner, quota=self._quota)
+
+
+_missing = object()
@@ -1,30 +1,61 @@
-try:
-    from IPython.display import display as ipy_display
-    from ipywidgets import widgets
-
-    _not_ipython = False
-except ImportError:
-    _not_ipython = True
 from collections import defaultdict
 from collections.abc import Iterable
+from contextvars import ContextVar
 from functools import partial
+from itertools import count
 
-from matplotlib.animation import FuncAnimation
-from matplotlib.widgets import AxesWidget
-from matplotlib.widgets import Slider as mSlider
+import numpy as np
 
+from .caching import LRUCache, _SharedCacheView, fingerprint, shared_result_cache
 from .helpers import (
     create_mpl_controls_fig,
     create_slider_format_dict,
     kwarg_to_ipywidget,
     kwarg_to_mpl_widget,
+    kwarg_to_param,
     notebook_backend,
     process_mpl_widget,
+    value_to_index,
 )
 
+# identifies each Controls in a shared cache, unlike id() these are never reused
+_cache_owners = count()
+
 
 class Controls:
-    """Manager of many interactive functions."""
+    """Manager of many interactive functions.
+
+    Parameters
+    ----------
+    slider_formats : None, string, or dict
+        If None a default value of decimal points will be used. Uses the new {} style formatting
+    play_buttons : bool or str or dict, optional
+        Whether to attach a play button to any sliders that get created. Pressing it
+        plays through the values with a `mpl_interactions.Player`, which drops frames
+        rather than queueing them up when updating is slow.
+    play_button_pos : str
+        Where to place the play buttons.
+    use_ipywidgets : bool, optional
+        Whether to use ipywidgets or matplotlib widgets. If None this will be inferred
+        from the matplotlib backend. Ignored if *backend* is given.
+    use_cache : bool, default: True
+        Whether to share the results of functions between the update functions.
+    backend : {"ipywidgets", "matplotlib", "headless"}, optional
+        What to use for the controls. ``"headless"`` will never create any widgets,
+        the params can only be changed through `Controls.set_params`. This is useful
+        for rendering figures in a script or on a server. The figures will
+        not be redrawn when params change, they will be rendered when saved.
+    render_cache_size : int, default: 32
+        How many rendered frames `Controls.render` keeps around.
+    shared_cache : bool or SharedResultCache, optional
+        Share the results of functions with other `Controls` that use the same cache.
+        If True the process wide `mpl_interactions.caching.shared_result_cache` is
+        used. Requires *use_cache*.
+    shared_cache_quota : int, optional
+        The most results that this object may keep in the *shared_cache*.
+    **kwargs
+        Interpreted as controls.
+    """
 
     def __init__(
         self,
@@ -33,41 +64,96 @@ class Controls:
         play_button_pos="right",
         use_ipywidgets=None,
         use_cache=True,
+        backend=None,
+        render_cache_size=32,
+        shared_cache=None,
+        shared_cache_quota=None,
         **kwargs,
     ):
         # it might make sense to also accept kwargs as a straight up arg
         # to allow for passing the dictionary, but then it would need a different name
         # and we'd have to combine dicitonarys which looks like a hassle
 
-        if use_ipywidgets is None:
-            # if this ends up being true we are garunteed
-            self.use_ipywidgets = notebook_backend()
-        else:
-            self.use_ipywidgets = use_ipywidgets
+        if backend is None:
+            if use_ipywidgets is None:
+                # if this ends up being true we are garunteed
+                use_ipywidgets = notebook_backend()
+            backend = "ipywidgets" if use_ipywidgets else "matplotlib"
+        elif backend not in ["ipywidgets", "matplotlib", "headless"]:
+            raise ValueError(
+                "backend must be one of 'ipywidgets', 'matplotlib', or 'headless'"
+                f" but it is {backend!r}"
+            )
+        self.backend = backend
+        self.use_ipywidgets = backend == "ipywidgets"
         if self.use_ipywidgets:
-            if _not_ipython:
+            # imported here rather than at the top so that ipywidgets and IPython
+            # are only imported by the people that actually use them
+            try:
+                import IPython.display  # noqa: F401
+                from ipywidgets import widgets
+            except ImportError as e:
                 raise ValueError(
                     "You need to be in an Environment with IPython.display"
                     " available to use ipywidgets"
-                )
+                ) from e
             self.vbox = widgets.VBox([])
         else:
-            self.control_figures = []
-            """Storage for figures made of matplotlib sliders."""
+            self._control_figures = []
+            # the matplotlib widgets are only created once they are needed
+            # e.g. on display or when accessing `controls`
+            self._pending_controls = {}
 
         self.use_cache = use_cache
+        if shared_cache is True:
+            shared_cache = shared_result_cache
+        elif shared_cache is False:
+            shared_cache = None
+        self.shared_cache = shared_cache
+        self.shared_cache_quota = shared_cache_quota
+        self._cache_owner = next(_cache_owners)
         self.kwargs = kwargs
         self.slider_format_strings = create_slider_format_dict(slider_formats)
-        self.controls = {}
+        self._controls = {}
         self.params = {}
         """Parameters in the controller, see :doc:`/examples/custom-callbacks`."""
         self.figs = defaultdict(list)  # maybe should only store weakrefs?
         self.indices = defaultdict(lambda: 0)
         self._update_funcs = defaultdict(list)
         self._user_callbacks = defaultdict(list)
+        # functions that can start loading upcoming values of a param, see `_prefetch`
+        self._prefetchers = defaultdict(list)
+        # the Player of each param with a play button, created when first pressed
+        self._players = {}
         self._hashes = []
+        # the possible values of each param - (values, kind) from kwarg_to_param
+        self._param_specs = {}
+        # while setting multiple params the changed keys are collected here
+        self._held_keys = None
+        self.render_cache = LRUCache(render_cache_size)
+        """The frames rendered by `Controls.render`. Clear this if the figures change
+        in a way that does not go through the params."""
+        # the limits of the axes of each figure when it was first rendered, and the
+        # params and limits that it was last rendered with
+        self._render_views = {}
+        self._last_render = {}
         self.add_kwargs(kwargs, slider_formats, play_buttons)
 
+    @property
+    def controls(self):
+        """The widgets controlling the parameters.
+
+        Accessing this will create any matplotlib widgets that have not been created yet.
+        """
+        self._create_pending_controls()
+        return self._controls
+
+    @property
+    def control_figures(self):
+        """Storage for figures made of matplotlib sliders."""
+        self._create_pending_controls()
+        return self._control_figures
+
     def add_kwargs(self, kwargs, slider_formats=None, play_buttons=None):
         """Add kwargs to the controller.
 
@@ -89,6 +175,8 @@ class Controls:
             )
         else:
             _play_buttons = play_buttons
+        from matplotlib.widgets import AxesWidget
+
         if slider_formats is not None:
             slider_formats = create_slider_format_dict(slider_formats)
             for k, v in slider_formats.items():
@@ -107,8 +195,9 @@ class Controls:
                             )
                         # don't need to add it because it already exists
                         continue
-                    self.params[k], self.controls[k] = param, control
+                    self.params[k], self._controls[k] = param, control
                     self._hashes.append(hash)
+                    self._param_specs[k] = (None, "widget")
                 else:
                     param, control, hash_ = kwarg_to_ipywidget(
                         k,
@@ -116,6 +205,7 @@ class Controls:
                         partial(self.slider_updated, key=k),
                         self.slider_format_strings[k],
                         play_button=_play_buttons[k],
+                        on_play=partial(self._toggle_player, k),
                     )
                     if k in self.params:
                         if hash_ not in self._hashes:
@@ -126,41 +216,253 @@ class Controls:
                         continue
                     self.params[k] = param
                     self._hashes.append(hash_)
+                    if "ipywidgets" in str(v.__class__):
+                        self._param_specs[k] = (None, "widget")
+                    else:
+                        self._param_specs[k] = kwarg_to_param(k, v, continuous=False)[1:3]
                     if control:
-                        self.controls[k] = control
+                        self._controls[k] = control
                         self.vbox.children = [*list(self.vbox.children), control]
                 if k == "vmin_vmax":
                     self.params["vmin"] = self.params["vmin_vmax"][0]
                     self.params["vmax"] = self.params["vmin_vmax"][1]
         else:
-            if len(kwargs) > 0:
-                mpl_layout = create_mpl_controls_fig(kwargs)
-                self.control_figures.append(mpl_layout[0])
-                widget_y = 0.05
-                for k, v in kwargs.items():
-                    param, control, cb, widget_y, hash_ = kwarg_to_mpl_widget(
-                        mpl_layout[0],
-                        mpl_layout[1:],
-                        widget_y,
-                        k,
-                        v,
-                        partial(self.slider_updated, key=k),
-                        self.slider_format_strings[k],
+            for k, v in kwargs.items():
+                if isinstance(v, AxesWidget):
+                    # existing widgets don't need a controls figure
+                    param, control, _, hash_ = process_mpl_widget(
+                        v, partial(self.slider_updated, key=k)
                     )
-                    if k in self.params:
-                        if hash_ not in self._hashes:
-                            raise ValueError(
-                                f"kwarg {k} already exists and the new values are incompatible."
-                            )
-                        # don't need to add it because it already exists
-                        continue
-                    self.params[k] = param
-                    self._hashes.append(hash_)
-                    if control:
-                        self.controls[k] = control
-                    if k == "vmin_vmax":
-                        self.params["vmin"] = self.params["vmin_vmax"][0]
-                        self.params["vmax"] = self.params["vmin_vmax"][1]
+                    values, kind = None, "widget"
+                else:
+                    param, values, kind, hash_ = kwarg_to_param(k, v)
+                    control = None
+                if k in self.params:
+                    if hash_ not in self._hashes:
+                        raise ValueError(
+                            f"kwarg {k} already exists and the new values are incompatible."
+                        )
+                    # don't need to add it because it already exists
+                    continue
+                self.params[k] = param
+                self._hashes.append(hash_)
+                self._param_specs[k] = (values, kind)
+                if control:
+                    self._controls[k] = control
+                elif kind != "fixed" and self.backend != "headless":
+                    self._pending_controls[k] = v
+                if k == "vmin_vmax":
+                    self.params["vmin"] = self.params["vmin_vmax"][0]
+                    self.params["vmax"] = self.params["vmin_vmax"][1]
+
+    def _toggle_player(self, key, playing):
+        """Start or stop playing *key*, called by its play button."""
+        player = self._players.get(key)
+        if player is None:
+            if not playing:
+                return
+            from .playback import Player
+
+            player = self._players[key] = Player(self, key)
+        if playing:
+            player.start()
+        else:
+            player.stop()
+
+    def _create_pending_controls(self):
+        """Create the matplotlib widgets for any params that don't have one yet."""
+        if self.use_ipywidgets or len(self._pending_controls) == 0:
+            return
+        pending = self._pending_controls
+        self._pending_controls = {}
+        mpl_layout = create_mpl_controls_fig(pending)
+        self._control_figures.append(mpl_layout[0])
+        widget_y = 0.05
+        # the params already have the right values so swallow the updates triggered
+        # by moving the new widgets to match them.
+        held_keys, self._held_keys = self._held_keys, []
+        try:
+            for k, v in pending.items():
+                init_val, control, _, widget_y, _ = kwarg_to_mpl_widget(
+                    mpl_layout[0],
+                    mpl_layout[1:],
+                    widget_y,
+                    k,
+                    v,
+                    partial(self.slider_updated, key=k),
+                    self.slider_format_strings[k],
+                )
+                self._controls[k] = control
+                if not np.all(init_val == self.params[k]):
+                    # the param was set before the widget existed
+                    self._set_control(k, self._param_to_change(k, self.params[k])[0])
+        finally:
+            self._held_keys = held_keys
+
+    def _param_to_change(self, key, value):
+        """Convert a param value to what a widget would report, and the values to index."""
+        values, kind = self._param_specs.get(key, (None, "widget"))
+        if kind == "slider":
+            return value_to_index(values, value), values
+        elif kind == "range":
+            return tuple(value_to_index(values, v) for v in value), values
+        elif kind == "categorical":
+            return value_to_index(values, value), values
+        return value, None
+
+    def _set_control(self, key, new):
+        """Set the widget for *key* to *new*.
+
+        Returns
+        -------
+        bool
+            Whether there was a widget to set. If there was then the widget's callbacks
+            will have taken care of updating the params.
+        """
+        control = self._controls.get(key)
+        if control is None:
+            return False
+        kind = self._param_specs.get(key, (None, "widget"))[1]
+        if "Box" in str(control.__class__):
+            # ipywidgets slider with a label and maybe a play button
+            for obj in control.children:
+                if "Slider" in str(obj.__class__):
+                    obj.value = new
+        elif hasattr(control, "set_val"):
+            control.set_val(new)
+        elif hasattr(control, "set_active"):
+            # matplotlib radio buttons
+            if kind == "widget":
+                new = [label.get_text() for label in control.labels].index(new)
+            control.set_active(new)
+        elif hasattr(control, "index") and kind != "widget":
+            # ipywidgets selection widget
+            control.index = new
+        elif hasattr(control, "value"):
+            control.value = new
+        else:
+            return False
+        return True
+
+    def set_params(self, **params):
+        """Set the values of parameters.
+
+        This will update the widgets (if they have been created) and then
+        call all the interactive functions that depend on the changed params,
+        each only once. Values of sliders are snapped to the closest possible value.
+
+        Parameters
+        ----------
+        **params
+            The new values. For range sliders give a tuple of ``(min, max)``.
+
+        Examples
+        --------
+        ::
+
+            ctrls = Controls(tau=(0, 10), beta=np.linspace(0, 1))
+            iplt.plot(x, f, controls=ctrls)
+            ctrls.set_params(tau=5, beta=0.5)
+        """
+        self._set_params(params)
+
+    def _set_params(self, params, draw=True, also_update=()):
+        for k in params:
+            if k not in self.params:
+                raise KeyError(f"{k} is not a param in this Controls object.")
+        self._held_keys = []
+        try:
+            for k, v in params.items():
+                new, values = self._param_to_change(k, v)
+                if not self._set_control(k, new):
+                    self.slider_updated({"new": new}, k, values)
+            keys = self._held_keys
+        finally:
+            self._held_keys = None
+        self._run_updates([*keys, *(k for k in also_update if k not in keys)], draw=draw)
+
+    def render(self, fig, params=None, format="png", **savefig_kwargs):
+        """Render *fig* with the given params and return the image as bytes.
+
+        The rendered frames are kept in `Controls.render_cache` so asking for the
+        same params again returns the stored image without calling any of the
+        functions or drawing the figure.
+
+        Parameters
+        ----------
+        fig : Figure
+            The figure to render. It should be controlled by this `Controls` object.
+        params : dict, optional
+            The values of the params to render. Any params that are not given keep
+            their current value. Values of sliders are snapped as in `Controls.set_params`.
+        format : str, default: "png"
+            Passed to `~matplotlib.figure.Figure.savefig`. Use ``"rgba"`` for the raw
+            RGBA buffer, the shape of which is given by ``fig.canvas.get_width_height()``.
+        **savefig_kwargs
+            Passed through to `~matplotlib.figure.Figure.savefig`.
+
+        Returns
+        -------
+        bytes
+
+        Examples
+        --------
+        ::
+
+            ctrls = Controls(tau=(0, 10), backend="headless")
+            fig, ax = plt.subplots()
+            iplt.plot(x, f, controls=ctrls, ax=ax)
+            png = ctrls.render(fig, {"tau": 5})
+        """
+        if params is None:
+            params = {}
+        for k in params:
+            if k not in self.params:
+                raise KeyError(f"{k} is not a param in this Controls object.")
+        # snap to what the params will actually end up as so that e.g. 4.99 and 5
+        # on a slider with a step of 1 share a frame
+        target = dict(self.params)
+        for k, v in params.items():
+            new, values = self._param_to_change(k, v)
+            if values is None:
+                target[k] = new
+            elif isinstance(new, tuple):
+                target[k] = values[list(new)]
+            else:
+                target[k] = values[new]
+        key = (fig, format, fingerprint(target), fingerprint(savefig_kwargs))
+        frame = self.render_cache.get(key)
+        if frame is not None:
+            return frame
+
+        def limits():
+            return [(ax.get_xlim(), ax.get_ylim()) for ax in fig.axes]
+
+        target_key = fingerprint(target)
+        if self._last_render.get(fig) != (target_key, limits()):
+            # autoscaling only ever grows the limits, so start from the same view every
+            # time or the frame would depend on what was rendered before it
+            views = self._render_views.get(fig)
+            if views is None:
+                views = self._render_views[fig] = limits()
+            for ax, (xlim, ylim) in zip(fig.axes, views):
+                ax.set_xlim(xlim, auto=None)
+                ax.set_ylim(ylim, auto=None)
+            changed = {
+                k: v
+                for k, v in params.items()
+                if fingerprint(target[k]) != fingerprint(self.params[k])
+            }
+            # all of the functions as the limits need to be worked out again from that view
+            self._set_params(changed, draw=False, also_update=list(self.params))
+            self._last_render[fig] = (target_key, limits())
+        from io import BytesIO
+
+        buf = BytesIO()
+        fig.savefig(buf, format=format, **savefig_kwargs)
+        frame = buf.getvalue()
+        self.render_cache[key] = frame
+        return frame
 
     def _slider_updated(self, change, key, values):
         # Gotta also give the indices in order to support
@@ -183,22 +485,59 @@ class Controls:
                 self.params[key] = values[int(change["new"])]
 
         self.indices[key] = change["new"]
-        if self.use_cache:
+        if self._held_keys is not None:
+            # in the middle of set_params - update everything at once at the end
+            self._held_keys.append(key)
+        else:
+            self._run_updates([key])
+
+    def _run_updates(self, keys, draw=True):
+        """Call the functions and redraw the figures that depend on *keys*.
+
+        Each function is only called once even if it depends on more than one of the keys.
+        If *draw* is False the figures are not redrawn.
+        """
+        if self.use_cache and self.shared_cache is not None:
+            cache = _SharedCacheView(
+                self.shared_cache,
+                self.params,
+                owner=self._cache_owner,
+                quota=self.shared_cache_quota,
+            )
+        elif self.use_cache:
             cache = {}
         else:
             cache = None
 
-        for f, params in self._update_funcs[key]:
-            ps = {}
-            idxs = {}
-            for k in params:
-                ps[k] = self.params[k]
-                idxs[k] = self.indices[k]
-            f(params=ps, indices=idxs, cache=cache)
-        for f, params in self._user_callbacks[key]:
-            f(**{key: self.params[key] for key in params})
-
-        for f in self.figs[key]:
+        called = set()
+        for key in keys:
+            for f, params in self._update_funcs[key]:
+                if f in called:
+                    continue
+                called.add(f)
+                ps = {}
+                idxs = {}
+                for k in params:
+                    ps[k] = self.params[k]
+                    idxs[k] = self.indices[k]
+                f(params=ps, indices=idxs, cache=cache)
+        for key in keys:
+            for f, params in self._user_callbacks[key]:
+                if f in called:
+                    continue
+                called.add(f)
+                f(**{key: self.params[key] for key in params})
+
+        if not draw or self.backend == "headless":
+            # on Agg draw_idle renders immediately, but headless figures
+            # only need to be rendered when they are saved.
+            return
+        figs = []
+        for key in keys:
+            for f in self.figs[key]:
+                if f not in figs:
+                    figs.append(f)
+        for f in figs:
             f.canvas.draw_idle()
 
     def slider_updated(self, change, key, values):
@@ -239,6 +578,20 @@ class Controls:
                 callback(**{key: self.params[key] for key in params})
         self._register_function(callback, fig=None, params=params)
 
+    def _register_prefetcher(self, f, params):
+        """Register *f* to load data for upcoming values of *params* in the background.
+
+        *f* will be called as ``f(key, indices)`` with the name of the param and a
+        list of the upcoming indices of that param. It should return quickly.
+        """
+        for p in params:
+            self._prefetchers[p].append(f)
+
+    def _prefetch(self, key, indices):
+        """Ask the interactive functions to start loading the upcoming *indices* of *key*."""
+        for f in self._prefetchers[key]:
+            f(key, indices)
+
     def _register_function(self, f, fig=None, params=None):
         """If params is None use the entire current set of params."""
         if params is None:
@@ -256,6 +609,11 @@ class Controls:
                     # also should probably register a close_event callback to remove
                     # the figure
 
+    def _unregister_function(self, f):
+        """Stop calling *f* when params change."""
+        for funcs in [*self._update_funcs.values(), *self._user_callbacks.values()]:
+            funcs[:] = [(g, params) for g, params in funcs if g is not f]
+
     def save_animation(
         self, filename, fig, param, interval=20, func_anim_kwargs=None, N_frames=None, **kwargs
     ):
@@ -286,42 +644,57 @@ class Controls:
         -------
         anim : matplotlib.animation.FuncAniation
         """
+        from matplotlib.animation import FuncAnimation
+        from matplotlib.widgets import Slider as mSlider
+
         if func_anim_kwargs is None:
             func_anim_kwargs = {}
-        slider = self.controls[param]
+        slider = self.controls.get(param)
         ipywidgets_slider = False
-        if "Box" in str(slider.__class__):
-            for obj in slider.children:
-                if "Slider" in str(obj.__class__):
-                    slider = obj
-
-        if isinstance(slider, mSlider):
-            min_ = slider.valmin
-            max_ = slider.valmax
-            if slider.valstep is None:
-                n_steps = N_frames if N_frames else 200
-                step = (max_ - min_) / n_steps
-            else:
-                step = slider.valstep
-        elif "Slider" in str(slider.__class__):
-            ipywidgets_slider = True
-            min_ = slider.min
-            max_ = slider.max
-            step = slider.step
-        else:
-            raise NotImplementedError(
-                "Cannot save animation for slider of type {slider.__class__.__name__}"
-            )
+        values, kind = self._param_specs.get(param, (None, "widget"))
+        if slider is None and kind in ["slider", "continuous"]:
+            # no widget e.g. for headless controls - step through the values directly
+            if kind == "continuous":
+                values = np.linspace(*values, N_frames if N_frames else 200)
+            N = len(values)
 
-        N = int((max_ - min_) / step)
+            def f(i):
+                self.set_params(**{param: values[i]})
+                return []
 
-        def f(i):
-            val = min_ + step * i
-            if ipywidgets_slider:
-                slider.value = val
+        else:
+            if "Box" in str(slider.__class__):
+                for obj in slider.children:
+                    if "Slider" in str(obj.__class__):
+                        slider = obj
+
+            if isinstance(slider, mSlider):
+                min_ = slider.valmin
+                max_ = slider.valmax
+                if slider.valstep is None:
+                    n_steps = N_frames if N_frames else 200
+                    step = (max_ - min_) / n_steps
+                else:
+                    step = slider.valstep
+            elif "Slider" in str(slider.__class__):
+                ipywidgets_slider = True
+                min_ = slider.min
+                max_ = slider.max
+                step = slider.step
             else:
-                slider.set_val(val)
-            return []
+                raise NotImplementedError(
+                    "Cannot save animation for slider of type {slider.__class__.__name__}"
+                )
+
+            N = int((max_ - min_) / step)
+
+            def f(i):
+                val = min_ + step * i
+                if ipywidgets_slider:
+                    slider.value = val
+                else:
+                    slider.set_val(val)
+                return []
 
         repeat = func_anim_kwargs.pop("repeat", False)
         anim = FuncAnimation(fig, f, frames=N, interval=interval, repeat=repeat, **func_anim_kwargs)
@@ -334,10 +707,15 @@ class Controls:
 
     def display(self):
         """Display the display the ipywidgets controls or show the control figures."""
+        if self.backend == "headless":
+            return
         if self.use_ipywidgets:
+            from IPython.display import display as ipy_display
+
             ipy_display(self.vbox)
         else:
-            for fig in self.control_figures:
+            self._create_pending_controls()
+            for fig in self._control_figures:
                 if fig is not None:
                     fig.show()
 
@@ -346,7 +724,7 @@ class Controls:
         self.display()
 
     def _ipython_display_(self):
-        ipy_display(self.vbox)
+        self.display()
 
     def __getitem__(self, key):
         """
@@ -375,17 +753,24 @@ class Controls:
 
     def __enter__(self):
         """Have this controller act as the active controller."""
-        self._context = _controls_proxy(self, context=True, keys=list(self.params.keys()))
-        return self._context
+        return _controls_proxy(self, context=True, keys=list(self.params.keys()))
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Remove this controller from the controls stack."""
-        self._context._stack.remove(self._context)
+        # look this up rather than storing it on self so that the same controls can
+        # be used as a context manager by multiple threads at once
+        for proxy in reversed(_controls_stack.get()):
+            if proxy.ctrl is self:
+                proxy.__exit__(exc_type, exc_value, traceback)
+                break
 
 
-class _controls_proxy:
-    _stack = []  # noqa: RUF012
+# the active controls for ``with controls:`` blocks. This is a contextvar rather than
+# a global list so that threads (and asyncio tasks) each get their own stack.
+_controls_stack = ContextVar("_controls_stack", default=())
 
+
+class _controls_proxy:
     def __init__(self, ctrl, context, keys=None):
         self.ctrl = ctrl
         if keys is None:
@@ -396,10 +781,12 @@ class _controls_proxy:
             self.__enter__()
 
     def __enter__(self):
-        self._stack.append(self)
+        _controls_stack.set((*_controls_stack.get(), self))
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self._stack.remove(self)
+        stack = list(_controls_stack.get())
+        stack.remove(self)
+        _controls_stack.set(tuple(stack))
 
 
 def gogogo_controls(
@@ -416,8 +803,9 @@ def gogogo_controls(
     This should be private - users should NOT use this.
     """
     # check if we're in a controls context manager
-    if len(_controls_proxy._stack) > 0:
-        ctrl_context = _controls_proxy._stack[-1]
+    stack = _controls_stack.get()
+    if len(stack) > 0:
+        ctrl_context = stack[-1]
         if extra_controls is None:
             extra_controls = [ctrl_context]
         else:
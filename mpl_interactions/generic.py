@@ -1,16 +1,21 @@
 """Functions that will be useful irrespective of backend."""
 
+import time
 from collections.abc import Callable
+from functools import partial
 
 import numpy as np
 from matplotlib import __version__ as mpl_version
 from matplotlib import get_backend
-from matplotlib.colors import TABLEAU_COLORS, XKCD_COLORS, to_rgba_array
+from matplotlib.backend_bases import TimerBase
+from matplotlib.colors import TABLEAU_COLORS, XKCD_COLORS, Normalize, to_rgba_array
 from matplotlib.path import Path
 from matplotlib.pyplot import close, ioff, subplots
-from matplotlib.widgets import LassoSelector
+from matplotlib.widgets import LassoSelector, RectangleSelector
+from mpl_toolkits.axes_grid1 import make_axes_locatable
 from numpy import asanyarray, asarray, max, min
 
+from .caching import LRUCache
 from .controller import gogogo_controls, prep_scalars
 from .helpers import (
     callable_else_value_no_cast,
@@ -19,8 +24,20 @@ from .helpers import (
     notebook_backend,
 )
 from .mpl_kwargs import imshow_kwargs_list, kwarg_popper
+from .pyramid import PyramidDisplay
+from .slicing import (
+    ChunkCache,
+    Projector,
+    RoiTrace,
+    SliceLoader,
+    VideoFrames,
+    _materialize,
+    robust_limits,
+    sample_limits,
+    squeeze,
+)
 from .utils import figure, nearest_idx
-from .xarray_helpers import get_hs_axes, get_hs_extent, get_hs_fmts
+from .xarray_helpers import DataArraySlicer, get_hs_axes, get_hs_extent, get_hs_fmts
 
 # functions that are methods
 __all__ = [
@@ -29,6 +46,8 @@ __all__ = [
     "panhandler",
     "image_segmenter",
     "hyperslicer",
+    "ortho_slicer",
+    "video_slicer",
 ]
 
 
@@ -581,6 +600,18 @@ def hyperslicer(
     is_color_image=False,
     controls=None,
     display_controls=True,
+    cmap_percentiles=(2, 98),
+    asynchronous=None,
+    slice_cache_size=None,
+    compress_slices=False,
+    read_ahead=None,
+    pyramid=False,
+    projections=None,
+    projection_block_size=None,
+    roi_trace=None,
+    trace_ax=None,
+    cursor_profile=None,
+    profile_ax=None,
     **kwargs,
 ):
     """View slices from a hyperstack of images selected by sliders.
@@ -593,6 +624,8 @@ def hyperslicer(
     arr : arraylike or xarray
         Hyperstack of images. The last 2 or 3 dimensions will be treated as individiual images.
         If an xarray.DataArray then the dimensions will be automatically inferred.
+        Arrays that are not in memory (e.g. h5py, zarr, dask or np.memmap) are never
+        loaded in full, only the slice being shown is read.
     alpha : float, Callable or widget shorthand, indexed controls, optional
         The alpha of the image. If a callable then it will receive parameters be autoupdated.
         Can also be given a widget shorthand to automatically generate a slider
@@ -605,10 +638,17 @@ def hyperslicer(
     vmin_vmax : tuple of float
         Used to generate a range slider for vmin and vmax. Should be given in range slider
         notation: `("r", 0, 1)`.
-    autoscale_cmap : bool
-        If True rescale the colormap for every function update. Will not update
+    autoscale_cmap : bool or str
+        If True rescale the colormap to the min and max of every slice. Will not update
         if vmin and vmax are provided or if the returned image is RGB(A) like.
-        forwarded to matplotlib
+        Can also be one of the following to use robust limits from *cmap_percentiles*:
+
+        - "sample": the percentiles of a random sample of the pixels of each slice.
+        - "global": the percentiles of the whole hyperstack, which are computed once
+          before the first slice is shown, reading it slice by slice in parallel.
+        - the name of a slider: the percentiles of each value of that slider,
+          also computed once.
+
     ax : matplotlib axis, optional
         if None a new figure and axis will be created
     slider_formats : None, string, or dict
@@ -638,6 +678,56 @@ def hyperslicer(
         controls
     display_controls : boolean
         Whether the controls should display on creation. Ignored if controls is specified.
+    cmap_percentiles : (float, float), default: (2, 98)
+        The percentiles to use as the colormap limits for robust *autoscale_cmap*.
+    asynchronous : bool, optional
+        Whether to load slices in background threads. While a slice is loading the
+        previous one stays on screen, and if the sliders move on before it has
+        started loading it is skipped. Defaults to True for dask arrays, including
+        dask backed DataArrays. Only has an effect with interactive backends that
+        have timers (e.g. ipympl or qt).
+    slice_cache_size : int, optional
+        How many slices to keep in memory. Defaults to 32 for arrays that are not
+        already in memory (e.g. dask, h5py, zarr or np.memmap) or with *projections*, and 0
+        for numpy arrays.
+    compress_slices : bool or str, default: False
+        Whether to compress the slices in the cache so that many more fit in memory, e.g.
+        to loop over a whole time axis without reading from disk. If True use lz4 from
+        numcodecs if it is installed, otherwise zlib. Can also be ``"lz4"`` or ``"zlib"``.
+    read_ahead : int, optional
+        How many slices to load (or decompress) in the background ahead of the one
+        being shown, in the direction the sliders are moving, e.g. while playing.
+        Defaults to 2 if slices are cached, otherwise 0.
+    pyramid : bool, default: False
+        If True only give matplotlib the part of each slice that is in view, downsampled
+        to about the resolution of the screen, switching to finer resolutions when
+        zooming in. This makes large (e.g. 16k x 16k) slices much faster to show.
+        See `mpl_interactions.pyramid.PyramidDisplay`.
+    projections : dict, optional
+        A slider name and one of ``"max"``, ``"mean"`` or ``"sum"`` to show the
+        projection over a range of that axis, e.g. ``{"axis0": "max"}`` for a
+        maximum intensity projection. The slider becomes a range slider. Projections
+        are built from cached reductions of blocks of the axis, so moving one end of
+        the range doesn't recompute all of it, see `mpl_interactions.slicing.Projector`.
+        Only one axis can be projected.
+    projection_block_size : int, optional
+        The number of slices in each block of *projections*. Defaults to the chunk
+        size of *arr* along the projected axis, or the square root of its length.
+    roi_trace : str, optional
+        The name of a slider to plot the mean of a region of interest along. Drag a
+        rectangle on the image to choose the region. The trace is read in one pass
+        over the stack, reading only the region, and when the region is changed only
+        the strips of pixels that were added or removed are read, see
+        `mpl_interactions.slicing.RoiTrace`.
+    trace_ax : matplotlib axis, optional
+        The axis to plot *roi_trace* on. If None one is added below *ax*.
+    cursor_profile : str, optional
+        The name of a slider to plot the values along at the pixel under the mouse,
+        e.g. the spectrum at that pixel. Only the values at that pixel are read, and
+        the profiles of recently hovered pixels are kept. Updates are limited to about
+        30 per second with interactive backends.
+    profile_ax : matplotlib axis, optional
+        The axis to plot *cursor_profile* on. If None one is added to the right of *ax*.
     **kwargs :
         `names` can be used to set the axes names, `axes` can be used to set the displayed values
         of multiple sliders, and `axis0`, `axis1` etc can be used with widget shorthand to set the
@@ -647,13 +737,20 @@ def hyperslicer(
     -------
     controls
     """
-    arr = np.squeeze(arr)
-
     arr_type = "numpy"
     if "xarray.core.dataarray.DataArray" in str(arr.__class__):
         arr_type = "xarray"
     elif "dask.array.core.Array" in str(arr.__class__):
         arr_type = "dask"
+    elif isinstance(arr, np.memmap) or (not isinstance(arr, np.ndarray) and hasattr(arr, "shape")):
+        # e.g. h5py, zarr or memmap, only ever read the slices that are shown.
+        # checked before squeezing as a squeezed memmap is a plain ndarray
+        arr_type = "lazy"
+    dask_backed = arr_type == "dask" or (
+        arr_type == "xarray" and "dask.array.core.Array" in str(arr.data.__class__)
+    )
+
+    arr = squeeze(arr)
 
     if arr.ndim < 3 + is_color_image:
         raise ValueError(
@@ -734,12 +831,41 @@ def hyperslicer(
             slider_format_strings[name] = "{:.0f}"
             kwargs[name] = np.arange(arr.shape[i])
 
+    projections = {} if projections is None else dict(projections)
+    if len(projections) > 1:
+        raise ValueError(f"Can only project along one axis but got {list(projections)}")
+    proj_dim = None
+    for name in projections:
+        if name not in name_to_dim:
+            raise ValueError(f"Can't project along {name!r}, it is not one of {list(name_to_dim)}")
+        proj_dim = name_to_dim[name]
+        proj_mode = projections[name]
+        values = kwargs[name]
+        if isinstance(values, tuple):
+            kwargs[name] = ("r", *values)
+        elif isinstance(values, set):
+            raise ValueError(f"Can't project along {name!r} as it is categorical")
+        else:
+            kwargs[name] = ("r", np.asarray(values))
+
+    for along in (roi_trace, cursor_profile):
+        if along is None:
+            continue
+        if along not in name_to_dim:
+            raise ValueError(f"Can't plot along {along!r}, it is not one of {list(name_to_dim)}")
+        if is_color_image or projections:
+            raise ValueError(
+                "roi_trace and cursor_profile can't be used with color images or projections"
+            )
+
     extent = kwargs.get("extent", None)
     origin = kwargs.get("origin", "upper")
     if arr_type == "xarray":
         slider_format_strings = get_hs_fmts(arr, is_color_image=is_color_image)
         if extent is None:
             extent = get_hs_extent(arr, is_color_image=is_color_image, origin=origin)
+        # from here on only read slices by position, with isel so dask stays lazy
+        arr = DataArraySlicer(arr)
 
     extra_ctrls = []
     funcs, extra_ctrls, param_excluder = prep_scalars(kwargs, vmin=vmin, vmax=vmax, alpha=alpha)
@@ -770,11 +896,101 @@ def hyperslicer(
         def vmax(**kwargs):
             return kwargs["vmax"]
 
+    if slice_cache_size is None:
+        slice_cache_size = 0 if arr_type == "numpy" and not projections else 32
+    if projections:
+        source = Projector(arr, proj_dim, proj_mode, block_size=projection_block_size)
+    else:
+        source = arr
+    loader = SliceLoader(source, cache_size=slice_cache_size, compress=compress_slices)
+    if read_ahead is None:
+        read_ahead = 2 if slice_cache_size > 0 else 0
+    last_key = None
+
+    def load_ahead(key):
+        # follow the slider that moved e.g. the one being played, wrapping around
+        # at the end like the play buttons do
+        changed = [i for i, (a, b) in enumerate(zip(key, last_key)) if a != b]
+        if len(changed) != 1:
+            return
+        dim = changed[0]
+        if dim == proj_dim:
+            return
+        step = key[dim] - last_key[dim]
+        ahead = []
+        for i in range(1, read_ahead + 1):
+            k = list(key)
+            k[dim] = (key[dim] + i * step) % arr.shape[dim]
+            ahead.append(tuple(k))
+        loader.prefetch(ahead)
+
+    if asynchronous is None:
+        asynchronous = dask_backed
+    if asynchronous and controls.backend != "headless":
+        # the loaded slices are shown from a timer so that the image is only
+        # ever touched from the main thread
+        timer = fig.canvas.new_timer(interval=20)
+        if type(timer) is TimerBase:
+            # e.g. Agg, no event loop to run the timer so load synchronously
+            asynchronous = False
+        else:
+
+            def poll():
+                if loader.poll():
+                    timer.stop()
+
+            timer.add_callback(poll)
+    else:
+        asynchronous = False
+
+    robust_cmap = vmin is None and vmax is None and not is_color_image
+    robust_cmap = robust_cmap and isinstance(autoscale_cmap, str)
+    if robust_cmap and projections and autoscale_cmap != "sample":
+        raise ValueError("autoscale_cmap can only be a bool or 'sample' with projections")
+    if robust_cmap and autoscale_cmap == "global":
+        global_limits = robust_limits(arr, cmap_percentiles, image_dims=im_dims)
+    elif robust_cmap and autoscale_cmap != "sample":
+        if autoscale_cmap not in name_to_dim:
+            raise ValueError(
+                "autoscale_cmap must be a bool, 'sample', 'global', or the name of a slider"
+                f" ({list(name_to_dim)}) but it is {autoscale_cmap!r}"
+            )
+        axis_limits = robust_limits(
+            arr, cmap_percentiles, axis=name_to_dim[autoscale_cmap], image_dims=im_dims
+        )
+
+    def set_limits(new_data, key):
+        if new_data.ndim == 3 or vmin is not None or vmax is not None:
+            return
+        if not isinstance(autoscale_cmap, str):
+            if autoscale_cmap:
+                im.norm.autoscale(new_data)
+        elif autoscale_cmap == "sample":
+            im.set_clim(*sample_limits(new_data, cmap_percentiles, fallback=im.get_clim()))
+        elif autoscale_cmap == "global":
+            im.set_clim(*global_limits)
+        else:
+            im.set_clim(*axis_limits[key[name_to_dim[autoscale_cmap]]])
+
+    def show(new_data, key):
+        if pyramid:
+            display.set_data(new_data, key)
+        else:
+            im.set_data(new_data)
+        set_limits(new_data, key)
+
+    def show_and_draw(new_data, key):
+        show(new_data, key)
+        fig.canvas.draw_idle()
+
     def update(params, indices, cache):
         if title is not None:
             ax.set_title(title.format(**params))
 
         for k, v in indices.items():
+            if k in projections:
+                # range sliders start at 0 before they have been moved
+                v = (0, arr.shape[proj_dim] - 1) if np.isscalar(v) else tuple(int(i) for i in v)
             try:
                 slices[name_to_dim[k]] = v
             except KeyError:
@@ -782,11 +998,17 @@ def hyperslicer(
                 # like vmax = (240, 250)
                 pass
 
-        new_data = arr[tuple(slices)]
-        im.set_data(new_data)
-
-        if autoscale_cmap and (new_data.ndim != 3) and vmin is None and vmax is None:
-            im.norm.autoscale(new_data)
+        nonlocal last_key
+        key = tuple(slices)
+        if asynchronous:
+            if not loader.request(key, partial(show_and_draw, key=key)):
+                # keep showing the previous slice until this one has loaded
+                timer.start()
+        else:
+            show(loader.get(key), key)
+        if read_ahead and last_key is not None:
+            load_ahead(key)
+        last_key = key
 
         if isinstance(vmin, Callable):
             im.norm.vmin = vmin(**param_excluder(params, "vmin"))
@@ -795,9 +1017,24 @@ def hyperslicer(
         if isinstance(alpha, Callable):
             im.set_alpha(callable_else_value_no_cast(alpha, param_excluder(params, "alpha"), cache))
 
+    def prefetch(key, upcoming):
+        if key not in name_to_dim or key in projections or slice_cache_size == 0:
+            return
+        keys = []
+        for i in upcoming:
+            k = list(slices)
+            k[name_to_dim[key]] = i
+            keys.append(tuple(k))
+        loader.prefetch(keys)
+
     controls._register_function(update, fig, params.keys())
+    controls._register_prefetcher(prefetch, params.keys())
     # make it once here so we can use the dims in update
-    new_data = arr[tuple(0 for i in range(arr.ndim - im_dims))]
+    last_key = tuple(0 for i in range(arr.ndim - im_dims))
+    if projections:
+        slices[proj_dim] = (0, arr.shape[proj_dim] - 1)
+        last_key = tuple(slices)
+    new_data = loader.get(last_key)
     im = ax.imshow(
         new_data,
         alpha=alpha,
@@ -809,7 +1046,400 @@ def hyperslicer(
     # i know it's bad news to use private methods :(
     # but idk how else to accomplish being a psuedo-pyplot
     ax._sci(im)
+    if pyramid:
+        display = PyramidDisplay(im)
+    if isinstance(autoscale_cmap, str):
+        set_limits(new_data, last_key)
     if title is not None:
         ax.set_title(title.format(**params))
+    if roi_trace is not None:
+        _add_roi_trace(
+            arr, controls, ax, im, roi_trace, name_to_dim, trace_ax, display if pyramid else None
+        )
+    if cursor_profile is not None:
+        _add_cursor_profile(
+            arr,
+            controls,
+            ax,
+            im,
+            cursor_profile,
+            name_to_dim,
+            profile_ax,
+            display if pyramid else None,
+        )
+
+    return controls
+
+
+def video_slicer(
+    reader,
+    cache_size=32,
+    read_ahead=8,
+    keyframe_interval=32,
+    asynchronous=True,
+    **kwargs,
+):
+    """Step through the frames of a video without loading all of it.
+
+    The video is read through a `mpl_interactions.slicing.VideoFrames`, which keeps
+    the recently decoded frames and decodes the frames after the one shown in a
+    background thread.
+
+    Parameters
+    ----------
+    reader : object
+        The video, with ``len(reader)`` and ``reader.get_frame(i)``, and optionally
+        ``reader.read_next()`` and ``reader.keyframes``, see
+        `mpl_interactions.slicing.VideoFrames`.
+    cache_size : int, default: 32
+        How many decoded frames to keep.
+    read_ahead : int, default: 8
+        How many frames after the one shown to decode in the background.
+    keyframe_interval : int, default: 32
+        If the reader doesn't list its keyframes, the furthest ahead to decode forward
+        to rather than seek.
+    asynchronous : bool, default: True
+        Whether to decode the frame to show in a background thread, keeping the
+        previous frame on screen until it is ready. See `hyperslicer`.
+    **kwargs :
+        Passed on to `hyperslicer`. The slider is named ``frame`` unless *names* is given.
+
+    Returns
+    -------
+    controls
+    """
+    frames = VideoFrames(
+        reader, cache_size=cache_size, read_ahead=read_ahead, keyframe_interval=keyframe_interval
+    )
+    kwargs.setdefault("names", ("frame",))
+    kwargs.setdefault("is_color_image", frames.ndim == 4)
+    # the frames are cached by VideoFrames
+    kwargs.setdefault("slice_cache_size", 0)
+    return hyperslicer(frames, asynchronous=asynchronous, **kwargs)
+
+
+def _image_coords(im, display, x, y, shape):
+    """Convert data coordinates on *im* into fractional (row, col) of the full image."""
+    # pyramids change the extent of the image to that of the part being shown
+    left, right, bottom, top = im.get_extent() if display is None else display.extent
+    if im.origin == "upper":
+        bottom, top = top, bottom
+    n_rows, n_cols = shape
+    return (y - bottom) / (top - bottom) * n_rows, (x - left) / (right - left) * n_cols
+
+
+def _slider_key(indices, name_to_dim):
+    """Put the indices of the sliders of a hyperstack in the order of its dimensions."""
+    key = [0] * len(name_to_dim)
+    for k, i in name_to_dim.items():
+        key[i] = indices[k]
+    return tuple(key)
+
+
+def _slider_plot(arr, controls, ax, name, dim, ylabel):
+    """Set up a line plot of something along the slider *name*."""
+    values, kind = controls._param_specs.get(name, (None, "widget"))
+    x = np.asarray(values) if kind == "slider" else np.arange(arr.shape[dim])
+    (line,) = ax.plot(x, np.full(len(x), np.nan))
+    marker = ax.axvline(x[0], color="k", lw=0.8)
+    ax.set_xlabel(name)
+    ax.set_ylabel(ylabel)
+    return x, line, marker
+
+
+def _add_roi_trace(arr, controls, ax, im, name, name_to_dim, trace_ax=None, display=None):
+    """Plot the mean of a rectangle drawn on *im* along the slider *name*."""
+    fig = ax.get_figure()
+    dim = name_to_dim[name]
+    tracer = RoiTrace(arr, dim)
+    if trace_ax is None:
+        trace_ax = make_axes_locatable(ax).append_axes("bottom", size="35%", pad=0.5)
+    x, line, marker = _slider_plot(arr, controls, trace_ax, name, dim, "ROI mean")
+
+    def draw_trace(key):
+        if state["roi"] is None:
+            return
+        line.set_ydata(tracer.trace(key, state["roi"]))
+        trace_ax.relim()
+        trace_ax.autoscale_view()
+
+    def update(params, indices, cache):
+        key = _slider_key(indices, name_to_dim)
+        marker.set_xdata([x[key[dim]]] * 2)
+        draw_trace(key)
+
+    def to_pixels(lims, n):
+        lims = sorted(lims)
+        start = int(np.clip(np.floor(lims[0]), 0, n - 1))
+        return start, int(np.clip(np.ceil(lims[1]), start + 1, n))
+
+    def on_select(press, release):
+        shape = arr.shape[-2:]
+        r0, c0 = _image_coords(im, display, press.xdata, press.ydata, shape)
+        r1, c1 = _image_coords(im, display, release.xdata, release.ydata, shape)
+        state["roi"] = (*to_pixels((r0, r1), shape[0]), *to_pixels((c0, c1), shape[1]))
+        draw_trace(_slider_key(controls.indices, name_to_dim))
+        fig.canvas.draw_idle()
+
+    # the selector needs a reference to stay alive
+    state = {"roi": None, "selector": RectangleSelector(ax, on_select, interactive=True)}
+    controls._register_function(update, fig, list(name_to_dim))
+
+
+def _add_cursor_profile(
+    arr, controls, ax, im, name, name_to_dim, profile_ax=None, display=None, interval=0.03
+):
+    """Plot the values along the slider *name* at the pixel under the mouse on *im*."""
+    fig = ax.get_figure()
+    dim = name_to_dim[name]
+    if profile_ax is None:
+        profile_ax = make_axes_locatable(ax).append_axes("right", size="50%", pad=0.6)
+    x, line, marker = _slider_plot(arr, controls, profile_ax, name, dim, "value")
+    # the profiles of recently hovered pixels
+    pencils = LRUCache(256)
+    state = {"pixel": None, "pending": None, "last": -np.inf}
+
+    def read(key, pixel):
+        key = list(key)
+        key[dim] = None
+        cache_key = (tuple(key), pixel)
+        pencil = pencils.get(cache_key)
+        if pencil is None:
+            # only read the values along the axis at this pixel
+            key[dim] = slice(None)
+            pencil = _materialize(arr[(*key, *pixel)])
+            pencils[cache_key] = pencil
+        return pencil
+
+    def draw_profile(key):
+        if state["pixel"] is None:
+            return
+        line.set_ydata(read(key, state["pixel"]))
+        profile_ax.relim()
+        profile_ax.autoscale_view()
+
+    def update(params, indices, cache):
+        key = _slider_key(indices, name_to_dim)
+        marker.set_xdata([x[key[dim]]] * 2)
+        draw_profile(key)
+
+    def show(pixel):
+        state["pixel"] = pixel
+        state["last"] = time.perf_counter()
+        draw_profile(_slider_key(controls.indices, name_to_dim))
+        fig.canvas.draw_idle()
+
+    timer = fig.canvas.new_timer(interval=int(interval * 1000))
+    # without an event loop (e.g. Agg) there is nothing to throttle
+    throttle = type(timer) is not TimerBase and controls.backend != "headless"
+    if throttle:
+        timer.single_shot = True
+
+        def flush():
+            pixel, state["pending"] = state["pending"], None
+            if pixel is not None:
+                show(pixel)
+
+        timer.add_callback(flush)
+
+    def on_move(event):
+        if event.inaxes is not ax:
+            return
+        shape = arr.shape[-2:]
+        row, col = _image_coords(im, display, event.xdata, event.ydata, shape)
+        if not (0 <= row < shape[0] and 0 <= col < shape[1]):
+            return
+        pixel = (int(row), int(col))
+        if pixel == state["pixel"]:
+            return
+        if throttle and time.perf_counter() - state["last"] < interval:
+            # show wherever the mouse is once the interval is up
+            if state["pending"] is None:
+                timer.start()
+            state["pending"] = pixel
+            return
+        show(pixel)
+
+    fig.canvas.mpl_connect("motion_notify_event", on_move)
+    controls._register_function(update, fig, list(name_to_dim))
+
+
+def ortho_slicer(
+    arr,
+    names=("z", "y", "x"),
+    fig=None,
+    figsize=None,
+    crosshair=True,
+    crosshair_color="w",
+    chunks=None,
+    cache_bytes=None,
+    vmin=None,
+    vmax=None,
+    slider_formats=None,
+    force_ipywidgets=False,
+    play_buttons=False,
+    controls=None,
+    display_controls=True,
+    **imshow_kwargs,
+):
+    """View the orthogonal XY, XZ and YZ planes through a point of a volume.
+
+    The three planes share one `mpl_interactions.slicing.ChunkCache` so that
+    chunked volumes (e.g. zarr, h5py or dask) are read chunk by chunk and each chunk
+    is only read once while it stays in the cache. When a slider changes only the
+    plane that it moves is updated. Clicking on one of the planes moves the other
+    two planes to that point.
+
+    Parameters
+    ----------
+    arr : arraylike
+        The volume, the last three dimensions are treated as (z, y, x). Any earlier
+        dimensions (e.g. time) get sliders named ``axis0``, ``axis1`` etc.
+    names : (str, str, str), default: ("z", "y", "x")
+        The names of the sliders for the three volume dimensions.
+    fig : matplotlib figure, optional
+        The figure to add the axes to. If None a new figure is created.
+    figsize : (float, float), optional
+        The size of the new figure.
+    crosshair : bool, default: True
+        Whether to draw lines on each plane at the positions of the other two.
+    crosshair_color : color, default: "w"
+        The color of the crosshair lines.
+    chunks : tuple of int, optional
+        The size of the blocks to read, see `mpl_interactions.slicing.ChunkCache`.
+        Defaults to the chunks of *arr*.
+    cache_bytes : int, optional
+        The most memory to keep blocks in, see `mpl_interactions.slicing.ChunkCache`.
+    vmin, vmax : float, optional
+        The limits of the colormap, shared by all three planes. Each that isn't given
+        is taken from the first planes shown.
+    slider_formats : None, string, or dict
+        If None a default value of decimal points will be used. Uses the new {} style formatting
+    force_ipywidgets : boolean
+        If True ipywidgets will always be used, even if not using the ipympl backend.
+        If False the function will try to detect if it is ok to use ipywidgets
+        If ipywidgets are not used the function will fall back on matplotlib widgets
+    play_buttons : bool or str or dict, optional
+        Whether to attach an ipywidgets.Play widget to any sliders that get created.
+    controls : mpl_interactions.controller.Controls
+        An existing controls object if you want to tie multiple plot elements to the same set of
+        controls
+    display_controls : boolean
+        Whether the controls should display on creation. Ignored if controls is specified.
+    **imshow_kwargs :
+        Passed through to `imshow` for all three planes.
+
+    Returns
+    -------
+    controls
+    """
+    arr = squeeze(arr)
+    if arr.ndim < 3:
+        raise ValueError(f"arr must be at least 3D but it is {arr.ndim}D.")
+    if len(names) != 3:
+        raise ValueError(f"names must have one name for each of (z, y, x) but it is {names!r}")
+    n_lead = arr.ndim - 3
+    nz, ny, nx = arr.shape[-3:]
+    z_name, y_name, x_name = names
+
+    ipympl = notebook_backend() or force_ipywidgets
+    gridspec_kw = {"width_ratios": (nx, nz), "height_ratios": (ny, nz)}
+    if fig is None:
+        if ipympl:
+            with ioff():
+                fig, axes = subplots(
+                    2, 2, figsize=figsize, sharex="col", sharey="row", gridspec_kw=gridspec_kw
+                )
+        else:
+            fig, axes = subplots(
+                2, 2, figsize=figsize, sharex="col", sharey="row", gridspec_kw=gridspec_kw
+            )
+    else:
+        axes = fig.subplots(2, 2, sharex="col", sharey="row", gridspec_kw=gridspec_kw)
+    ax_xy, ax_yz, ax_xz = axes[0, 0], axes[0, 1], axes[1, 0]
+    axes[1, 1].set_axis_off()
+    ax_xy.set_ylabel(y_name)
+    ax_xz.set_xlabel(x_name)
+    ax_xz.set_ylabel(z_name)
+    ax_yz.set_xlabel(z_name)
+
+    slider_format_strings = create_slider_format_dict(slider_formats)
+    kwargs = {}
+    lead_names = [f"axis{i}" for i in range(n_lead)]
+    for name, n in zip([*lead_names, *names], arr.shape):
+        slider_format_strings[name] = "{:.0f}"
+        kwargs[name] = np.arange(n)
+    controls, params = gogogo_controls(
+        kwargs, controls, display_controls, slider_format_strings, play_buttons
+    )
+
+    chunk_cache = ChunkCache(arr, chunks=chunks, cache_bytes=cache_bytes)
+
+    def lead_key(indices):
+        return tuple(indices[name] for name in lead_names)
+
+    # (axes, the axis of the volume the plane is perpendicular to, its slider)
+    views = [(ax_xy, 0, z_name), (ax_xz, 1, y_name), (ax_yz, 2, x_name)]
+
+    def get_plane(axis, indices):
+        plane = chunk_cache.plane(axis, indices[names[axis]], lead_key(indices))
+        # YZ is shown with z along the horizontal so that it shares y with XY
+        return plane.T if axis == 2 else plane
+
+    planes = [get_plane(axis, controls.indices) for _, axis, _ in views]
+    if "norm" not in imshow_kwargs:
+        norm = Normalize(vmin, vmax)
+        if vmin is None or vmax is None:
+            norm.autoscale_None(np.concatenate([np.ravel(p) for p in planes]))
+        imshow_kwargs["norm"] = norm
+    imshow_kwargs.setdefault("aspect", "auto")
+    images = [ax.imshow(p, **imshow_kwargs) for (ax, _, _), p in zip(views, planes)]
+    ax_xy._sci(images[0])
+
+    def make_update(im, axis):
+        def update(params, indices, cache):
+            im.set_data(get_plane(axis, indices))
+
+        return update
+
+    for im, (_, axis, name) in zip(images, views):
+        controls._register_function(make_update(im, axis), fig, [*lead_names, name])
+
+    if crosshair:
+        line_kw = {"color": crosshair_color, "lw": 0.8}
+        # (line, the slider giving its position, whether it is vertical)
+        lines = [
+            (ax_xy.axvline(0, **line_kw), x_name, True),
+            (ax_xy.axhline(0, **line_kw), y_name, False),
+            (ax_xz.axvline(0, **line_kw), x_name, True),
+            (ax_xz.axhline(0, **line_kw), z_name, False),
+            (ax_yz.axvline(0, **line_kw), z_name, True),
+            (ax_yz.axhline(0, **line_kw), y_name, False),
+        ]
+
+        def update_crosshair(params, indices, cache):
+            for line, name, vertical in lines:
+                if vertical:
+                    line.set_xdata([indices[name]] * 2)
+                else:
+                    line.set_ydata([indices[name]] * 2)
+
+        update_crosshair(None, controls.indices, None)
+        controls._register_function(update_crosshair, fig, list(names))
+
+    def on_click(event):
+        ax = event.inaxes
+        if event.button != 1 or ax is None or ax.get_navigate_mode() is not None:
+            return
+        # the (horizontal, vertical) sliders of each plane
+        hv = {ax_xy: (x_name, y_name), ax_xz: (x_name, z_name), ax_yz: (z_name, y_name)}
+        if ax not in hv:
+            return
+        new = {}
+        for name, pos in zip(hv[ax], (event.xdata, event.ydata)):
+            n = arr.shape[n_lead + names.index(name)]
+            new[name] = int(np.clip(np.rint(pos), 0, n - 1))
+        controls.set_params(**new)
 
+    fig.canvas.mpl_connect("button_press_event", on_click)
     return controls
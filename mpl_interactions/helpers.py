@@ -1,17 +1,16 @@
 from collections import defaultdict
 from collections.abc import Callable, Iterable
 from functools import partial
+from weakref import WeakKeyDictionary
 
-import matplotlib.widgets as mwidgets
 import numpy as np
-
-try:
-    import ipywidgets as widgets
-except ImportError:
-    pass
 from matplotlib import get_backend
-from matplotlib.pyplot import figure, gca, gcf, ioff
-from matplotlib.pyplot import sca as mpl_sca
+
+from .caching import _Call
+
+# matplotlib.pyplot, matplotlib.widgets and ipywidgets are imported inside the functions
+# that need them to keep ``import mpl_interactions`` fast for scripts that never make
+# any controls.
 
 __all__ = [
     "sca",
@@ -35,6 +34,8 @@ __all__ = [
 
 def sca(ax):
     """Sca that won't fail if figure not managed by pyplot."""
+    from matplotlib.pyplot import sca as mpl_sca
+
     try:
         mpl_sca(ax)
     except ValueError as e:
@@ -94,6 +95,85 @@ def update_datalim_from_xy(ax, x, y, stretch_x=True, stretch_y=True):
     _update_limits(ax, *decompose_bbox(ax.dataLim), x0_, y0_, x1_, y1_, stretch_x, stretch_y)
 
 
+# the data of the lines that mpl_interactions sets, and of everything else, for each axes
+_datalim_state = WeakKeyDictionary()
+
+
+def _bbox_points(x0, y0, x1, y1, minposx, minposy):
+    # the smallest positive values are what log scales autoscale to
+    pairs = [(x0, y0), (x1, y1), (minposx, y0), (x0, minposy)]
+    return np.stack([np.stack(pair, axis=-1) for pair in pairs], axis=-2)
+
+
+def _line_points(x, y):
+    """Return points that span the finite data of each column of *x* and *y*.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Shape (n, lines).
+
+    Returns
+    -------
+    np.ndarray
+        Shape (lines, 4, 2). Points with a non-finite coordinate are skipped when a
+        `~matplotlib.transforms.Bbox` is updated from them.
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    if x.shape[0] == 0:
+        return np.full((x.shape[1], 4, 2), np.inf)
+    finite = np.isfinite(x) & np.isfinite(y)
+
+    def limits(a):
+        lo = np.where(finite, a, np.inf).min(axis=0)
+        hi = np.where(finite, a, -np.inf).max(axis=0)
+        minpos = np.where(finite & (a > 0), a, np.inf).min(axis=0)
+        return lo, hi, minpos
+
+    (x0, x1, minposx), (y0, y1, minposy) = limits(x), limits(y)
+    return _bbox_points(x0, y0, x1, y1, minposx, minposy)
+
+
+def _set_datalim_from_lines(ax, lines, points):
+    """Set the data limits of *ax* as `~matplotlib.axes.Axes.relim` would.
+
+    *lines* are measured from *points* (see ``_line_points``) rather than their paths.
+    The limits of the rest of the artists are kept from last time, and only found
+    again with ``relim`` when artists were added or removed or have changed since the
+    figure was last drawn.
+    """
+    if ax.name != "rectilinear" or not hasattr(ax.dataLim, "minpos") or not lines:
+        ax.relim()
+        return
+    if not hasattr(lines[0], "_set_in_autoscale"):
+        # older matplotlib can't leave lines out of relim
+        ax.relim()
+        return
+    state = _datalim_state.setdefault(
+        ax, {"lines": WeakKeyDictionary(), "others": None, "static": None}
+    )
+    managed = state["lines"]
+    for line, p in zip(lines, points):
+        managed[line] = p
+    present = [line for line in ax.lines if line in managed and line._get_in_autoscale()]
+    others = [a for a in (*ax.lines, *ax.patches, *ax.collections, *ax.images) if a not in managed]
+    ids = [id(a) for a in others]
+    if state["static"] is None or ids != state["others"] or any(a.stale for a in others):
+        for line in present:
+            line._set_in_autoscale(False)
+        try:
+            ax.relim()
+        finally:
+            for line in present:
+                line._set_in_autoscale(True)
+        (x0, y0), (x1, y1) = ax.dataLim.get_points()
+        state["static"] = _bbox_points(x0, y0, x1, y1, *ax.dataLim.minpos)
+        state["others"] = ids
+    all_points = np.concatenate([state["static"], *(managed[line] for line in present)])
+    ax.dataLim.update_from_data_xy(all_points, ignore=True)
+    ax.ignore_existing_data_limits = not np.isfinite(all_points).all(axis=1).any()
+
+
 def notebook_backend():
     """Return True if the backend is ipympl or nbagg, otherwise False."""
     backend = get_backend().lower()
@@ -112,7 +192,7 @@ def callable_else_value(arg, params, cache=None):
     if it's important that the value not be a numpy array.
     """
     if isinstance(arg, Callable):
-        if cache:
+        if cache is not None:
             if arg not in cache:
                 cache[arg] = np.asanyarray(arg(**params))
             return cache[arg]
@@ -124,7 +204,7 @@ def callable_else_value(arg, params, cache=None):
 def callable_else_value_no_cast(arg, params, cache=None):
     """Convert callables to arrays passing existing values through."""
     if isinstance(arg, Callable):
-        if cache:
+        if cache is not None:
             if arg not in cache:
                 cache[arg] = arg(**params)
             return cache[arg]
@@ -164,11 +244,13 @@ def eval_xy(x_, y_, params, cache=None):
         y = params["y"]
     elif isinstance(y_, Callable):
         if cache is not None:
-            if y_ in cache:
-                y = cache[y_]
+            # the same function with a different x is a different result
+            key = _Call(y_, x)
+            if key in cache:
+                y = cache[key]
             else:
                 y = y_(x, **params)
-                cache[y_] = y
+                cache[key] = y
         else:
             y = y_(x, **params)
     else:
@@ -176,7 +258,7 @@ def eval_xy(x_, y_, params, cache=None):
     return np.asanyarray(x), np.asanyarray(y)
 
 
-def kwarg_to_ipywidget(key, val, update, slider_format_string, play_button=None):
+def kwarg_to_ipywidget(key, val, update, slider_format_string, play_button=None, on_play=None):
     """Convert a kwarg to an ipywidget.
 
     Parameters
@@ -193,6 +275,10 @@ def kwarg_to_ipywidget(key, val, update, slider_format_string, play_button=None)
     play_button : bool or None or str, default: None
         If true and the output widget is a slider then added a play button widget
         on the left. Also accepts 'left' or 'right' to specify the play button position.
+    on_play : callable, optional
+        Called with True or False when the play button is pressed or released. If given
+        the play button is a toggle button that leaves the playing to *on_play*, otherwise
+        it is an ipywidgets.Play linked to the slider.
 
     Returns
     -------
@@ -205,10 +291,12 @@ def kwarg_to_ipywidget(key, val, update, slider_format_string, play_button=None)
     param_hash :
         A hash of the possible values, to be used to check duplicates in the future.
     """
+    import ipywidgets as widgets
+
     control = None
     if isinstance(val, set):
         if len(val) == 1:
-            val = val.pop()
+            val = next(iter(val))
             if isinstance(val, tuple):
                 # want the categories to be ordered
                 pass
@@ -292,8 +380,19 @@ def kwarg_to_ipywidget(key, val, update, slider_format_string, play_button=None)
             )
             slider.observe(partial(update, values=val), names="value")
             if play_button is not None and play_button is not False:
-                play = widgets.Play(min=0, max=val.size - 1, step=1)
-                widgets.jslink((play, "value"), (slider, "value"))
+                if on_play is None:
+                    play = widgets.Play(min=0, max=val.size - 1, step=1)
+                    widgets.jslink((play, "value"), (slider, "value"))
+                else:
+                    play = widgets.ToggleButton(
+                        icon="play", tooltip="Play", layout={"width": "4em"}
+                    )
+
+                    def toggled(change):
+                        play.icon = "pause" if change["new"] else "play"
+                        on_play(change["new"])
+
+                    play.observe(toggled, names="value")
                 if isinstance(play_button, str) and play_button.lower() == "right":
                     control = widgets.HBox([slider, label, play])
                 else:
@@ -351,6 +450,9 @@ def create_mpl_controls_fig(kwargs):
     I think maybe the correct approach is to use transforms and actually specify things in inches
     - Ian 2020-09-27
     """
+    import matplotlib.widgets as mwidgets
+    from matplotlib.pyplot import figure, gcf, ioff
+
     init_fig = gcf()
     n_opts = 0
     n_radio = 0
@@ -401,6 +503,8 @@ def create_mpl_controls_fig(kwargs):
 
 def create_mpl_selection_slider(ax, label, values, slider_format_string):
     """Create a slider that behaves similarly to the ipywidgets selection slider."""
+    import matplotlib.widgets as mwidgets
+
     slider = mwidgets.Slider(ax, label, 0, len(values) - 1, valinit=0, valstep=1)
 
     def update_text(val):
@@ -414,6 +518,8 @@ def create_mpl_selection_slider(ax, label, values, slider_format_string):
 
 def create_mpl_range_selection_slider(ax, label, values, slider_format_string):
     """Create a slider that behaves similarly to the ipywidgets selection slider."""
+    import matplotlib.widgets as mwidgets
+
     slider = mwidgets.RangeSlider(
         ax, label, 0, len(values) - 1, valinit=(0, len(values) - 1), valstep=1
     )
@@ -437,6 +543,8 @@ def process_mpl_widget(val, update):
     This needs to be separate so that the controller can call it when mixing ipywidets and
     a widget like scatter_selector without having to create a control figure.
     """
+    import matplotlib.widgets as mwidgets
+
     if isinstance(val, mwidgets.RadioButtons):
         cb = val.on_clicked(partial(changeify, update=partial(update, values=None)))
         return val.value_selected, val, cb, hash(repr(val.labels))
@@ -500,80 +608,127 @@ def kwarg_to_mpl_widget(
         The widget_y to use for the next pass.
     hash
     """
+    import matplotlib.widgets as mwidgets
+
     slider_height, radio_height, gap_height = heights
 
-    # widget_y = 0.05
-    slider_ax = []
-    radio_ax = []
-    radio_buttons = []
-    if isinstance(val, set):
-        if len(val) == 1:
-            val = val.pop()
-            if isinstance(val, tuple):
-                pass
-            else:
-                return val, None, None, widget_y, hash(repr(val))
-        else:
-            val = list(val)
+    if isinstance(val, mwidgets.AxesWidget):
+        val, widget, cb, hash_ = process_mpl_widget(val, update)
+        return val, widget, cb, widget_y, hash_
 
-        n = len(val)
-        longest_len = max([len(list(x)) for x in map(str, val)])
+    init_val, values, kind, hash_ = kwarg_to_param(key, val)
+    if kind == "fixed":
+        # don't need to create a widget
+        return init_val, None, None, widget_y, hash_
+    elif kind == "categorical":
+        n = len(values)
+        longest_len = max([len(list(x)) for x in map(str, values)])
         # should probably use something based on fontsize rather that .015
         width = max(0.15, 0.015 * longest_len)
         radio_ax = fig.add_axes([0.2, 0.9 - widget_y - radio_height * n, width, radio_height * n])
         widget_y += radio_height * n + gap_height
-        radio_buttons = mwidgets.RadioButtons(radio_ax, val, active=0)
+        radio_buttons = mwidgets.RadioButtons(radio_ax, values, active=0)
         cb = radio_buttons.on_clicked(partial(changeify, update=partial(update, values=None)))
-        return val[0], radio_buttons, cb, widget_y, hash(repr(val))
-    elif isinstance(val, mwidgets.AxesWidget):
-        val, widget, cb, hash_ = process_mpl_widget(val, update)
-        return val, widget, cb, widget_y, hash_
+        return init_val, radio_buttons, cb, widget_y, hash_
+
+    slider_ax = fig.add_axes([0.2, 0.9 - widget_y - gap_height, 0.65, slider_height])
+    widget_y += slider_height + gap_height
+    if kind == "range":
+        slider = create_mpl_range_selection_slider(slider_ax, key, values, slider_format_string)
+        cb = slider.on_changed(partial(changeify, update=partial(update, values=values)))
+    elif kind == "continuous":
+        slider = mwidgets.Slider(slider_ax, key, *values)
+
+        def update_text(val):
+            slider.valtext.set_text(slider_format_string.format(val))
+
+        # make sure the initial value also gets formatted
+        update_text(slider.valinit)
+        slider.on_changed(update_text)
+        cb = slider.on_changed(partial(changeify, update=partial(update, values=None)))
     else:
-        slider = None
-        if isinstance(val, tuple) and val[0] in ["r", "range", "rang", "rage"]:
-            if isinstance(val[1], (np.ndarray, list)):
-                vals = val[1]
-            else:
-                vals = np.linspace(*val[1:])
-            slider_ax = fig.add_axes([0.2, 0.9 - widget_y - gap_height, 0.65, slider_height])
-            slider = create_mpl_range_selection_slider(slider_ax, key, vals, slider_format_string)
-            cb = slider.on_changed(partial(changeify, update=partial(update, values=vals)))
-            widget_y += slider_height + gap_height
-            return vals[[0, -1]], slider, cb, widget_y, hash(repr(vals))
-
-        if isinstance(val, tuple):
-            if len(val) == 2:
-                min_ = float(val[0])
-                max_ = float(val[1])
-                slider_ax = fig.add_axes([0.2, 0.9 - widget_y - gap_height, 0.65, slider_height])
-                slider = mwidgets.Slider(slider_ax, key, min_, max_)
-
-                def update_text(val):
-                    slider.valtext.set_text(slider_format_string.format(val))
-
-                # make sure the initial value also gets formatted
-                update_text(slider.valinit)
-                slider.on_changed(update_text)
-                cb = slider.on_changed(partial(changeify, update=partial(update, values=None)))
-                widget_y += slider_height + gap_height
-                return min_, slider, cb, widget_y, hash(repr(val))
-            elif len(val) == 3:
-                # should warn that that doesn't make sense with matplotlib sliders
-                min_ = val[0]
-                max_ = val[1]
-                val = np.linspace(*val)
-        val = np.atleast_1d(val)
-        if val.ndim > 1:
-            raise ValueError(f"{key} is {val.ndim}D but can only be 1D or a scalar")
+        slider = create_mpl_selection_slider(slider_ax, key, values, slider_format_string)
+        slider.on_changed(partial(changeify, update=partial(update, values=values)))
+        cb = None
+    return init_val, slider, cb, widget_y, hash_
+
+
+def kwarg_to_param(key, val, continuous=True):
+    """Interpret a kwarg as a parameter without creating any widgets.
+
+    This is the widget independent part of `kwarg_to_mpl_widget` and `kwarg_to_ipywidget`.
+    It allows a `~mpl_interactions.controller.Controls` to know the possible values
+    of a parameter before (or without ever) creating a widget for it.
+
+    Parameters
+    ----------
+    key : str
+        The name of the kwarg.
+    val : str or number or tuple, or set or array-like
+        The value to be interpreted. Widgets are not accepted.
+    continuous : bool, default: True
+        Whether a tuple of ``(min, max)`` is a continuous range, as it is for matplotlib
+        sliders, or should be passed to `numpy.linspace`, as it is for ipywidgets.
+
+    Returns
+    -------
+    init_val
+        The initial value of the parameter.
+    values : array-like, tuple, or None
+        The possible values of the parameter. For continuous parameters this
+        is ``(min, max)`` and for fixed parameters it is *None*.
+    kind : {"fixed", "categorical", "range", "continuous", "slider"}
+        What sort of control the parameter needs.
+    param_hash :
+        A hash of the possible values, to be used to check duplicates in the future.
+    """
+    if isinstance(val, set):
         if len(val) == 1:
-            # don't need to create a slider
-            return val[0], None, None, widget_y, hash(repr(val))
+            # don't pop - the same kwarg may be interpreted again to make the widget
+            val = next(iter(val))
+            if not isinstance(val, tuple):
+                # fixed parameter
+                return val, None, "fixed", hash(repr(val))
+            # want the categories to be ordered
         else:
-            slider_ax = fig.add_axes([0.2, 0.9 - widget_y - gap_height, 0.65, slider_height])
-            slider = create_mpl_selection_slider(slider_ax, key, val, slider_format_string)
-            slider.on_changed(partial(changeify, update=partial(update, values=val)))
-            widget_y += slider_height + gap_height
-            return val[0], slider, None, widget_y, hash(repr(val))
+            val = list(val)
+        return val[0], val, "categorical", hash(repr(val))
+
+    if isinstance(val, tuple) and val[0] in ["r", "range", "rang", "rage"]:
+        # also check for some reasonably easy mispellings
+        if isinstance(val[1], (np.ndarray, list)):
+            vals = np.asarray(val[1])
+        else:
+            vals = np.linspace(*val[1:])
+        return vals[[0, -1]], vals, "range", hash(repr(vals))
+
+    if isinstance(val, tuple) and len(val) in [2, 3]:
+        if len(val) == 2 and continuous:
+            min_ = float(val[0])
+            max_ = float(val[1])
+            return min_, (min_, max_), "continuous", hash(repr(val))
+        # treat as an argument to linspace
+        val = np.linspace(*val)
+    val = np.atleast_1d(val)
+    if val.ndim > 1:
+        raise ValueError(f"{key} is {val.ndim}D but can only be 1D or a scalar")
+    if len(val) == 1:
+        return val[0], None, "fixed", hash(repr(val))
+    return val[0], val, "slider", hash(repr(val))
+
+
+def value_to_index(values, value):
+    """Find the index of the entry of *values* that is closest to *value*.
+
+    Numeric values are matched to the nearest entry, anything else must match exactly.
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.number) and np.isscalar(value):
+        return int(np.argmin(np.abs(values - value)))
+    matches = [i for i, v in enumerate(values) if np.all(v == value)]
+    if len(matches) == 0:
+        raise ValueError(f"{value!r} is not one of the possible values: {values}")
+    return matches[0]
 
 
 def create_slider_format_dict(slider_format_string):
@@ -601,6 +756,8 @@ def create_slider_format_dict(slider_format_string):
 
 def gogogo_figure(ipympl, ax=None):
     """Gogogo the greatest function name of all."""
+    from matplotlib.pyplot import gca, ioff
+
     if ax is None:
         if ipympl:
             with ioff():
@@ -1,6 +1,7 @@
 from .pyplot import interactive_axhline as axhline
 from .pyplot import interactive_axvline as axvline
 from .pyplot import interactive_hist as hist
+from .pyplot import interactive_hist2d as hist2d
 from .pyplot import interactive_imshow as imshow
 from .pyplot import interactive_plot as plot
 from .pyplot import interactive_scatter as scatter
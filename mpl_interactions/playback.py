@@ -0,0 +1,177 @@
+"""Playing through the values of a parameter."""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .helpers import value_to_index
+
+__all__ = [
+    "Player",
+]
+
+
+class Player:
+    """Play through the values of a param, dropping frames to keep up with *fps*.
+
+    This is what the ``play_buttons`` of the sliders use. Unlike an ipywidgets.Play
+    linked to a slider, which steps through every value at a fixed interval whether or
+    not the previous frame has finished, this shows whichever frame should be showing
+    at the time, skipping frames when updating is slower than *fps*. Upcoming frames
+    are loaded ahead of time by the interactive functions that support it (e.g.
+    `mpl_interactions.hyperslicer`) and by *prefetch*.
+
+    Parameters
+    ----------
+    controls : mpl_interactions.controller.Controls
+        The controls of the param.
+    param : str
+        The param to play through. Its values are taken from its slider, continuous
+        params are split into 100 steps.
+    fps : float, default: 10
+        The target number of frames per second.
+    loop : bool, default: True
+        Whether to go back to the start after the last value, otherwise stop.
+    read_ahead : int, default: 2
+        How many upcoming frames to ask for in advance.
+    prefetch : callable, optional
+        Called in a background thread with all of the params of upcoming frames as
+        keyword arguments. Use this to fill your own caches for generic interactive
+        functions, e.g. pass a function decorated with `functools.lru_cache` that
+        your plotted functions call.
+    fig : Figure, optional
+        The figure to get a timer from. Defaults to one of the figures controlled by
+        *param*, or the current figure if there are none.
+
+    Examples
+    --------
+    ::
+
+        ctrls = hyperslicer(arr)
+        player = Player(ctrls, "axis0", fps=24)
+        player.start()
+        ...
+        print(player.achieved_fps, player.dropped_frames)
+    """
+
+    def __init__(self, controls, param, fps=10, loop=True, read_ahead=2, prefetch=None, fig=None):
+        if param not in controls.params:
+            raise KeyError(f"{param} is not a param in this Controls object.")
+        values, kind = controls._param_specs.get(param, (None, "widget"))
+        if kind == "continuous":
+            values = np.linspace(*values, 100)
+        elif kind not in ["slider", "categorical"]:
+            raise ValueError(f"Can only play sliders and categorical params, but {param} is {kind}")
+        self.controls = controls
+        self.param = param
+        self.values = values
+        self.fps = fps
+        self.loop = loop
+        self.read_ahead = read_ahead
+        self.prefetch = prefetch
+        self._prefetch_executor = None
+        self._prefetching = {}
+        if fig is None:
+            figs = controls.figs.get(param)
+            if figs:
+                fig = figs[0]
+            else:
+                # e.g. headless, or no figure uses the param yet
+                from matplotlib.pyplot import gcf
+
+                fig = gcf()
+        self.timer = fig.canvas.new_timer(interval=max(int(500 / fps), 1))
+        self.timer.add_callback(self.step)
+
+        self.dropped_frames = 0
+        """The number of frames skipped to keep up with *fps*."""
+        self._frame_times = deque(maxlen=max(int(2 * fps), 2))
+        self._start = None
+        self._shown = 0
+
+    @property
+    def achieved_fps(self):
+        """The frame rate over the last couple of seconds."""
+        times = self._frame_times
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def _current_index(self):
+        # continuous params are not indices into their values, so always look it up
+        return value_to_index(self.values, self.controls.params[self.param])
+
+    def start(self):
+        """Start playing from the current value."""
+        self._start = None
+        self._frame_times.clear()
+        self.timer.start()
+
+    def stop(self):
+        """Stop playing."""
+        self.timer.stop()
+
+    def step(self, now=None):
+        """Show the frame that should be showing at the time *now*.
+
+        This is called by the timer, but can also be called directly e.g. by
+        the event loop of your own application.
+
+        Parameters
+        ----------
+        now : float, optional
+            The time in seconds, defaults to `time.perf_counter`.
+
+        Returns
+        -------
+        bool
+            Whether a new frame was shown.
+        """
+        if now is None:
+            now = time.perf_counter()
+        n = len(self.values)
+        if self._start is None:
+            self._start = (now, self._current_index())
+            self._shown = 0
+        t0, i0 = self._start
+        frame = int((now - t0) * self.fps)
+        if not self.loop and i0 + frame >= n - 1:
+            frame = n - 1 - i0
+            self.stop()
+        if frame <= self._shown and self._frame_times:
+            return False
+        if self._frame_times:
+            self.dropped_frames += max(frame - self._shown - 1, 0)
+        self._shown = frame
+        idx = (i0 + frame) % n
+        self.controls.set_params(**{self.param: self.values[idx]})
+        self._frame_times.append(now)
+        self._read_ahead(idx)
+        return True
+
+    def _read_ahead(self, idx):
+        n = len(self.values)
+        # if we are dropping frames then the next frame shown won't be the next index
+        stride = max(1, round(self.fps / self.achieved_fps)) if self.achieved_fps else 1
+        upcoming = [(idx + i * stride) % n for i in range(1, self.read_ahead + 1)]
+        if not self.loop:
+            upcoming = [i for i in upcoming if i > idx]
+        self.controls._prefetch(self.param, upcoming)
+        if self.prefetch is not None:
+            if self._prefetch_executor is None:
+                self._prefetch_executor = ThreadPoolExecutor(
+                    1, thread_name_prefix="mpl-interactions-prefetch"
+                )
+            for i in upcoming:
+                if i in self._prefetching:
+                    continue
+                params = {**self.controls.params, self.param: self.values[i]}
+                future = self._prefetch_executor.submit(self.prefetch, **params)
+                self._prefetching[i] = future
+                future.add_done_callback(lambda f, i=i: self._prefetching.pop(i, None))
+            # don't bother with frames that have already gone past
+            for i, future in list(self._prefetching.items()):
+                if i not in upcoming:
+                    future.cancel()
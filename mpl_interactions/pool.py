@@ -0,0 +1,142 @@
+"""A pool of figures for rendering many parameter states concurrently."""
+
+import queue
+import threading
+from contextlib import contextmanager
+
+__all__ = [
+    "FigurePool",
+]
+
+
+class FigurePool:
+    """A pool of independent figures and `~mpl_interactions.controller.Controls`.
+
+    Matplotlib figures are not thread safe, so to render several parameter states at
+    once (e.g. for different users of a web server) each thread needs its own figure.
+    This builds identical copies of a dashboard as they are needed and hands them
+    out to one thread at a time.
+
+    Parameters
+    ----------
+    factory : callable
+        Called with no arguments to build a new ``(fig, controls)`` pair. This should
+        create the figure with `matplotlib.figure.Figure` rather than pyplot as pyplot
+        is not thread safe, and the controls will usually use ``backend="headless"``.
+    size : int, default: 4
+        The maximum number of copies to build.
+
+    Examples
+    --------
+    ::
+
+        def build():
+            fig = Figure()
+            ax = fig.add_subplot()
+            ctrls = Controls(tau=(0, 10), backend="headless")
+            iplt.plot(x, f, ax=ax, controls=ctrls)
+            return fig, ctrls
+
+        pool = FigurePool(build, size=8)
+        with ThreadPoolExecutor(8) as ex:
+            pngs = list(ex.map(lambda tau: pool.render({"tau": tau}), taus))
+    """
+
+    def __init__(self, factory, size=4):
+        if size < 1:
+            raise ValueError(f"size must be at least 1 but it is {size}")
+        self.factory = factory
+        self.size = size
+        # LIFO so that the most recently used copies, with warm render caches, are reused
+        self._free = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._n_built = 0
+
+    def __len__(self):
+        """Return the number of copies that have been built."""
+        return self._n_built
+
+    def _acquire(self, timeout):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self._n_built < self.size
+            if build:
+                self._n_built += 1
+        if not build:
+            # everything is checked out - wait for one to be returned
+            return self._free.get(timeout=timeout)
+        try:
+            return self.factory()
+        except BaseException:
+            with self._lock:
+                self._n_built -= 1
+            raise
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow a ``(fig, controls)`` pair, returning it to the pool afterwards.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            How many seconds to wait for a copy to be free if all *size* of them are
+            in use. If None then wait forever.
+
+        Raises
+        ------
+        queue.Empty
+            If no copy became free before *timeout*.
+
+        Examples
+        --------
+        ::
+
+            with pool.checkout() as (fig, ctrls):
+                ctrls.set_params(tau=5)
+                fig.savefig("tau-5.png")
+        """
+        instance = self._acquire(timeout)
+        try:
+            yield instance
+        finally:
+            self._free.put(instance)
+
+    def render(self, params=None, format="png", timeout=None, **savefig_kwargs):
+        """Render *params* on a free figure using `Controls.render`.
+
+        Parameters
+        ----------
+        params : dict, optional
+            The values of the params to render. Any params that are not given keep
+            the value that the borrowed copy last had, so give all of the params
+            unless they are the same for every render.
+        format : str, default: "png"
+            The image format.
+        timeout : float, optional
+            Passed to `FigurePool.checkout`.
+        **savefig_kwargs
+            Passed through to `~matplotlib.figure.Figure.savefig`.
+
+        Returns
+        -------
+        bytes
+        """
+        with self.checkout(timeout) as (fig, controls):
+            return controls.render(fig, params, format=format, **savefig_kwargs)
+
+    def fill(self):
+        """Build all of the copies now rather than when they are first needed."""
+        while True:
+            with self._lock:
+                if self._n_built >= self.size:
+                    return
+                self._n_built += 1
+            try:
+                self._free.put(self.factory())
+            except BaseException:
+                with self._lock:
+                    self._n_built -= 1
+                raise
@@ -6,17 +6,24 @@ otherwise they will use the built-in
 Matplotlib widgets.
 """  # noqa: D205
 
-from collections.abc import Callable
+import warnings
+import weakref
+from collections.abc import Callable, Iterator
 from numbers import Number
 
 import matplotlib.markers as mmarkers
 import numpy as np
+from matplotlib.backend_bases import TimerBase
 from matplotlib.collections import PatchCollection
 from matplotlib.colors import to_rgba_array
-from matplotlib.patches import Rectangle
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
 
+from .caching import _Call
 from .controller import gogogo_controls, prep_scalars
 from .helpers import (
+    _line_points,
+    _set_datalim_from_lines,
     callable_else_value,
     callable_else_value_no_cast,
     create_slider_format_dict,
@@ -33,10 +40,14 @@ from .mpl_kwargs import (
     imshow_kwargs_list,
     kwarg_popper,
 )
+from .pyramid import PyramidDisplay
+from .slicing import StreamingHistogram, _chunked_range, iter_chunks, sample_limits
+from .utils import lttb_decimate, minmax_decimate
 
 __all__ = [
     "interactive_plot",
     "interactive_hist",
+    "interactive_hist2d",
     "interactive_scatter",
     "interactive_imshow",
     "interactive_axhline",
@@ -48,6 +59,55 @@ __all__ = [
 ]
 
 
+# interactive_plot calls that were given a *key*, to a weakref of their figure.
+# Re-running a notebook cell with the same key reuses the figure, lines and
+# controls, which are stored on the figure so that closed figures can be collected.
+_keyed_plots = {}
+
+
+def _figure_is_open(manager):
+    """Whether the figure of *manager* is still shown, None for figures made without pyplot."""
+    from matplotlib._pylab_helpers import Gcf
+
+    # closing a figure also unsets its canvas.manager so check the one it had
+    return manager is None or manager in Gcf.get_all_fig_managers()
+
+
+def _get_keyed_plot(key):
+    """Return the stored details of the plot made with *key*, if its figure is still open."""
+    ref = _keyed_plots.get(key)
+    fig = None if ref is None else ref()
+    keyed = None if fig is None else fig._mpl_interactions_keyed.get(key)
+    if keyed is not None and _figure_is_open(keyed["manager"]):
+        return keyed
+    _keyed_plots.pop(key, None)
+    if keyed is not None:
+        # the figure was closed, stop updating it
+        keyed["remove"]()
+        del fig._mpl_interactions_keyed[key]
+    return None
+
+
+def _kwargs_equal(a, b):
+    """Check whether two sets of control kwargs would generate the same controls."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_kwargs_equal(a[k], b[k]) for k in a)
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.shape(a) == np.shape(b) and np.array_equal(a, b)
+    if isinstance(a, (tuple, list)) and isinstance(b, (tuple, list)):
+        return (
+            type(a) is type(b)
+            and len(a) == len(b)
+            and all(_kwargs_equal(x, y) for x, y in zip(a, b))
+        )
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
 def interactive_plot(  # noqa: D417 - not my fault
     *args,
     parametric=False,
@@ -59,6 +119,8 @@ def interactive_plot(  # noqa: D417 - not my fault
     play_buttons=None,
     controls=None,
     display_controls=True,
+    key=None,
+    decimate=None,
     **kwargs,
 ):
     """
@@ -113,6 +175,18 @@ def interactive_plot(  # noqa: D417 - not my fault
         controls
     display_controls : boolean
         Whether the controls should display on creation. Ignored if controls is specified.
+    key : hashable, optional
+        If given, a later call with the same *key* and the same controls kwargs will reuse
+        the figure, lines and controls of the first call. Only the data functions are swapped
+        and the lines are updated in place. This is useful when repeatedly re-running a
+        notebook cell.
+    decimate : {None, "minmax", "lttb"}, optional
+        Only draw about two points per pixel of the part of each line that is in view,
+        with `mpl_interactions.minmax_decimate` or `mpl_interactions.lttb_decimate`. The
+        lines are decimated again when the view changes (e.g. zooming or panning), so
+        drawing takes as long for 10 million points as for a few thousand. Only lines
+        whose x values are sorted numbers are decimated. The points are picked in
+        display space, so lines on log scaled axes keep their detail.
     **kwargs:
         Interpreted as widgets and remainder are passed through to `ax.plot`.
 
@@ -162,14 +236,104 @@ def interactive_plot(  # noqa: D417 - not my fault
     else:
         raise ValueError(f"You passed in {len(args)} args, but no more than 3 is supported.")
 
+    keyed = None if key is None else _get_keyed_plot(key)
+    if keyed is not None:
+        if (
+            (ax is None or ax is keyed["ax"])
+            and (controls is None or controls is keyed["controls"])
+            and keyed["x_and_y"] == x_and_y
+            and keyed["parametric"] == parametric
+            and keyed["decimate"] == decimate
+            and _kwargs_equal(keyed["kwargs"], kwargs)
+        ):
+            return keyed["reuse"](x, y, fmt, plot_kwargs, display_controls, xlim, ylim)
+        # the controls or decimation changed - start over on the same axes.
+        keyed["remove"]()
+        if ax is None:
+            ax = keyed["ax"]
+        del _keyed_plots[key]
+        del keyed["fig"]._mpl_interactions_keyed[key]
+
+    if decimate not in [None, "minmax", "lttb"]:
+        raise ValueError(f"decimate must be None, 'minmax' or 'lttb' but it is {decimate!r}")
+
     ipympl = notebook_backend() or force_ipywidgets
     fig, ax = gogogo_figure(ipympl, ax=ax)
     slider_formats = create_slider_format_dict(slider_formats)
+    if key is not None:
+        # gogogo_controls may add to kwargs so keep a copy for comparisons
+        control_kwargs = dict(kwargs)
     controls, params = gogogo_controls(
         kwargs, controls, display_controls, slider_formats, play_buttons
     )
+    # keep the data sources in a mutable container so that a keyed
+    # call can swap them without creating a new update function
+    data = {"x": x, "y": y, "xlim": xlim, "ylim": ylim}
+
+    def measure(x_, y_):
+        x_, y_ = np.asanyarray(x_), np.asanyarray(y_)
+        if isinstance(x_, np.ma.MaskedArray) or isinstance(y_, np.ma.MaskedArray):
+            return None
+        if x_.dtype.kind not in "biuf" or y_.dtype.kind not in "biuf":
+            # e.g. dates, which matplotlib has to convert
+            return None
+        return _line_points(x_.reshape(len(x_), -1), y_.reshape(len(y_), -1))
+
+    # the full data of each line and whether it can be decimated
+    full = {}
+    view = {"pending": False}
+
+    def set_line(line, x_, y_):
+        if decimate is None:
+            line.set_data(x_, y_)
+            return
+        x_, y_ = np.asanyarray(x_), np.asanyarray(y_)
+        # only lines along sorted numbers can be cut down to the view
+        sortable = (
+            type(x_) is np.ndarray
+            and type(y_) is np.ndarray
+            and x_.dtype.kind in "biuf"
+            and y_.dtype.kind in "biuf"
+            and x_.ndim == 1
+        )
+        ok = sortable and bool(np.all(x_[1:] >= x_[:-1]))
+        full[line] = (x_, y_, ok)
+        if ok:
+            view["pending"] = True
+        else:
+            line.set_data(x_, y_)
+
+    def full_x(line):
+        return full[line][0] if line in full else line.get_xdata()
+
+    def scale_transform(axis):
+        # decimate in display space so that e.g. log axes keep their detail
+        if axis.get_scale() == "linear":
+            return None
+        return axis.get_transform().transform
+
+    def redecimate(*args):
+        view["pending"] = False
+        n = max(int(ax.bbox.width), 1)
+        xlim = ax.get_xlim()
+        x_transform, y_transform = scale_transform(ax.xaxis), scale_transform(ax.yaxis)
+        for line in lines:
+            x_, y_, ok = full.get(line, (None, None, False))
+            if not ok:
+                continue
+            if decimate == "minmax":
+                line.set_data(*minmax_decimate(x_, y_, n, xlim, x_transform))
+            else:
+                line.set_data(*lttb_decimate(x_, y_, 2 * n, xlim, x_transform, y_transform))
+
+    def remember_lines():
+        full.clear()
+        for line in lines:
+            set_line(line, line.get_xdata(), line.get_ydata())
+        redecimate()
 
     def update(params, indices, cache):
+        x, y = data["x"], data["y"]
         if x_and_y:
             x_, y_ = eval_xy(x, y, params, cache)
             # broadcast so that we can always index
@@ -178,7 +342,8 @@ def interactive_plot(  # noqa: D417 - not my fault
             if y_.ndim == 1:
                 y_ = np.broadcast_to(y_[:, None], (y_.shape[0], len(lines)))
             for i, line in enumerate(lines):
-                line.set_data(x_[:, i], y_[:, i])
+                set_line(line, x_[:, i], y_[:, i])
+            points = measure(x_, y_)
         elif parametric:
             # transpose to splat bc matplotlib considers columns of arrays to be
             # the datasets
@@ -191,17 +356,27 @@ def interactive_plot(  # noqa: D417 - not my fault
                 # transpose bc set_data expects a different shape than plot
                 out = np.asanyarray(out).T
             # else hope for the best lol
-            lines[0].set_data(*out)
+            set_line(lines[0], *out)
+            points = measure(*out)
         else:
             y_ = callable_else_value(y, params, cache)
             if y_.ndim == 1:
                 y_ = np.broadcast_to(y_[:, None], (y_.shape[0], len(lines)))
             for i, line in enumerate(lines):
-                line.set_ydata(y_[:, i])
+                if decimate is None:
+                    line.set_ydata(y_[:, i])
+                else:
+                    set_line(line, full_x(line), y_[:, i])
+            points = measure(full_x(lines[0]), y_)
 
         cur_xlims = ax.get_xlim()
         cur_ylims = ax.get_ylim()
-        ax.relim()  # this may be expensive? don't do if not necessary?
+        if points is None:
+            ax.relim()
+        else:
+            # only the lines that were just set need to be measured
+            _set_datalim_from_lines(ax, lines, points)
+        xlim, ylim = data["xlim"], data["ylim"]
         if ylim == "auto":
             ax.autoscale_view(scalex=False)
         elif ylim == "stretch":
@@ -220,50 +395,65 @@ def interactive_plot(  # noqa: D417 - not my fault
                 new_lims[1] if new_lims[1] > cur_xlims[1] else cur_xlims[1],
             ]
             ax.set_xlim(new_lims)
+        if view["pending"]:
+            # not done by a change of the xlims
+            redecimate()
 
     controls._register_function(update, fig, params.keys())
 
-    if x_and_y:
-        x_, y_ = eval_xy(x, y, params)
-        if fmt:
-            lines = ax.plot(x_, y_, fmt, **plot_kwargs)
-        else:
-            lines = ax.plot(x_, y_, **plot_kwargs)
-    else:
-        y_ = callable_else_value_no_cast(y, params)
-        # set up to ensure that splatting works well
-        if parametric and not isinstance(y_, tuple):
-            y_ = np.asanyarray(y_).T
-        else:
-            # make a tuple so we can splat it
-            # reduces the number of if statements necessary to plot
-            # parametric functions
-            y_ = (y_,)
-
-        if fmt:
-            lines = ax.plot(*y_, fmt, **plot_kwargs)
+    def plot_lines(params, fmt, plot_kwargs):
+        x, y = data["x"], data["y"]
+        if x_and_y:
+            x_, y_ = eval_xy(x, y, params)
+            if fmt:
+                lines = ax.plot(x_, y_, fmt, **plot_kwargs)
+            else:
+                lines = ax.plot(x_, y_, **plot_kwargs)
         else:
-            lines = ax.plot(*y_, **plot_kwargs)
-
-    try:
-        # hack in the way it feels like matplotlib should behave
-        # this is a necessary change to support ODEs which is a reasonable use case for
-        # this library - lesser of two evils situation. (the evil here is deviating from matplotlib)
-        labels = plot_kwargs["label"]
-        if (
-            len(lines) > 1
-            and (isinstance(labels, list) or isinstance(labels, tuple))
-            and len(labels) == len(lines)
-        ):
-            for label, line in zip(labels, lines):
-                line.set_label(label)
-    except KeyError:
-        pass
+            y_ = callable_else_value_no_cast(y, params)
+            # set up to ensure that splatting works well
+            if parametric and not isinstance(y_, tuple):
+                y_ = np.asanyarray(y_).T
+            else:
+                # make a tuple so we can splat it
+                # reduces the number of if statements necessary to plot
+                # parametric functions
+                y_ = (y_,)
+
+            if fmt:
+                lines = ax.plot(*y_, fmt, **plot_kwargs)
+            else:
+                lines = ax.plot(*y_, **plot_kwargs)
+
+        try:
+            # hack in the way it feels like matplotlib should behave
+            # this is a necessary change to support ODEs which is a reasonable use case for
+            # this library - lesser of two evils situation. (the evil here is deviating from
+            # matplotlib)
+            labels = plot_kwargs["label"]
+            if (
+                len(lines) > 1
+                and (isinstance(labels, list) or isinstance(labels, tuple))
+                and len(labels) == len(lines)
+            ):
+                for label, line in zip(labels, lines):
+                    line.set_label(label)
+        except KeyError:
+            pass
+        return lines
+
+    lines = plot_lines(params, fmt, plot_kwargs)
 
     if not isinstance(xlim, str):
         ax.set_xlim(xlim)
     if not isinstance(ylim, str):
         ax.set_ylim(ylim)
+    if decimate is not None:
+        remember_lines()
+        view["cids"] = (
+            ax.callbacks.connect("xlim_changed", redecimate),
+            fig.canvas.mpl_connect("resize_event", redecimate),
+        )
 
     # make sure the home button will work
     if hasattr(fig.canvas, "toolbar") and fig.canvas.toolbar is not None:
@@ -271,19 +461,103 @@ def interactive_plot(  # noqa: D417 - not my fault
     # set current axis to be pyplot-like
     sca(ax)
 
+    if key is not None:
+
+        def reuse(x, y, fmt, plot_kwargs, display_controls, xlim, ylim):
+            data["x"] = x
+            data["y"] = y
+            data["xlim"] = xlim
+            data["ylim"] = ylim
+            if not isinstance(xlim, str):
+                ax.set_xlim(xlim)
+            if not isinstance(ylim, str):
+                ax.set_ylim(ylim)
+            ps = {k: controls.params[k] for k in params}
+            # a different number of lines can't be updated in place
+            # evaluate into the cache so that update doesn't need to call the functions again
+            cache = {}
+            if x_and_y:
+                xy = eval_xy(x, y, ps, cache)
+                n_lines = max(a.shape[1] if a.ndim > 1 else 1 for a in xy)
+            elif parametric:
+                n_lines = 1
+            else:
+                y_ = callable_else_value(y, ps)
+                if isinstance(y, Callable):
+                    cache[y] = y_
+                n_lines = y_.shape[1] if y_.ndim > 1 else 1
+            if n_lines == len(lines):
+                update(ps, {k: controls.indices[k] for k in params}, cache)
+                for line in lines:
+                    line.update({k: v for k, v in plot_kwargs.items() if k != "label"})
+            else:
+                for line in lines:
+                    line.remove()
+                lines[:] = plot_lines(ps, fmt, plot_kwargs)
+                if decimate is not None:
+                    remember_lines()
+            fig.canvas.draw_idle()
+            if display_controls:
+                if controls.use_ipywidgets:
+                    from IPython.display import display
+
+                    # the previous output of the cell is gone so show things again
+                    display(fig.canvas)
+                controls.display()
+            sca(ax)
+            return controls
+
+        def remove():
+            controls._unregister_function(update)
+            if decimate is not None:
+                xlim_cid, resize_cid = view["cids"]
+                ax.callbacks.disconnect(xlim_cid)
+                fig.canvas.mpl_disconnect(resize_cid)
+            for line in lines:
+                line.remove()
+
+        if not hasattr(fig, "_mpl_interactions_keyed"):
+            fig._mpl_interactions_keyed = {}
+        fig._mpl_interactions_keyed[key] = {
+            "ax": ax,
+            "controls": controls,
+            "decimate": decimate,
+            "fig": fig,
+            "kwargs": control_kwargs,
+            "lines": lines,
+            "manager": fig.canvas.manager,
+            "parametric": parametric,
+            "remove": remove,
+            "reuse": reuse,
+            "x_and_y": x_and_y,
+        }
+        _keyed_plots[key] = weakref.ref(fig)
+
     return controls
 
 
-def _simple_hist(arr, bins="auto", density=None, weights=None):
-    heights, bins = np.histogram(arr, bins=bins, density=density, weights=weights)
-    width = bins[1] - bins[0]
-    new_patches = []
-    for i in range(len(heights)):
-        new_patches.append(Rectangle((bins[i], 0), width=width, height=heights[i]))
-    xlims = (bins.min(), bins.max())
-    ylims = (0, heights.max() * 1.05)
+def _hist_path(edges):
+    """Make one path with a rectangle of height 0 for each bin."""
+    n = len(edges) - 1
+    codes = np.tile([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], n)
+    path = Path(np.zeros((5 * n, 2)), codes)
+    _set_edges(path, edges)
+    return path
+
 
-    return xlims, ylims, new_patches
+def _set_edges(path, edges):
+    """Set the edges of the rectangles of a `_hist_path` in place."""
+    verts = path.vertices.reshape(-1, 5, 2)
+    verts[:, :2, 0] = edges[:-1, None]
+    verts[:, 2:4, 0] = edges[1:, None]
+    verts[:, 4, 0] = edges[:-1]
+
+
+def _set_heights(path, heights):
+    """Set the heights of the rectangles of a `_hist_path` in place."""
+    verts = path.vertices.reshape(-1, 5, 2)
+    verts[:, 1, 1] = heights
+    verts[:, 2, 1] = heights
 
 
 def _stretch(ax, xlims, ylims):
@@ -303,6 +577,27 @@ def _stretch(ax, xlims, ylims):
     ax.set_xlim(new_lims)
 
 
+def _bin_index(values, edges, uniform):
+    """Return the bin of each of *values*, or -1 if it is outside of *edges*."""
+    values = np.asarray(values, dtype=float).ravel()
+    n = len(edges) - 1
+    inside = (values >= edges[0]) & (values <= edges[-1])
+    if uniform:
+        with np.errstate(invalid="ignore"):
+            scaled = (values - edges[0]) * (n / (edges[-1] - edges[0]))
+        idx = np.where(inside, scaled, 0).astype(np.intp)
+        np.minimum(idx, n - 1, out=idx)
+        # values within rounding error of an edge can land in the neighbouring bin
+        idx -= values < edges[idx]
+        idx += (values >= edges[idx + 1]) & (idx != n - 1)
+    else:
+        idx = np.searchsorted(edges, values, side="right") - 1
+        # the last edge belongs to the last bin
+        idx[values == edges[-1]] = n - 1
+    idx[~inside] = -1
+    return idx
+
+
 def interactive_hist(
     arr,
     density=False,
@@ -314,6 +609,9 @@ def interactive_hist(
     play_buttons=False,
     controls=None,
     display_controls=True,
+    cache_edges=False,
+    range=None,
+    chunk_size=2**22,
     **kwargs,
 ):
     """
@@ -327,7 +625,12 @@ def interactive_hist(
     Parameters
     ----------
     arr : arraylike or function
-        The array or the function that returns an array that is to be histogrammed
+        The array or the function that returns an array that is to be histogrammed.
+        This can also be an iterator of arrays, or an out of memory array (e.g. a
+        `numpy.memmap`, h5py, dask or zarr array, anything with a ``shape`` that isn't
+        a numpy array) when *bins* is a number or a sequence and there are no
+        *weights*. These are histogrammed in chunks by a pool of threads, and with an
+        interactive backend the histogram is drawn as the counts come in.
     density : bool, optional
         whether to plot as a probability density. Passed to `numpy.histogram`
     bins : int or sequence of scalars or str, optional
@@ -358,6 +661,17 @@ def interactive_hist(
         controls
     display_controls : boolean
         Whether the controls should display on creation. Ignored if controls is specified.
+    cache_edges : bool, default: False
+        If True only work out the bin edges again when the minimum or maximum of the
+        data changes. Working out the edges (e.g. with ``bins="auto"``) takes longer
+        than counting the values for large arrays. The bins are always kept if *bins*
+        is a sequence.
+    range : (float, float), optional
+        The lower and upper range of the bins. Passed to `numpy.histogram`. For
+        chunked data with a number of *bins* this is worked out with a pass over the
+        data if not given, which is not possible for an iterator of arrays.
+    chunk_size : int, default: 2**22
+        About how many elements to histogram at once for out of memory arrays.
     **kwargs :
         Converted to widgets to control the parameters. Note, unlike other functions the remaining
         will NOT be passed through to *hist*.
@@ -382,6 +696,8 @@ def interactive_hist(
             return np.random.randn(1000)*scale + loc
         interactive_hist(f, loc=(-5, 5, 500), scale=(1, 10, 100))
     """
+    # the argument is named after numpy's, below it is kept apart from the builtin
+    hist_range = range
     ipympl = notebook_backend() or force_ipywidgets
     fig, ax = gogogo_figure(ipympl, ax=ax)
     slider_formats = create_slider_format_dict(slider_formats)
@@ -390,27 +706,291 @@ def interactive_hist(
     )
     pc = PatchCollection([])
     ax.add_collection(pc, autolim=True)
+    # the bars are the rectangles of a single path, the heights are set in place
+    # and it is only remade when the edges change
+    state = {"edges": None, "path": None, "range": None, "stream": None}
+
+    def histogram(arr_):
+        if not cache_edges and isinstance(bins, (str, Number)):
+            return np.histogram(arr_, bins=bins, range=hist_range, density=density, weights=weights)
+        if not isinstance(bins, (str, Number)):
+            edges = np.asarray(bins)
+        else:
+            # NaNs aren't counted, and as NaN != NaN they would otherwise make the
+            # edges be worked out again on every update
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                data_range = (np.nanmin(arr_), np.nanmax(arr_))
+            if state["range"] is None or not np.array_equal(
+                data_range, state["range"], equal_nan=True
+            ):
+                state["range"] = data_range
+                bin_range = hist_range
+                if bin_range is None:
+                    # numpy can't find the range of data with NaNs in it itself
+                    bin_range = (0, 1) if np.isnan(data_range[0]) else data_range
+                state["edges"] = np.histogram_bin_edges(
+                    arr_, bins=bins, range=bin_range, weights=weights
+                )
+            edges = state["edges"]
+        # with explicit edges numpy counts with searchsorted on sorted blocks of arr_
+        return np.histogram(arr_, bins=edges, density=density, weights=weights)
+
+    def is_chunked(arr_):
+        if isinstance(arr_, Iterator):
+            return True
+        # anything but an in memory numpy array may be out of memory, e.g. h5py
+        # datasets (chunked or not), zarr, dask or np.memmap
+        out_of_memory = isinstance(arr_, np.memmap) or (
+            hasattr(arr_, "shape") and not isinstance(arr_, np.ndarray)
+        )
+        # rules like bins="auto" need all of the data at once
+        return out_of_memory and not isinstance(bins, str) and weights is None
+
+    def chunked_edges(arr_):
+        if not isinstance(bins, (str, Number)):
+            return np.asarray(bins)
+        if isinstance(bins, str):
+            raise ValueError(
+                "bins must be a number or a sequence of edges to histogram an iterator"
+            )
+        bin_range = hist_range
+        if bin_range is None:
+            if isinstance(arr_, Iterator):
+                raise ValueError("range or the bin edges must be given to histogram an iterator")
+            bin_range = _chunked_range(arr_, chunk_size)
+            if not bin_range[0] <= bin_range[1]:
+                # no finite values, numpy's default for empty arrays
+                bin_range = (0, 1)
+        return np.histogram_bin_edges([], bins=bins, range=bin_range)
+
+    def heights_of(counts, edges):
+        if density:
+            return counts / max(counts.sum(), 1) / np.diff(edges)
+        return counts
+
+    def show(heights, edges):
+        path = state["path"]
+        if path is None or len(edges) != len(path.vertices) // 5 + 1:
+            pc.set_paths([PathPatch(_hist_path(edges))])
+            # the collection keeps its own copy of the path
+            path = state["path"] = pc.get_paths()[0]
+        elif not np.array_equal(edges[:-1], path.vertices[::5, 0]):
+            _set_edges(path, edges)
+        _set_heights(path, heights)
+        pc.stale = True
+        return (edges.min(), edges.max()), (0, heights.max() * 1.05 or 1)
+
+    timer = fig.canvas.new_timer(interval=100)
+    # without an event loop (e.g. Agg) the counts can't be drawn as they come in
+    progressive = type(timer) is not TimerBase and controls.backend != "headless"
+
+    def poll():
+        stream = state["stream"]
+        done = stream.done
+        if stream.error is not None:
+            timer.stop()
+            raise stream.error
+        new_x, new_y = show(heights_of(stream.snapshot(), stream.edges), stream.edges)
+        _stretch(ax, new_x, new_y)
+        ax.autoscale_view()
+        fig.canvas.draw_idle()
+        if done:
+            timer.stop()
+
+    timer.add_callback(poll)
+
+    def set_chunked_bars(arr_):
+        if weights is not None:
+            raise ValueError("weights are not supported when histogramming in chunks")
+        if state["stream"] is not None:
+            state["stream"].cancel()
+        stream = state["stream"] = StreamingHistogram(chunked_edges(arr_))
+        chunks = arr_ if isinstance(arr_, Iterator) else iter_chunks(arr_, chunk_size)
+        if progressive:
+            stream.start(chunks)
+            timer.start()
+        else:
+            stream.run(chunks)
+        return show(heights_of(stream.snapshot(), stream.edges), stream.edges)
+
+    def set_bars(arr_):
+        if is_chunked(arr_):
+            return set_chunked_bars(arr_)
+        return show(*histogram(np.asanyarray(arr_)))
 
     def update(params, indices, cache):
-        arr_ = callable_else_value(arr, params, cache)
-        new_x, new_y, new_patches = _simple_hist(arr_, density=density, bins=bins, weights=weights)
+        arr_ = callable_else_value_no_cast(arr, params, cache)
+        new_x, new_y = set_bars(arr_)
         _stretch(ax, new_x, new_y)
-        pc.set_paths(new_patches)
         ax.autoscale_view()
 
     controls._register_function(update, fig, params.keys())
 
-    new_x, new_y, new_patches = _simple_hist(
-        callable_else_value(arr, params), density=density, bins=bins, weights=weights
-    )
+    new_x, new_y = set_bars(callable_else_value_no_cast(arr, params))
     sca(ax)
-    pc.set_paths(new_patches)
     ax.set_xlim(new_x)
     ax.set_ylim(new_y)
 
     return controls
 
 
+def interactive_hist2d(
+    x,
+    y,
+    bins=10,
+    range=None,
+    density=False,
+    weights=None,
+    cmin=None,
+    cmax=None,
+    vmin=None,
+    vmax=None,
+    ax=None,
+    slider_formats=None,
+    force_ipywidgets=False,
+    play_buttons=False,
+    controls=None,
+    display_controls=True,
+    **kwargs,
+):
+    """
+    Control the contents of a 2D histogram using widgets.
+
+    The bins are worked out from the first data and then kept. Which bin each point
+    falls in is remembered for *x* and *y*, so if only one of them (or only the
+    *weights*) changes the other is not binned again. The counts are updated in
+    place on an `~matplotlib.image.AxesImage`, or a `~matplotlib.collections.QuadMesh`
+    if the bins are not evenly spaced.
+
+    Parameters
+    ----------
+    x, y : function or array-like
+        The coordinates of the points, or functions that return them. As in
+        `interactive_plot` the function for *y* may take *x* as its first argument.
+    bins : int or array-like or [int, int] or [array, array], default: 10
+        The bins argument to `numpy.histogram2d`.
+    range : array-like shape(2, 2), optional
+        The leftmost and rightmost edges of the bins along each dimension. Passed to
+        `numpy.histogram2d`.
+    density : bool, default: False
+        Whether to plot as a probability density. Passed to `numpy.histogram2d`.
+    weights : array-like or function, optional
+        The weight of each point, or a function of the params that returns them.
+    cmin, cmax : float, optional
+        Bins with fewer counts than *cmin* or more than *cmax* are not shown.
+    vmin, vmax : float, optional
+        The limits of the colormap. By default the colormap is scaled to the counts
+        at every update.
+    ax : matplotlib axis, optional
+        The axis on which to plot. If none the current axis will be used.
+    slider_formats : None, string, or dict
+        If None a default value of decimal points will be used. Uses the new {} style formatting
+    force_ipywidgets : boolean
+        If True ipywidgets will always be used, even if not using the ipympl backend.
+        If False the function will try to detect if it is ok to use ipywidgets
+        If ipywidgets are not used the function will fall back on matplotlib widgets
+    play_buttons : bool or str or dict, optional
+        Whether to attach an ipywidgets.Play widget to any sliders that get created.
+        If a boolean it will apply to all kwargs, if a dictionary you choose which sliders you
+        want to attach play buttons too.
+    controls : mpl_interactions.controller.Controls
+        An existing controls object if you want to tie multiple plot elements to the same set of
+        controls
+    display_controls : boolean
+        Whether the controls should display on creation. Ignored if controls is specified.
+    **kwargs :
+        Kwargs for the image (e.g. *cmap*) are passed through, the rest are converted to
+        widgets to control the parameters.
+
+    Returns
+    -------
+    controls
+
+    Examples
+    --------
+    ::
+
+        x = np.random.randn(100_000)
+        def f(x, tau):
+            return x * tau + np.random.randn(len(x))
+        interactive_hist2d(x, f, bins=50, tau=(0, 2))
+    """
+    ipympl = notebook_backend() or force_ipywidgets
+    fig, ax = gogogo_figure(ipympl, ax=ax)
+    slider_formats = create_slider_format_dict(slider_formats)
+    kwargs, image_kwargs = kwarg_popper(kwargs, imshow_kwargs_list)
+    controls, params = gogogo_controls(
+        kwargs, controls, display_controls, slider_formats, play_buttons
+    )
+    # the bins of each point along x and y, with the data they are for
+    state = {"x": None, "y": None, "flat": None}
+
+    def bin_index(name, values, edges):
+        values = np.asarray(values)
+        prev = state[name]
+        if prev is not None and prev[0].shape == values.shape and np.array_equal(prev[0], values):
+            return prev[1]
+        idx = _bin_index(values, edges, uniform)
+        # a copy in case the function modifies and returns the same array
+        state[name] = (values.copy(), idx)
+        return idx
+
+    def counts(x_, y_, weights_):
+        ix = bin_index("x", x_, xedges)
+        iy = bin_index("y", y_, yedges)
+        flat = state["flat"]
+        if flat is None or flat[0] is not ix or flat[1] is not iy:
+            inside = (ix >= 0) & (iy >= 0)
+            flat = state["flat"] = (ix, iy, (ix * ny + iy)[inside], inside)
+        if weights_ is not None:
+            weights_ = np.asarray(weights_, dtype=float).ravel()[flat[3]]
+        h = np.bincount(flat[2], weights=weights_, minlength=nx * ny).reshape(nx, ny)
+        h = h.astype(float)
+        if density:
+            h /= h.sum() * np.outer(np.diff(xedges), np.diff(yedges))
+        if cmin is not None:
+            h[h < cmin] = np.nan
+        if cmax is not None:
+            h[h > cmax] = np.nan
+        # rows of the image go along y
+        return np.ma.masked_invalid(h.T)
+
+    def update(params, indices, cache):
+        x_, y_ = eval_xy(x, y, params, cache)
+        weights_ = callable_else_value_no_cast(weights, params, cache)
+        h = counts(x_, y_, weights_)
+        mesh.set_array(h)
+        if vmin is None and vmax is None:
+            mesh.norm.autoscale(h)
+
+    controls._register_function(update, fig, params.keys())
+
+    x_, y_ = eval_xy(x, y, params)
+    _, xedges, yedges = np.histogram2d(np.ravel(x_), np.ravel(y_), bins=bins, range=range)
+    nx, ny = len(xedges) - 1, len(yedges) - 1
+    uniform = all(np.allclose(np.diff(e), (e[-1] - e[0]) / (len(e) - 1)) for e in (xedges, yedges))
+    h = counts(x_, y_, callable_else_value_no_cast(weights, params))
+    sca(ax)
+    if uniform:
+        # images are much quicker to draw than meshes
+        image_kwargs.setdefault("aspect", "auto")
+        image_kwargs.setdefault("interpolation", "nearest")
+        mesh = ax.imshow(
+            h,
+            origin="lower",
+            extent=(xedges[0], xedges[-1], yedges[0], yedges[-1]),
+            vmin=vmin,
+            vmax=vmax,
+            **image_kwargs,
+        )
+    else:
+        mesh_kwargs = {k: v for k, v in image_kwargs.items() if k in collection_kwargs_list}
+        mesh = ax.pcolormesh(xedges, yedges, h, vmin=vmin, vmax=vmax, **mesh_kwargs)
+    ax._sci(mesh)
+    return controls
+
+
 def interactive_scatter(
     x,
     y=None,
@@ -610,9 +1190,10 @@ def interactive_scatter(
 
     def check_callable_xy(arg, x, y, params, cache):
         if isinstance(arg, Callable):
-            if arg not in cache:
-                cache[arg] = arg(x, y, **params)
-            return cache[arg]
+            key = _Call(arg, x, y)
+            if key not in cache:
+                cache[key] = arg(x, y, **params)
+            return cache[key]
         else:
             return arg
 
@@ -665,6 +1246,8 @@ def interactive_imshow(
     play_buttons=False,
     controls=None,
     display_controls=True,
+    cmap_percentiles=(2, 98),
+    pyramid=False,
     **kwargs,
 ):
     """
@@ -688,10 +1271,12 @@ def interactive_imshow(
     vmin_vmax : tuple of float
         Used to generate a range slider for vmin and vmax. Should be given in range slider
         notation: `("r", 0, 1)`.
-    autoscale_cmap : bool
+    autoscale_cmap : bool or "sample"
         If True rescale the colormap for every function update. Will not update
         if vmin and vmax are provided or if the returned image is RGB(A) like.
-        forwarded to matplotlib
+        If "sample" use the *cmap_percentiles* of a random sample of the pixels
+        instead of the min and max, which is faster for large images and less
+        affected by outliers.
     ax : matplotlib axis, optional
         The axis on which to plot. If none the current axis will be used.
     slider_formats : None, string, or dict
@@ -715,6 +1300,13 @@ def interactive_imshow(
         controls
     display_controls : boolean
         Whether the controls should display on creation. Ignored if controls is specified.
+    cmap_percentiles : (float, float), default: (2, 98)
+        The percentiles to use if *autoscale_cmap* is "sample".
+    pyramid : bool, default: False
+        If True only give matplotlib the part of the image that is in view, downsampled
+        to about the resolution of the screen, switching to finer resolutions when
+        zooming in. This makes large images much faster to update.
+        See `mpl_interactions.pyramid.PyramidDisplay`.
     **kwargs:
         Interpreted as widgets and remainder are passed through to `ax.imshow`.
 
@@ -751,6 +1343,17 @@ def interactive_imshow(
         def vmax(**kwargs):
             return kwargs["vmax"]
 
+    if autoscale_cmap not in [True, False, "sample"]:
+        raise ValueError(f"autoscale_cmap must be a bool or 'sample' but it is {autoscale_cmap!r}")
+
+    def set_limits(new_data):
+        if not autoscale_cmap or new_data.ndim == 3 or vmin is not None or vmax is not None:
+            return
+        if autoscale_cmap == "sample":
+            im.set_clim(*sample_limits(new_data, cmap_percentiles, fallback=im.get_clim()))
+        else:
+            im.norm.autoscale(new_data)
+
     def update(params, indices, cache):
         if isinstance(X, Callable):
             # ignore anything that we added directly to kwargs in prep_scalar
@@ -759,9 +1362,11 @@ def interactive_imshow(
             # check this here to avoid setting the data if we don't need to
             # use the callable_else_value fxn to make use of easy caching
             new_data = callable_else_value(X, param_excluder(params), cache)
-            im.set_data(new_data)
-            if autoscale_cmap and (new_data.ndim != 3) and vmin is None and vmax is None:
-                im.norm.autoscale(new_data)
+            if pyramid:
+                display.set_data(new_data)
+            else:
+                im.set_data(new_data)
+            set_limits(new_data)
         # caching for these?
         if isinstance(vmin, Callable):
             im.norm.vmin = callable_else_value(vmin, param_excluder(params, "vmin"), cache)
@@ -787,6 +1392,11 @@ def interactive_imshow(
         **imshow_kwargs,
     )
 
+    if autoscale_cmap == "sample":
+        set_limits(new_data)
+    if pyramid:
+        display = PyramidDisplay(im)
+
     # i know it's bad news to use private methods :(
     # but idk how else to accomplish being a psuedo-pyplot
     ax._sci(im)
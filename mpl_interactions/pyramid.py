@@ -0,0 +1,194 @@
+"""Showing very large images at the resolution of the screen."""
+
+import numpy as np
+
+from .caching import LRUCache
+
+__all__ = [
+    "block_average",
+    "ImagePyramid",
+    "PyramidDisplay",
+]
+
+
+def block_average(img, factor=2):
+    """Downsample an image by averaging blocks of *factor* x *factor* pixels.
+
+    Rows and columns that don't fill a whole block are dropped. Any dimensions after
+    the first two (e.g. the colors of an RGB image) are kept as they are.
+
+    Parameters
+    ----------
+    img : np.ndarray
+        The image.
+    factor : int, default: 2
+        The size of the blocks.
+
+    Returns
+    -------
+    np.ndarray
+        The downsampled image, with the same dtype as *img* for integer images and
+        float32 otherwise.
+    """
+    h, w = img.shape[0] // factor, img.shape[1] // factor
+    blocks = img[: h * factor, : w * factor].reshape(h, factor, w, factor, *img.shape[2:])
+    out = blocks.mean(axis=(1, 3), dtype=np.float32)
+    if img.dtype.kind in "uib":
+        return np.rint(out).astype(img.dtype)
+    return out
+
+
+class ImagePyramid:
+    """Successively halved copies of an image, computed when they are first needed.
+
+    Parameters
+    ----------
+    img : np.ndarray
+        The full resolution image, level 0.
+    """
+
+    def __init__(self, img):
+        self.levels = [np.asarray(img)]
+
+    @property
+    def max_level(self):
+        """The coarsest level that is still at least 1 pixel in both dimensions."""
+        return max(int(np.log2(max(min(self.levels[0].shape[:2]), 1))), 0)
+
+    def level(self, n):
+        """Return the image downsampled by ``2**n``."""
+        n = min(n, self.max_level)
+        while len(self.levels) <= n:
+            self.levels.append(block_average(self.levels[-1]))
+        return self.levels[n]
+
+
+class PyramidDisplay:
+    """Show an image on an `~matplotlib.image.AxesImage` at the resolution of the screen.
+
+    Rather than giving matplotlib the full image to resample every time it draws,
+    this gives it the part of the image that is in view at the coarsest level of an
+    `ImagePyramid` that still has at least one pixel per screen pixel. When the view
+    changes (e.g. zooming with `mpl_interactions.zoom_factory` or the toolbar) a
+    finer level is shown.
+
+    Parameters
+    ----------
+    im : AxesImage
+        The image to manage. Its current data and extent are used as the full
+        resolution image.
+    cache_size : int, default: 4
+        How many pyramids, one per image given to `PyramidDisplay.set_data` with a key,
+        to keep.
+    """
+
+    def __init__(self, im, cache_size=4):
+        self.im = im
+        self.ax = im.axes
+        self._pyramids = LRUCache(cache_size)
+        self._refreshing = False
+        self.level = 0
+        """The level of the pyramid that is currently shown."""
+        self.pyramid = ImagePyramid(im.get_array())
+        # the extent of the full resolution image, the image's extent will change
+        # to that of the part that is shown
+        self.extent = im.get_extent()
+        self._cids = [
+            self.ax.callbacks.connect("xlim_changed", self._on_view_change),
+            self.ax.callbacks.connect("ylim_changed", self._on_view_change),
+            self.ax.figure.canvas.mpl_connect("resize_event", self._on_view_change),
+        ]
+        self.refresh()
+
+    def set_data(self, img, key=None):
+        """Set the full resolution image.
+
+        Parameters
+        ----------
+        img : array-like
+            The image.
+        key : hashable, optional
+            If given the pyramid of *img* is cached under *key*, so coming back to the
+            same image does not need its levels to be computed again.
+        """
+        pyramid = None if key is None else self._pyramids.get(key)
+        if pyramid is None:
+            pyramid = ImagePyramid(img)
+            if key is not None:
+                self._pyramids[key] = pyramid
+        self.pyramid = pyramid
+        self.refresh()
+
+    def _on_view_change(self, *args):
+        if not self._refreshing:
+            self.refresh()
+
+    def _visible(self):
+        """Return the visible (row0, row1, col0, col1) of the full image."""
+        left, right, bottom, top = self.extent
+        n_rows, n_cols = self.pyramid.levels[0].shape[:2]
+        # where the first and the last rows of the array are in data coordinates
+        if self.im.origin == "upper":
+            y_first, y_last = top, bottom
+        else:
+            y_first, y_last = bottom, top
+
+        def to_idx(lims, first, last, n):
+            per_px = (last - first) / n
+            idx = sorted((np.asarray(lims) - first) / per_px)
+            return max(int(np.floor(idx[0])), 0), min(int(np.ceil(idx[1])), n)
+
+        row0, row1 = to_idx(self.ax.get_ylim(), y_first, y_last, n_rows)
+        col0, col1 = to_idx(self.ax.get_xlim(), left, right, n_cols)
+        return row0, max(row1, row0 + 1), col0, max(col1, col0 + 1)
+
+    def refresh(self):
+        """Show the right level and part of the image for the current view."""
+        left, right, bottom, top = self.extent
+        n_rows, n_cols = self.pyramid.levels[0].shape[:2]
+        row0, row1, col0, col1 = self._visible()
+        bbox = self.ax.bbox
+        # how many image pixels there are per screen pixel
+        ratio = min((row1 - row0) / max(bbox.height, 1), (col1 - col0) / max(bbox.width, 1))
+        level = int(np.clip(np.floor(np.log2(max(ratio, 1))), 0, self.pyramid.max_level))
+        f = 2**level
+        data = self.pyramid.level(level)
+        # the visible part, at this level
+        # the edges of coarse levels are trimmed so make sure there is at least a pixel
+        r0 = min(row0 // f, data.shape[0] - 1)
+        c0 = min(col0 // f, data.shape[1] - 1)
+        r1 = max(-(-row1 // f), r0 + 1)
+        c1 = max(-(-col1 // f), c0 + 1)
+        sub = data[r0:r1, c0:c1]
+
+        dx = (right - left) / n_cols
+        if self.im.origin == "upper":
+            y_first, dy = top, (bottom - top) / n_rows
+        else:
+            y_first, dy = bottom, (top - bottom) / n_rows
+        # use the number of rows actually present as the edges of the level are trimmed
+        y0 = y_first + r0 * f * dy
+        y1 = y_first + (r0 + sub.shape[0]) * f * dy
+        x0 = left + c0 * f * dx
+        x1 = left + (c0 + sub.shape[1]) * f * dx
+        extent = (x0, x1, y1, y0) if self.im.origin == "upper" else (x0, x1, y0, y1)
+
+        self.level = level
+        self._refreshing = True
+        # set_extent would otherwise autoscale the view to just the visible part
+        autoscale = self.ax.get_autoscalex_on(), self.ax.get_autoscaley_on()
+        try:
+            self.ax.set_autoscalex_on(False)
+            self.ax.set_autoscaley_on(False)
+            self.im.set_data(sub)
+            self.im.set_extent(extent)
+        finally:
+            self.ax.set_autoscalex_on(autoscale[0])
+            self.ax.set_autoscaley_on(autoscale[1])
+            self._refreshing = False
+
+    def disconnect(self):
+        """Stop following the view of the axes."""
+        self.ax.callbacks.disconnect(self._cids[0])
+        self.ax.callbacks.disconnect(self._cids[1])
+        self.ax.figure.canvas.mpl_disconnect(self._cids[2])
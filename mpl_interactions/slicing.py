@@ -0,0 +1,1024 @@
+"""Loading slices of large or lazy arrays for `mpl_interactions.hyperslicer`."""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from functools import partial
+from itertools import product
+
+import numpy as np
+
+from .caching import CompressedLRUCache, LRUCache
+
+__all__ = [
+    "SqueezedArray",
+    "squeeze",
+    "SliceLoader",
+    "ChunkCache",
+    "Projector",
+    "RoiTrace",
+    "VideoFrames",
+    "iter_chunks",
+    "StreamingHistogram",
+    "robust_limits",
+    "sample_limits",
+]
+
+
+def _materialize(data):
+    """Turn a slice of a lazy array (e.g. dask or xarray) into a numpy array."""
+    if hasattr(data, "compute"):
+        data = data.compute()
+    return np.asarray(data)
+
+
+class SqueezedArray:
+    """A view of an array without its length 1 dimensions that doesn't load any data.
+
+    ``np.squeeze`` turns array-likes such as h5py datasets or zarr arrays into an
+    in-memory numpy array, reading the entire file. This instead translates indices
+    into indices of the original array so only the requested data is ever read.
+
+    Parameters
+    ----------
+    arr : array-like
+        Anything with a ``shape`` that can be indexed with a tuple of ints and slices.
+    """
+
+    def __init__(self, arr):
+        self.arr = arr
+        self._kept = [i for i, n in enumerate(arr.shape) if n != 1]
+        self.shape = tuple(arr.shape[i] for i in self._kept)
+        self.dtype = getattr(arr, "dtype", None)
+
+    @property
+    def ndim(self):
+        """Number of dimensions once squeezed."""
+        return len(self.shape)
+
+    def __getitem__(self, key):
+        """Index as if the length 1 dimensions did not exist."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.ndim:
+            raise IndexError(
+                f"too many indices: array is {self.ndim}-dimensional, but {len(key)} were indexed"
+            )
+        full = [0] * len(self.arr.shape)
+        for dim in self._kept:
+            full[dim] = slice(None)
+        for dim, k in zip(self._kept, key):
+            full[dim] = k
+        return self.arr[tuple(full)]
+
+    def __repr__(self):
+        """Show the squeezed shape and the wrapped array."""
+        return f"SqueezedArray(shape={self.shape}, arr={self.arr!r})"
+
+
+def squeeze(arr):
+    """Remove length 1 dimensions from *arr* without loading it into memory.
+
+    Numpy, xarray and dask arrays (including ``np.memmap``) are squeezed as normal
+    as that is already cheap for them. Anything else with a shape, e.g. h5py datasets
+    or zarr arrays, is wrapped in a `SqueezedArray`. Objects without a shape are
+    converted to numpy arrays.
+    """
+    if isinstance(arr, np.ndarray) or hasattr(arr, "compute"):
+        # compute covers dask and xarray, whose squeeze is lazy
+        return arr.squeeze()
+    if not hasattr(arr, "shape"):
+        return np.squeeze(arr)
+    if 1 not in arr.shape:
+        return arr
+    return SqueezedArray(arr)
+
+
+class SliceLoader:
+    """Load slices of an array, keeping the most recently used ones in memory.
+
+    Slices can be loaded in background threads so that slow reads (e.g. computing a
+    dask array) don't block the user interface. Only the most recent request is
+    shown, any older requests that haven't started are cancelled.
+
+    Parameters
+    ----------
+    arr : array-like
+        Anything that can be indexed with a tuple of ints, e.g. a numpy, dask or
+        xarray array. The results of indexing can be lazy, they will be computed.
+    cache_size : int, default: 32
+        How many slices to keep in memory.
+    max_workers : int, default: 2
+        How many threads to load slices with.
+    compress : bool or str or codec, default: False
+        Whether to store the cached slices compressed so that many more of them fit
+        in memory. If True use lz4 from numcodecs if it is installed, otherwise zlib,
+        see `mpl_interactions.caching.get_codec` for the other options. The slices
+        that have been decompressed most recently, or by `SliceLoader.prefetch`, are
+        kept uncompressed in a small `SliceLoader.cache`.
+    cache_bytes : int, optional
+        The most memory the cached slices may take up, on top of *cache_size*.
+    """
+
+    def __init__(self, arr, cache_size=32, max_workers=2, compress=False, cache_bytes=None):
+        self.arr = arr
+        if compress is False:
+            self.compressed_cache = None
+            self.cache = LRUCache(cache_size, max_bytes=cache_bytes)
+        else:
+            self.compressed_cache = CompressedLRUCache(
+                cache_size, codec=None if compress is True else compress, max_bytes=cache_bytes
+            )
+            self.cache = LRUCache(8 if cache_size is None else min(cache_size, 8))
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.RLock()
+        self._pending = {}  # key -> Future
+        self._latest = None  # (future, callback) of the most recent request
+
+    def _load(self, key):
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        if self.compressed_cache is not None:
+            data = self.compressed_cache.get(key)
+        if data is None:
+            data = _materialize(self.arr[key])
+            if self.compressed_cache is not None:
+                self.compressed_cache[key] = data
+        self.cache[key] = data
+        return data
+
+    def get(self, key):
+        """Return the slice at *key*, loading it in this thread if it isn't cached.
+
+        If the slice is already being loaded in the background this waits for it.
+        """
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            try:
+                return future.result()
+            except CancelledError:
+                pass
+        return self._load(key)
+
+    def prefetch(self, keys):
+        """Start loading (or decompressing) the slices at *keys* in the background.
+
+        This doesn't supersede any requests so is useful for reading ahead of what
+        is currently shown.
+        """
+        for key in keys:
+            if key not in self.cache:
+                self.submit(key)
+
+    def submit(self, key):
+        """Start loading the slice at *key* in the background.
+
+        Returns
+        -------
+        concurrent.futures.Future
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="mpl-interactions-slices"
+                    )
+                future = self._executor.submit(self._load, key)
+                self._pending[key] = future
+                future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def cancel(self, keep=None):
+        """Cancel any loads that haven't started yet, apart from *keep*."""
+        with self._lock:
+            for key, future in list(self._pending.items()):
+                if key != keep:
+                    future.cancel()
+
+    def request(self, key, callback):
+        """Ask for the slice at *key*, superseding any earlier requests.
+
+        If the slice is in the cache *callback* is called with it immediately,
+        otherwise it starts loading in the background and `SliceLoader.poll`
+        will call *callback* once it is ready. This way the callback is always called
+        from the thread that calls `request` and `poll`.
+
+        Returns
+        -------
+        bool
+            Whether *callback* has already been called.
+        """
+        self.cancel(keep=key)
+        data = self.cache.get(key)
+        if data is not None:
+            self._latest = None
+            callback(data)
+            return True
+        self._latest = (self.submit(key), callback)
+        return False
+
+    def poll(self):
+        """Call the callback of the latest request if its slice has loaded.
+
+        Returns
+        -------
+        bool
+            True if there is nothing left to wait for.
+        """
+        latest = self._latest
+        if latest is None:
+            return True
+        future, callback = latest
+        if not future.done():
+            return False
+        self._latest = None
+        callback(future.result())
+        return True
+
+    def shutdown(self):
+        """Cancel everything and stop the worker threads."""
+        self.cancel()
+        self._latest = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _chunk_shape(arr, chunks):
+    """Find the chunks of the last three dimensions of *arr*, e.g. from zarr or dask.
+
+    Returns None if *arr* isn't chunked, e.g. an ``np.memmap`` or a contiguous h5py
+    dataset, and no *chunks* are given.
+    """
+    if chunks is None:
+        # dask has chunksize, zarr and h5py have a tuple of ints as chunks
+        chunks = getattr(arr, "chunksize", None)
+        if chunks is None:
+            chunks = getattr(arr, "chunks", None)
+            if not isinstance(chunks, tuple) or not all(
+                isinstance(c, (int, np.integer)) for c in chunks
+            ):
+                return None
+    chunks = tuple(chunks)[-3:]
+    return tuple(min(max(int(c), 1), n) for c, n in zip(chunks, arr.shape[-3:]))
+
+
+class _Blocks:
+    """The chunk aligned blocks of a volume, indexed with ``(*lead, i, j, k)``."""
+
+    def __init__(self, arr, chunks):
+        self.arr = arr
+        self.chunks = chunks
+        self.shape = tuple(arr.shape[-3:])
+
+    def __getitem__(self, key):
+        block = tuple(
+            slice(i * c, min((i + 1) * c, n)) for i, c, n in zip(key[-3:], self.chunks, self.shape)
+        )
+        return self.arr[(*key[:-3], *block)]
+
+
+class _Planes:
+    """The planes through a volume, indexed with ``(*lead, axis, index)``."""
+
+    def __init__(self, arr):
+        self.arr = arr
+
+    def __getitem__(self, key):
+        *lead, axis, index = key
+        plane = [slice(None)] * 3
+        plane[axis] = index
+        return self.arr[(*lead, *plane)]
+
+
+class ChunkCache:
+    """Read planes through a volume via a cache of chunk aligned blocks.
+
+    Reading an XZ or YZ plane from chunked storage (e.g. zarr, h5py or dask) reads
+    every chunk that the plane passes through, so reading planes one at a time reads
+    each chunk many times over. This reads whole chunks and keeps them so that the
+    neighbouring planes, and the planes along the other axes that cross the same
+    chunks, are cut out of memory instead.
+
+    Arrays that are already in memory are not cached, planes are cut from them directly.
+    Storage that isn't chunked (e.g. ``np.memmap`` or contiguous h5py datasets) can
+    read a plane without reading anything around it, so the planes themselves are
+    read and cached. The reads go through a `SliceLoader`, like the slices of
+    `mpl_interactions.hyperslicer`.
+
+    Parameters
+    ----------
+    arr : array-like
+        The volume, its last three dimensions are the ones that planes are cut along.
+        Any leading dimensions are indexed with ints.
+    chunks : tuple of int, optional
+        The size of the blocks to read along the last three dimensions. Defaults to the
+        chunks of *arr* if it has them, otherwise planes are read one at a time.
+    cache_bytes : int, optional
+        The most memory the cached blocks (or planes) may take up. Defaults to twice
+        what one plane along each of the three axes needs.
+    max_workers : int, default: 4
+        How many threads to read the blocks of a plane with.
+    """
+
+    def __init__(self, arr, chunks=None, cache_bytes=None, max_workers=4):
+        self.arr = arr
+        self.shape = tuple(arr.shape[-3:])
+        self.direct = isinstance(arr, np.ndarray) and not isinstance(arr, np.memmap)
+        self.chunks = None if self.direct else _chunk_shape(arr, chunks)
+        self.max_workers = max_workers
+        dtype = getattr(arr, "dtype", None)
+        itemsize = np.dtype(float if dtype is None else dtype).itemsize
+        nz, ny, nx = self.shape
+        if self.chunks is None:
+            self.n_blocks = None
+            source = _Planes(arr)
+            plane_bytes = (ny * nx + nz * nx + nz * ny) * itemsize
+        else:
+            self.n_blocks = tuple(-(-n // c) for n, c in zip(self.shape, self.chunks))
+            source = _Blocks(arr, self.chunks)
+            b = self.n_blocks
+            block_bytes = int(np.prod(self.chunks)) * itemsize
+            plane_bytes = (b[0] * b[1] + b[0] * b[2] + b[1] * b[2]) * block_bytes
+        if cache_bytes is None:
+            cache_bytes = 2 * plane_bytes
+        self.loader = None
+        if not self.direct:
+            self.loader = SliceLoader(
+                source, cache_size=None, max_workers=max_workers, cache_bytes=cache_bytes
+            )
+
+    @property
+    def cache(self):
+        """The `mpl_interactions.caching.LRUCache` of blocks (or planes)."""
+        return None if self.loader is None else self.loader.cache
+
+    def plane(self, axis, index, lead=()):
+        """Return the plane at *index* along *axis* (0, 1 or 2) of the volume at *lead*.
+
+        Parameters
+        ----------
+        axis : int
+            Which of the three volume dimensions the plane is perpendicular to.
+        index : int
+            The position of the plane along *axis*.
+        lead : tuple of int, optional
+            The indices of any dimensions before the volume.
+
+        Returns
+        -------
+        np.ndarray
+            The plane, with the other two volume dimensions in order.
+        """
+        lead = tuple(lead)
+        if self.direct:
+            return _Planes(self.arr)[(*lead, axis, index)]
+        if self.chunks is None:
+            return self.loader.get((*lead, axis, index))
+        others = [d for d in range(3) if d != axis]
+        b, offset = divmod(index, self.chunks[axis])
+        keys = []
+        for i, j in product(*(range(self.n_blocks[d]) for d in others)):
+            idx = [b, b, b]
+            idx[others[0]], idx[others[1]] = i, j
+            keys.append((*lead, *idx))
+
+        if self.max_workers > 1:
+            # read the missing blocks in parallel
+            self.loader.prefetch(keys)
+        out = None
+        c0, c1 = self.chunks[others[0]], self.chunks[others[1]]
+        for key in keys:
+            part = np.take(self.loader.get(key), offset, axis=axis)
+            if out is None:
+                out = np.empty([self.shape[d] for d in others], dtype=part.dtype)
+            i, j = key[-3:][others[0]], key[-3:][others[1]]
+            out[i * c0 : (i + 1) * c0, j * c1 : (j + 1) * c1] = part
+        return out
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        if self.loader is not None:
+            self.loader.shutdown()
+
+
+class Projector:
+    """Project ranges along one axis of a hyperstack, e.g. maximum intensity projections.
+
+    The axis is split into blocks and the reduction of each block is kept, so the
+    projection of a range is combined from the blocks it covers plus the few frames
+    at either end that don't fill a whole block. Moving one end of the range only
+    reads the frames near that end again. The blocks that are missing are read and
+    reduced in parallel, one chunked read per block.
+
+    Index it like the hyperstack but with a ``(start, stop)`` pair of indices,
+    both inclusive, for the projected axis.
+
+    Parameters
+    ----------
+    arr : array-like
+        The hyperstack, e.g. a numpy, dask, zarr or h5py array.
+    axis : int
+        The axis to project along.
+    mode : {"max", "mean", "sum"}, default: "max"
+        How to reduce the range.
+    block_size : int, optional
+        The number of frames in each block. Defaults to the chunk size of *arr*
+        along *axis* if it has chunks, otherwise the square root of its length.
+    cache_size : int, default: 256
+        How many block reductions to keep.
+    max_workers : int, optional
+        Passed to `concurrent.futures.ThreadPoolExecutor`.
+    """
+
+    def __init__(self, arr, axis, mode="max", block_size=None, cache_size=256, max_workers=None):
+        if mode not in ("max", "mean", "sum"):
+            raise ValueError(f"mode must be one of 'max', 'mean' or 'sum' but it is {mode!r}")
+        self.arr = arr
+        self.axis = axis
+        self.mode = mode
+        n = arr.shape[axis]
+        if block_size is None:
+            chunks = getattr(arr, "chunksize", None) or getattr(arr, "chunks", None)
+            if isinstance(chunks, tuple) and isinstance(chunks[axis], (int, np.integer)):
+                block_size = int(chunks[axis])
+            else:
+                block_size = int(np.sqrt(n))
+        self.block_size = max(block_size, 1)
+        self.blocks = LRUCache(cache_size)
+        self.direct = isinstance(arr, np.ndarray) and not isinstance(arr, np.memmap)
+        self.frames = LRUCache(2 * self.block_size)
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _index(self, key, i):
+        key = list(key)
+        key[self.axis] = i
+        return tuple(key)
+
+    def _reduce(self, data):
+        if self.mode == "max":
+            return np.max(data, axis=0)
+        return np.sum(data, axis=0, dtype=np.float64 if data.dtype.kind == "f" else None)
+
+    def _block(self, key, b):
+        cache_key = (self._index(key, None), b)
+        reduced = self.blocks.get(cache_key)
+        if reduced is None:
+            start = b * self.block_size
+            stop = min(start + self.block_size, self.arr.shape[self.axis])
+            reduced = self._reduce(_materialize(self.arr[self._index(key, slice(start, stop))]))
+            self.blocks[cache_key] = reduced
+        return reduced
+
+    def _frame(self, key, i):
+        key = self._index(key, i)
+        frame = None if self.direct else self.frames.get(key)
+        if frame is None:
+            frame = _materialize(self.arr[key])
+            if not self.direct:
+                self.frames[key] = frame
+        # reduced so that it has the same dtype as the blocks
+        return self._reduce(frame[np.newaxis])
+
+    def __getitem__(self, key):
+        """Return the projection at *key*, which has a ``(start, stop)`` at the axis."""
+        start, stop = sorted(int(i) for i in key[self.axis])
+        bs = self.block_size
+        first, last = -(-start // bs), (stop + 1) // bs
+        if first < last:
+            frames = [*range(start, first * bs), *range(last * bs, stop + 1)]
+            blocks = range(first, last)
+        else:
+            frames = range(start, stop + 1)
+            blocks = range(0)
+        tasks = [partial(self._block, key, b) for b in blocks]
+        tasks += [partial(self._frame, key, i) for i in frames]
+        if len(tasks) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="mpl-interactions-projections"
+                )
+            parts = self._executor.map(lambda task: task(), tasks)
+        else:
+            parts = (task() for task in tasks)
+        combine = np.maximum if self.mode == "max" else np.add
+        out = None
+        for part in parts:
+            if out is None:
+                out = part.copy()
+            else:
+                combine(out, part, out=out)
+        if self.mode == "mean":
+            out = out / (stop - start + 1)
+        return out
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class RoiTrace:
+    """The mean of a rectangular region of interest of every frame along one axis.
+
+    The frames are read in blocks along the axis, spread over a pool of threads,
+    and only the pixels in the region are read. When the region changes, the sums
+    of the previous region are updated by adding and removing the strips of
+    pixels that moved in or out, rather than reading the whole region again.
+
+    Parameters
+    ----------
+    arr : array-like
+        The hyperstack, the last two dimensions are the images.
+    axis : int
+        The axis to trace along, one of the non image dimensions.
+    block_size : int, default: 64
+        How many frames to read at once.
+    cache_size : int, default: 32
+        How many traces to keep.
+    max_workers : int, optional
+        Passed to `concurrent.futures.ThreadPoolExecutor`.
+    """
+
+    def __init__(self, arr, axis, block_size=64, cache_size=32, max_workers=None):
+        if not 0 <= axis < arr.ndim - 2:
+            raise ValueError(f"axis must be one of the non image dimensions, but it is {axis}")
+        self.arr = arr
+        self.axis = axis
+        self.block_size = block_size
+        self.cache = LRUCache(cache_size)
+        # the most recent region and its sums for each index of the other axes
+        self._last = LRUCache(cache_size)
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _region_sum(self, key, rows, cols):
+        n = self.arr.shape[self.axis]
+
+        def read(start):
+            k = list(key)
+            k[self.axis] = slice(start, min(start + self.block_size, n))
+            data = _materialize(self.arr[(*k, slice(*rows), slice(*cols))])
+            return data.reshape(data.shape[0], -1).sum(axis=1, dtype=np.float64)
+
+        starts = range(0, n, self.block_size)
+        if len(starts) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="mpl-interactions-roi"
+                )
+            return np.concatenate(list(self._executor.map(read, starts)))
+        return read(0)
+
+    def _update(self, key, old, sums, new):
+        """Turn the *sums* of region *old* into those of region *new* strip by strip."""
+        r0, r1, c0, c1 = old
+        nr0, nr1, nc0, nc1 = new
+        sums = sums.copy()
+        # the rows change with the old columns, then the columns with the new rows,
+        # strips running backwards are taken away
+        strips = [((nr0, r0), (c0, c1)), ((r1, nr1), (c0, c1))]
+        strips += [((nr0, nr1), (nc0, c0)), ((nr0, nr1), (c1, nc1))]
+        for rows, cols in strips:
+            sign = 1
+            if rows[0] > rows[1]:
+                rows, sign = rows[::-1], -sign
+            if cols[0] > cols[1]:
+                cols, sign = cols[::-1], -sign
+            if rows[0] != rows[1] and cols[0] != cols[1]:
+                sums += sign * self._region_sum(key, rows, cols)
+        return sums
+
+    def sums(self, key, roi):
+        """Return the sum of the region *roi* of each frame.
+
+        Parameters
+        ----------
+        key : tuple of int
+            The indices of the non image dimensions, the entry for *axis* is ignored.
+        roi : (int, int, int, int)
+            The first and one past the last row, then the same for columns.
+
+        Returns
+        -------
+        np.ndarray
+            The sums, in float64.
+        """
+        key = list(key)
+        key[self.axis] = None
+        key = tuple(key)
+        roi = tuple(int(i) for i in roi)
+        sums = self.cache.get((key, roi))
+        if sums is not None:
+            return sums
+        r0, r1, c0, c1 = roi
+        last = self._last.get(key)
+        if last is not None:
+            o0, o1, p0, p1 = last[0]
+            strips = (abs(r0 - o0) + abs(r1 - o1)) * (p1 - p0)
+            strips += (abs(c0 - p0) + abs(c1 - p1)) * (r1 - r0)
+        if last is not None and strips < (r1 - r0) * (c1 - c0):
+            sums = self._update(key, last[0], last[1], roi)
+        else:
+            sums = self._region_sum(key, (r0, r1), (c0, c1))
+        self.cache[(key, roi)] = sums
+        self._last[key] = (roi, sums)
+        return sums
+
+    def trace(self, key, roi):
+        """Return the mean of the region *roi* of each frame, see `RoiTrace.sums`."""
+        r0, r1, c0, c1 = roi
+        return self.sums(key, roi) / max((r1 - r0) * (c1 - c0), 1)
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class VideoFrames:
+    """The frames of a video as an array that is decoded a frame at a time.
+
+    Decoded frames are kept in a cache and the frames after the one asked for are
+    decoded ahead in a background thread, so stepping or playing forward doesn't wait
+    for the decoder. Seeking in a video means decoding from the keyframe before the
+    frame, so frames a little ahead of the last one decoded are reached by decoding
+    forward instead, unless there is a keyframe in between.
+
+    Parameters
+    ----------
+    reader : object
+        The video, it needs ``len(reader)`` and ``reader.get_frame(i)`` to seek to and
+        return frame *i*. If it has ``reader.read_next()``, returning the frame after the
+        last one returned, that is used to decode forward. If it has a sorted
+        ``reader.keyframes`` of keyframe indices those are used to decide whether to
+        seek. Readers from e.g. imageio or PyAV need a thin wrapper.
+    cache_size : int, default: 32
+        How many decoded frames to keep.
+    read_ahead : int, default: 8
+        How many frames after the one asked for to decode in the background.
+    keyframe_interval : int, default: 32
+        If the reader doesn't list its keyframes, the furthest ahead to decode forward
+        to rather than seek.
+    """
+
+    def __init__(self, reader, cache_size=32, read_ahead=8, keyframe_interval=32):
+        self.reader = reader
+        self.cache = LRUCache(cache_size)
+        self.read_ahead = read_ahead
+        self.keyframe_interval = keyframe_interval
+        keyframes = getattr(reader, "keyframes", None)
+        self.keyframes = None if keyframes is None else np.asarray(keyframes)
+        self._lock = threading.RLock()  # decoders are not thread safe
+        self._pos = None  # the index of the last frame the reader returned
+        self._generation = 0
+        self._executor = None
+        first = self._get(0)
+        self.shape = (len(reader), *first.shape)
+        self.dtype = first.dtype
+
+    @property
+    def ndim(self):
+        """Number of dimensions, the frames followed by those of each frame."""
+        return len(self.shape)
+
+    def __len__(self):
+        """Return the number of frames."""
+        return self.shape[0]
+
+    def _step_forward(self, i):
+        """Whether decoding forward to *i* is quicker than seeking to it."""
+        if self._pos is None or not hasattr(self.reader, "read_next") or i <= self._pos:
+            return False
+        if self.keyframes is not None:
+            # seeking would start from the last keyframe at or before i
+            n = np.searchsorted(self.keyframes, i, side="right")
+            return n == 0 or self.keyframes[n - 1] <= self._pos
+        return i - self._pos <= self.keyframe_interval
+
+    def _decode(self, i):
+        with self._lock:
+            frame = self.cache.get(i)
+            if frame is not None:
+                return frame
+            if self._step_forward(i):
+                while self._pos < i:
+                    frame = np.asarray(self.reader.read_next())
+                    self._pos += 1
+                    # the frames on the way are decoded anyway
+                    self.cache[self._pos] = frame
+            else:
+                frame = np.asarray(self.reader.get_frame(i))
+                self._pos = i
+                self.cache[i] = frame
+            return frame
+
+    def _get(self, i):
+        frame = self.cache.get(i)
+        if frame is None:
+            frame = self._decode(i)
+        return frame
+
+    def get(self, i):
+        """Return frame *i* and start decoding the frames after it in the background."""
+        i = range(len(self))[i]
+        frame = self._get(i)
+        self._decode_ahead(i)
+        return frame
+
+    def _decode_ahead(self, i):
+        upcoming = range(i + 1, min(i + 1 + self.read_ahead, len(self)))
+        upcoming = [j for j in upcoming if j not in self.cache]
+        if not upcoming:
+            return
+        self._generation += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="mpl-interactions-video")
+        self._executor.submit(self._decode_all, upcoming, self._generation)
+
+    def _decode_all(self, indices, generation):
+        for j in indices:
+            if generation != self._generation:
+                # a newer frame was asked for
+                return
+            self._decode(j)
+
+    def __getitem__(self, key):
+        """Index like an array of shape ``(n_frames, *frame.shape)``."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        first, rest = key[0], key[1:]
+        if isinstance(first, slice):
+            return np.stack([self._get(i)[rest] for i in range(*first.indices(len(self)))])
+        return self.get(int(first))[rest]
+
+    def shutdown(self):
+        """Stop decoding ahead."""
+        self._generation += 1
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def iter_chunks(arr, chunk_size=2**22):
+    """Yield blocks of *arr* along its first axis as numpy arrays.
+
+    Parameters
+    ----------
+    arr : array-like
+        E.g. a np.memmap, h5py, zarr or dask array. Only one block is read at a time.
+    chunk_size : int, default: 2**22
+        About how many elements to put in each block.
+    """
+    if len(arr.shape) == 0:
+        yield _materialize(arr)
+        return
+    for block in _blocks(arr, chunk_size):
+        yield _materialize(arr[block])
+
+
+def _blocks(arr, chunk_size):
+    row = int(np.prod(arr.shape[1:]))
+    step = max(chunk_size // max(row, 1), 1)
+    return [slice(start, start + step) for start in range(0, arr.shape[0], step)]
+
+
+def _chunked_range(arr, chunk_size=2**22, max_workers=None):
+    """Return the (min, max) of the finite values of *arr*, reading a block per thread."""
+    if len(arr.shape) == 0:
+        return _finite_range(_materialize(arr))
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="mpl-interactions-hist") as ex:
+        ranges = list(
+            ex.map(lambda block: _finite_range(_materialize(arr[block])), _blocks(arr, chunk_size))
+        )
+    return min((r[0] for r in ranges), default=np.inf), max((r[1] for r in ranges), default=-np.inf)
+
+
+class StreamingHistogram:
+    """Histogram chunks of data in a pool of threads, adding up the counts as they come.
+
+    The counts so far can be read at any time, e.g. to show the histogram while it
+    is still being counted. Only a couple of chunks per thread are held in memory at
+    once, so the data can be much larger than memory.
+
+    Parameters
+    ----------
+    edges : array-like
+        The bin edges.
+    max_workers : int, optional
+        How many threads to histogram chunks with. Defaults to the number of CPUs.
+    """
+
+    def __init__(self, edges, max_workers=None):
+        self.edges = np.asarray(edges)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.done = False
+        """Whether all of the chunks have been counted."""
+        self.error = None
+        """The exception raised while counting, if there was one."""
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._thread = None
+
+    def _add(self, chunk):
+        if self._cancelled:
+            return
+        counts = np.histogram(chunk, self.edges)[0]
+        with self._lock:
+            self.counts += counts
+
+    def run(self, chunks):
+        """Histogram all of *chunks*, an iterable of arrays, and return the counts."""
+        try:
+            with ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="mpl-interactions-hist"
+            ) as ex:
+                pending = deque()
+                for chunk in chunks:
+                    if self._cancelled:
+                        break
+                    pending.append(ex.submit(self._add, chunk))
+                    # don't read too far ahead of the threads
+                    while len(pending) > 2 * self.max_workers:
+                        pending.popleft().result()
+                for future in pending:
+                    future.result()
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            self.done = True
+        return self.counts
+
+    def start(self, chunks):
+        """Start histogramming *chunks* in a background thread."""
+        self._thread = threading.Thread(
+            target=self._run_quietly, args=(chunks,), name="mpl-interactions-hist", daemon=True
+        )
+        self._thread.start()
+
+    def _run_quietly(self, chunks):
+        try:
+            self.run(chunks)
+        except Exception:
+            # kept in self.error for whoever is polling
+            pass
+
+    def snapshot(self):
+        """Return a copy of the counts so far."""
+        with self._lock:
+            return self.counts.copy()
+
+    def cancel(self):
+        """Stop counting, chunks that are being counted are finished."""
+        self._cancelled = True
+
+
+def _exact_counts(frame, info):
+    # integers of 16 bits or less can be counted exactly
+    return np.bincount(
+        (frame.ravel().astype(np.int64) - info.min), minlength=info.max - info.min + 1
+    )
+
+
+def _finite_range(frame):
+    finite = frame[np.isfinite(frame)]
+    if finite.size == 0:
+        return np.inf, -np.inf
+    return finite.min(), finite.max()
+
+
+def _quantiles(counts, values, percentiles):
+    cumulative = np.cumsum(counts)
+    if cumulative[-1] == 0:
+        return np.array([np.nan] * len(percentiles))
+    # at least 1 so that the 0th percentile is the first bin with anything in it
+    targets = np.maximum(np.asarray(percentiles) / 100 * cumulative[-1], 1)
+    idx = np.searchsorted(cumulative, targets)
+    return values[np.minimum(idx, len(values) - 1)]
+
+
+def robust_limits(
+    arr, percentiles=(2, 98), axis=None, image_dims=2, bins=4096, max_workers=None, fallback=(0, 1)
+):
+    """Compute percentiles of a hyperstack of images without loading all of it at once.
+
+    The images are read and reduced to histograms one at a time, spread over a pool
+    of threads, so this works for stacks much larger than memory (e.g. h5py,
+    zarr or dask). Integer data of 16 bits or less is counted exactly. Other data
+    needs two passes, one for the range and one for the histograms, and the
+    percentiles are accurate to ``(max - min) / bins``. NaNs and infs are ignored.
+
+    Parameters
+    ----------
+    arr : array-like
+        The hyperstack, it is indexed with tuples of ints to get each image.
+    percentiles : (float, float), default: (2, 98)
+        The percentiles to use as the lower and upper limits.
+    axis : int, optional
+        If given compute separate limits for each index along this (non image) axis.
+    image_dims : int, default: 2
+        How many of the trailing dimensions make up each image, 3 for color images.
+    bins : int, default: 4096
+        The number of histogram bins for data that isn't counted exactly.
+    max_workers : int, optional
+        Passed to `concurrent.futures.ThreadPoolExecutor`.
+    fallback : tuple of float, default: (0, 1)
+        The limits to use when there are no finite values, e.g. for an all NaN stack
+        or, if *axis* is given, an all NaN index along it.
+
+    Returns
+    -------
+    limits : np.ndarray
+        The limits with shape ``(len(percentiles),)`` or, if *axis* is given,
+        ``(arr.shape[axis], len(percentiles))``.
+    """
+    keys = list(product(*(range(n) for n in arr.shape[: arr.ndim - image_dims])))
+    if axis is not None and not 0 <= axis < arr.ndim - image_dims:
+        raise ValueError(f"axis must be one of the non image dimensions, but it is {axis}")
+
+    def read(key):
+        return _materialize(arr[key])
+
+    dtype = getattr(arr, "dtype", None)
+    dtype = read(keys[0]).dtype if dtype is None else np.dtype(dtype)
+    n_groups = 1 if axis is None else arr.shape[axis]
+
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="mpl-interactions-limits") as ex:
+        if dtype.kind in "ui" and dtype.itemsize <= 2:
+            info = np.iinfo(dtype)
+            values = np.arange(info.min, info.max + 1)
+
+            def reduce(key):
+                return _exact_counts(read(key), info)
+
+        else:
+            ranges = np.array(list(ex.map(lambda key: _finite_range(read(key)), keys)))
+            lo, hi = ranges[:, 0].min(), ranges[:, 1].max()
+            if not lo < hi:
+                # empty or constant
+                hi = lo + 1 if np.isfinite(lo) else 1
+                lo = lo if np.isfinite(lo) else 0
+            edges = np.linspace(lo, hi, bins + 1)
+            values = (edges[:-1] + edges[1:]) / 2
+            values[0], values[-1] = lo, hi
+
+            def reduce(key):
+                frame = read(key)
+                return np.histogram(frame[np.isfinite(frame)], bins, range=(lo, hi))[0]
+
+        counts = np.zeros((n_groups, len(values)), dtype=np.int64)
+        for key, c in zip(keys, ex.map(reduce, keys)):
+            counts[0 if axis is None else key[axis]] += c
+
+    limits = np.array([_quantiles(c, values, percentiles) for c in counts])
+    limits[~np.isfinite(limits).all(axis=1)] = fallback
+    return limits[0] if axis is None else limits
+
+
+def sample_limits(frame, percentiles=(2, 98), n_samples=10_000, seed=0, fallback=(0, 1)):
+    """Estimate percentiles of an image from a random sample of its pixels.
+
+    The same pixels are sampled for every image of the same size (for a given *seed*)
+    so that the limits don't flicker while scrubbing through a stack.
+
+    Parameters
+    ----------
+    frame : np.ndarray
+        The image.
+    percentiles : (float, float), default: (2, 98)
+        The percentiles to estimate.
+    n_samples : int, default: 10_000
+        How many pixels to sample. Images with fewer pixels are used in full.
+    seed : int, default: 0
+        The seed of the random sample.
+    fallback : tuple of float, default: (0, 1)
+        The limits to use when none of the sampled pixels are finite, e.g. pass
+        the current limits to keep them for an all NaN image.
+
+    Returns
+    -------
+    limits : np.ndarray
+    """
+    flat = np.asarray(frame).ravel()
+    if flat.size > n_samples:
+        flat = flat[np.random.default_rng(seed).integers(0, flat.size, n_samples)]
+    if flat.dtype.kind == "f":
+        flat = flat[np.isfinite(flat)]
+    if flat.size == 0:
+        return np.array(fallback, dtype=float)
+    return np.percentile(flat, percentiles)
@@ -0,0 +1,250 @@
+"""Picklable descriptions of interactive figures."""
+
+import importlib
+from functools import partial
+
+__all__ = [
+    "ImportRef",
+    "DashboardSpec",
+]
+
+
+class ImportRef:
+    """A reference to a callable (or any object) by its import path.
+
+    Closures and lambdas cannot be pickled, so a `DashboardSpec` stores the functions
+    it uses as references that are imported again when it is built.
+
+    Parameters
+    ----------
+    path : str
+        Either ``"module:qualname"`` or ``"module.qualname"``, e.g. ``"numpy:sin"``.
+    """
+
+    def __init__(self, path):
+        if ":" not in path:
+            module, _, qualname = path.rpartition(".")
+            if not module:
+                raise ValueError(f"{path!r} is not an import path, e.g. 'numpy:sin'")
+            path = f"{module}:{qualname}"
+        self.path = path
+
+    @classmethod
+    def from_object(cls, obj):
+        """Create a reference to *obj*, checking that it can be imported by that path.
+
+        Raises
+        ------
+        ValueError
+            If *obj* is a lambda, defined inside another function, or otherwise not
+            importable as ``obj.__module__`` and ``obj.__qualname__``.
+        """
+        module = getattr(obj, "__module__", None)
+        qualname = getattr(obj, "__qualname__", None)
+        if module is None or qualname is None or "<" in qualname:
+            raise ValueError(
+                f"{obj!r} cannot be referenced by an import path. Define it at the top"
+                " level of a module so that it can be imported by the workers."
+            )
+        ref = cls(f"{module}:{qualname}")
+        if ref.resolve() is not obj:
+            raise ValueError(f"{obj!r} is not importable as {ref.path!r}")
+        return ref
+
+    def resolve(self):
+        """Import the referenced object."""
+        module, _, qualname = self.path.partition(":")
+        obj = importlib.import_module(module)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+        return obj
+
+    def __eq__(self, other):
+        """Compare the import paths."""
+        return isinstance(other, ImportRef) and other.path == self.path
+
+    def __hash__(self):
+        """Hash the import path."""
+        return hash(self.path)
+
+    def __repr__(self):
+        """Return ``ImportRef('module:qualname')``."""
+        return f"ImportRef({self.path!r})"
+
+
+def _to_refs(obj):
+    """Replace any functions in *obj* with `ImportRef`."""
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_refs(o) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _to_refs(v) for k, v in obj.items()}
+    if callable(obj) and not isinstance(obj, (ImportRef, type)):
+        return ImportRef.from_object(obj)
+    return obj
+
+
+def _resolve_refs(obj):
+    if isinstance(obj, ImportRef):
+        return obj.resolve()
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_resolve_refs(o) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _resolve_refs(v) for k, v in obj.items()}
+    return obj
+
+
+class DashboardSpec:
+    """A picklable description of an interactive figure that can be built many times.
+
+    The interactive functions keep their state in closures which cannot be pickled.
+    Instead of pickling a built figure, describe how to build it and send the
+    description to other processes where `DashboardSpec.build` recreates it.
+
+    Parameters
+    ----------
+    nrows, ncols : int, default: 1
+        The grid of axes in the figure.
+    figsize : (float, float), optional
+        Passed to `~matplotlib.figure.Figure`.
+    dpi : float, optional
+        Passed to `~matplotlib.figure.Figure`.
+    backend : {"headless", "matplotlib", "ipywidgets"}, default: "headless"
+        The backend of the `~mpl_interactions.controller.Controls` that are built.
+    **controls
+        Interpreted as controls, these will be created before any of the artists.
+
+    Examples
+    --------
+    ::
+
+        # mymodule.py
+        def f(x, tau):
+            return np.sin(x * tau)
+
+        spec = DashboardSpec(figsize=(4, 3), tau=(0, 10, 100))
+        spec.add("interactive_plot", x, f)
+        spec.add("interactive_title", "tau: {tau:.2f}")
+        frames = spec.render_in_processes([{"tau": t} for t in np.linspace(0, 10, 100)])
+    """
+
+    def __init__(self, nrows=1, ncols=1, figsize=None, dpi=None, backend="headless", **controls):
+        self.nrows = nrows
+        self.ncols = ncols
+        self.figsize = figsize
+        self.dpi = dpi
+        self.backend = backend
+        self.controls = _to_refs(controls)
+        self.artists = []
+
+    def add(self, func, *args, ax=0, params=None, **kwargs):
+        """Add an interactive artist to the spec.
+
+        Parameters
+        ----------
+        func : str or callable
+            The name of a function in mpl_interactions (e.g. ``"interactive_plot"``
+            or ``"hyperslicer"``) or an importable function that accepts *ax* and
+            *controls* keyword arguments.
+        *args
+            Passed to *func*. Any functions are stored as `ImportRef`.
+        ax : int, default: 0
+            The index of the axes to use, counting along the rows.
+        params : list of str, optional
+            The params of the controls to pass on to *func*, e.g. ``["tau"]``. If None
+            all of the params that exist when the artist is built will be passed.
+        **kwargs
+            Passed to *func*. Any functions are stored as `ImportRef`.
+
+        Raises
+        ------
+        ValueError
+            If any of the functions cannot be imported by path e.g. lambdas.
+        """
+        if isinstance(func, str):
+            func = ImportRef(f"mpl_interactions:{func}")
+            func.resolve()
+        else:
+            func = ImportRef.from_object(func)
+        self.artists.append((func, _to_refs(args), ax, params, _to_refs(kwargs)))
+
+    def build(self, fig=None):
+        """Create the figure and controls described by this spec.
+
+        Parameters
+        ----------
+        fig : Figure, optional
+            The figure to add the axes to. If None a new `matplotlib.figure.Figure` is
+            created, which does not involve pyplot so this is safe to call from any thread.
+
+        Returns
+        -------
+        fig : Figure
+        controls : mpl_interactions.controller.Controls
+        """
+        from .controller import Controls
+
+        if fig is None:
+            from matplotlib.figure import Figure
+
+            fig = Figure(figsize=self.figsize, dpi=self.dpi)
+        axes = fig.subplots(self.nrows, self.ncols, squeeze=False).ravel()
+        controls = Controls(backend=self.backend, **_resolve_refs(self.controls))
+        for func, args, ax, params, kwargs in self.artists:
+            ctrls = controls if params is None else controls[params]
+            func.resolve()(
+                *_resolve_refs(args),
+                ax=axes[ax],
+                controls=ctrls,
+                display_controls=False,
+                **_resolve_refs(kwargs),
+            )
+        return fig, controls
+
+    def render_in_processes(
+        self, params, format="png", max_workers=None, chunksize=1, **savefig_kwargs
+    ):
+        """Render many parameter states in parallel using a pool of processes.
+
+        Each worker process builds the figure once and then renders its share of
+        *params* with `Controls.render`.
+
+        Parameters
+        ----------
+        params : iterable of dict
+            The params of each frame. Give every param that matters as workers
+            only change the params they are given.
+        format : str, default: "png"
+            The image format.
+        max_workers : int, optional
+            Passed to `concurrent.futures.ProcessPoolExecutor`.
+        chunksize : int, default: 1
+            How many frames to send to a worker at once.
+        **savefig_kwargs
+            Passed through to `~matplotlib.figure.Figure.savefig`.
+
+        Returns
+        -------
+        list of bytes
+            The rendered frames in the same order as *params*.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        render = partial(_render_in_worker, format=format, savefig_kwargs=savefig_kwargs)
+        with ProcessPoolExecutor(
+            max_workers, initializer=_init_worker, initargs=(self,)
+        ) as executor:
+            return list(executor.map(render, params, chunksize=chunksize))
+
+
+# the figure and controls of each process in `DashboardSpec.render_in_processes`
+_worker_dashboard = None
+
+
+def _init_worker(spec):
+    global _worker_dashboard
+    _worker_dashboard = spec.build()
+
+
+def _render_in_worker(params, format, savefig_kwargs):
+    fig, controls = _worker_dashboard
+    return controls.render(fig, params, format=format, **savefig_kwargs)
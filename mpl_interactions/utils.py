@@ -4,9 +4,7 @@ import warnings
 from collections.abc import Iterable
 
 import numpy as np
-from matplotlib import interactive, is_interactive
-from matplotlib.pyplot import figure as mpl_figure
-from matplotlib.pyplot import install_repl_displayhook, rcParams, uninstall_repl_displayhook
+from matplotlib import interactive, is_interactive, rcParams
 from numpy import abs, argmin, asarray
 
 from .deprecations import mpl_interactions_DeprecationWarning
@@ -16,6 +14,8 @@ __all__ = [
     "nearest_idx",
     "ioff",
     "indexer",
+    "minmax_decimate",
+    "lttb_decimate",
 ]
 
 
@@ -28,6 +28,8 @@ class _ioff_class:
 
     def __call__(self):
         """Turn the interactive mode off."""
+        from matplotlib.pyplot import uninstall_repl_displayhook
+
         warnings.warn(
             "ioff is deprecated in mpl-interactions."
             " Please use `with plt.ioff():` directly from matplotlib instead.",
@@ -42,6 +44,8 @@ class _ioff_class:
         self.__call__()
 
     def __exit__(self, exc_type, exc_value, traceback):
+        from matplotlib.pyplot import install_repl_displayhook
+
         if self.wasinteractive:
             interactive(True)
             install_repl_displayhook()
@@ -63,6 +67,8 @@ def figure(figsize=1, *args, **kwargs):
         fig1 = figure(2)
         fig2 = plt.figure(figsize=(12.8, 9.6))
     """
+    from matplotlib.pyplot import figure as mpl_figure
+
     if not isinstance(figsize, Iterable) and figsize is not None:
         figsize = [figsize * x for x in rcParams["figure.figsize"]]
     return mpl_figure(*args, figsize=figsize, **kwargs)
@@ -124,3 +130,167 @@ def indexer(arr, index_name=None, axis=0):
         raise ValueError(f"indexer did not receive a kwarg with a name in {idxs}")
 
     return f
+
+
+def _visible_part(x, y, xlim):
+    """Return the points of a line with sorted *x* that are in *xlim*, and one either side."""
+    if xlim is None:
+        return x, y
+    lo, hi = sorted(xlim)
+    start = max(np.searchsorted(x, lo, side="left") - 1, 0)
+    stop = min(np.searchsorted(x, hi, side="right") + 1, len(x))
+    return x[start:stop], y[start:stop]
+
+
+def minmax_decimate(x, y, n_bins, xlim=None, x_transform=None):
+    """Reduce a line to the smallest and largest *y* in each of *n_bins* columns along *x*.
+
+    With one column per pixel the line looks the same as the full line, but has at
+    most about ``2 * n_bins`` points however many the data has. Breaks in the line
+    (NaNs) are kept.
+
+    Parameters
+    ----------
+    x : array-like
+        The x values, sorted from smallest to largest.
+    y : array-like
+        The y values.
+    n_bins : int
+        How many columns to split *xlim* into, e.g. the width of the axes in pixels.
+    xlim : (float, float), optional
+        The range of *x* to keep, e.g. the current view. Defaults to all of *x*.
+    x_transform : callable, optional
+        Maps x values to the space that the columns are evenly spaced in, e.g.
+        ``ax.xaxis.get_transform().transform`` for a log scaled axis. Defaults to
+        evenly spaced columns of *x*.
+
+    Returns
+    -------
+    x, y : np.ndarray
+        The decimated line.
+    """
+    x, y = _visible_part(np.asarray(x), np.asarray(y), xlim)
+    if len(x) <= 2 * n_bins:
+        return x, y
+    lo, hi = (x[0], x[-1]) if xlim is None else sorted(xlim)
+    x_binned = x
+    if x_transform is not None:
+        x_binned = x_transform(x)
+        lo, hi = x_transform(np.array([lo, hi], dtype=float))
+    # the points are sorted so each column is a contiguous run of them
+    starts = np.searchsorted(x_binned, np.linspace(lo, hi, n_bins + 1)[1:-1])
+    starts = np.unique(np.concatenate([[0], starts]))
+    starts = starts[starts < len(x)]
+    column = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(x))))
+
+    def first_where(is_extreme):
+        # the first point in each column that is the extreme of its column
+        idx = np.flatnonzero(is_extreme)
+        first = np.ones(len(idx), dtype=bool)
+        first[1:] = column[idx[1:]] != column[idx[:-1]]
+        return idx[first]
+
+    with np.errstate(invalid="ignore"):
+        is_min = y == np.fmin.reduceat(y, starts)[column]
+        is_max = y == np.fmax.reduceat(y, starts)[column]
+    nan = np.isnan(y)
+    # the first NaN of each run of them to break the line there
+    breaks = np.flatnonzero(nan[1:] & ~nan[:-1]) + 1
+    keep = np.concatenate([[0, len(x) - 1], first_where(is_min), first_where(is_max), breaks])
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+# how many points lttb_decimate measures the triangles of at once
+_LTTB_BLOCK = 2**14
+
+
+def lttb_decimate(x, y, n_out, xlim=None, x_transform=None, y_transform=None):
+    """Reduce a line to *n_out* points with the Largest Triangle Three Buckets algorithm.
+
+    The points are split into buckets, and from each bucket the point that makes the
+    largest triangle with the point chosen from the previous bucket and the average
+    of the next bucket is kept. This keeps the shape of the line better than
+    `minmax_decimate` for the same number of points, but it doesn't keep every
+    extreme. NaNs are dropped.
+
+    The buckets are measured all at once rather than one after the other, so a first
+    pass uses the average of the previous bucket in place of its point and a second
+    pass uses the points that the first pass chose. This can choose a different point
+    than the original algorithm where the two passes disagree.
+
+    Parameters
+    ----------
+    x : array-like
+        The x values, sorted from smallest to largest.
+    y : array-like
+        The y values.
+    n_out : int
+        How many points to keep, at least 3.
+    xlim : (float, float), optional
+        The range of *x* to keep, e.g. the current view. Defaults to all of *x*.
+    x_transform, y_transform : callable, optional
+        Map the x and y values to the space that the triangles are measured in, e.g.
+        ``ax.yaxis.get_transform().transform`` for a log scaled axis. Points that
+        are not finite once transformed are dropped.
+
+    Returns
+    -------
+    x, y : np.ndarray
+        The decimated line.
+    """
+    x, y = _visible_part(np.asarray(x), np.asarray(y), xlim)
+    xt = np.asarray(x, dtype=float) if x_transform is None else x_transform(x.astype(float))
+    yt = np.asarray(y, dtype=float) if y_transform is None else y_transform(y.astype(float))
+    finite = np.isfinite(yt) & np.isfinite(xt)
+    if not finite.all():
+        x, y, xt, yt = x[finite], y[finite], xt[finite], yt[finite]
+    n_out = max(n_out, 3)
+    if len(x) <= n_out:
+        return x, y
+    x_out, y_out = x, y
+    x, y = xt, yt
+    # the first and last points are buckets of their own, and the rest are split into
+    # buckets of k + 1 points followed by buckets of k points so each kind is a reshape
+    n_buckets = n_out - 2
+    k, n_big = divmod(len(x) - 2, n_buckets)
+    split = 1 + n_big * (k + 1)
+    kinds = [
+        (slice(0, n_big), 1, k + 1, slice(1, split)),
+        (slice(n_big, n_buckets), split, k, slice(split, len(x) - 1)),
+    ]
+
+    def buckets(v):
+        return [v[points].reshape(-1, size) for _, _, size, points in kinds]
+
+    xs, ys = buckets(x), buckets(y)
+    mean_x = np.concatenate([b.mean(axis=1) for b in xs])
+    mean_y = np.concatenate([b.mean(axis=1) for b in ys])
+    # the average of the next bucket, which is the last point for the last bucket
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, len(x) - 1
+    # the point of the previous bucket depends on the bucket before that, so its
+    # average stands in for it in the first pass
+    a_x = np.insert(mean_x[:-1], 0, x[0])
+    a_y = np.insert(mean_y[:-1], 0, y[0])
+    for _ in range(2):
+        # twice the area of the triangle with each point of the bucket, the sign doesn't matter
+        dx, dy = (a_x - next_x)[:, None], (next_y - a_y)[:, None]
+        offset = dx * a_y[:, None] + dy * a_x[:, None]
+        for (rows, start, size, _), bx, by in zip(kinds, xs, ys):
+            chosen = keep[1:-1][rows]
+            # a block of buckets at a time so the areas stay in the cpu cache
+            step = max(_LTTB_BLOCK // size, 1)
+            for i in range(0, len(bx), step):
+                block = slice(i, i + step)
+                area = by[block] * dx[rows][block]
+                area += bx[block] * dy[rows][block]
+                area -= offset[rows][block]
+                np.abs(area, out=area)
+                chosen[block] = np.argmax(area, axis=1)
+            chosen += start + size * np.arange(len(bx))
+        a_x, a_y = x[keep[:-2]], y[keep[:-2]]
+    return x_out[keep], y_out[keep]
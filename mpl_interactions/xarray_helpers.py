@@ -1,7 +1,20 @@
+import warnings
+
 import numpy as np
 
+from .caching import LRUCache
+from .deprecations import mpl_interactions_DeprecationWarning
 from .helpers import choose_fmt_str
 
+__all__ = [
+    "choose_datetime_nonsense",
+    "CoordFormat",
+    "DataArraySlicer",
+    "get_hs_axes",
+    "get_hs_extent",
+    "get_hs_fmts",
+]
+
 
 def choose_datetime_nonsense(arr, timeunit="m"):
     """
@@ -29,7 +42,86 @@ def choose_datetime_nonsense(arr, timeunit="m"):
     return out
 
 
-def get_hs_axes(xarr, is_color_image=False, timeunit="m"):
+class CoordFormat:
+    """Format datetime and timedelta slider values, truncated to *timeunit*, when shown.
+
+    This has the ``format`` method of a format string so it can be used as a slider
+    format. Rather than converting every value of a coordinate when the slider is
+    created, each value is converted when it is shown and the result is kept.
+
+    Parameters
+    ----------
+    timeunit : str, default: "m"
+        Truncation level for datetimes and timedeltas. Timedeltas are shown as
+        a number of this unit.
+    suffix : str, default: ""
+        Added to the end of the formatted value, e.g. units.
+    """
+
+    def __init__(self, timeunit="m", suffix=""):
+        self.timeunit = timeunit
+        self.suffix = suffix
+        self._cache = LRUCache(1024)
+
+    def format(self, value):
+        """Return *value* as a string."""
+        out = self._cache.get(value)
+        if out is None:
+            if isinstance(value, np.datetime64):
+                out = str(np.datetime64(value, self.timeunit))
+            elif isinstance(value, np.timedelta64):
+                out = str(int(value / np.timedelta64(1, self.timeunit)))
+            else:
+                out = str(value)
+            out += self.suffix
+            self._cache[value] = out
+        return out
+
+    def __add__(self, other):
+        """Add to the suffix, like adding to a format string."""
+        return CoordFormat(self.timeunit, self.suffix + other)
+
+    def __repr__(self):
+        """Show the time unit and the suffix."""
+        return f"CoordFormat(timeunit={self.timeunit!r}, suffix={self.suffix!r})"
+
+
+class DataArraySlicer:
+    """Index a DataArray by position through ``isel``.
+
+    The result of indexing is still a DataArray, so dask backed arrays stay lazy until
+    they are computed and only the chunks of the slice are read.
+
+    Parameters
+    ----------
+    xarr : xarray.DataArray
+        The DataArray to index.
+    """
+
+    def __init__(self, xarr):
+        self.xarr = xarr
+        self.shape = xarr.shape
+        self.dtype = xarr.dtype
+        # so reads can line up with the chunks of dask backed arrays
+        self.chunksize = getattr(xarr.data, "chunksize", None)
+
+    @property
+    def ndim(self):
+        """Number of dimensions of the DataArray."""
+        return len(self.shape)
+
+    def __getitem__(self, key):
+        """Select by position along the dimensions in order, like numpy indexing."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        return self.xarr.isel(dict(zip(self.xarr.dims, key)))
+
+    def __repr__(self):
+        """Show the wrapped DataArray."""
+        return f"DataArraySlicer({self.xarr!r})"
+
+
+def get_hs_axes(xarr, is_color_image=False, timeunit=None):
     """Read the dims and coordinates from an xarray and construct the axes argument for hyperslicer.
 
     Parameters
@@ -38,8 +130,10 @@ def get_hs_axes(xarr, is_color_image=False, timeunit="m"):
         DataArray being viewed with hyperslicer
     is_color_image : bool, default False
         Whether the individual images of the hyperstack are color images.
-    timeunit : str, default "m"
-        Truncation level for datetime and timedelta axes.
+    timeunit : str, optional
+        Deprecated and ignored. Datetime and timedelta coordinates are kept as they are,
+        so timedelta slider values are ``np.timedelta64`` rather than ints. They are
+        truncated when they are shown instead, see `get_hs_fmts`.
 
     Returns
     -------
@@ -47,11 +141,19 @@ def get_hs_axes(xarr, is_color_image=False, timeunit="m"):
         axes kwarg for hyperslicer
 
     """
+    if timeunit is not None:
+        warnings.warn(
+            "The timeunit argument of get_hs_axes is deprecated and has no effect."
+            " Coordinates are no longer truncated, pass timeunit to get_hs_fmts to"
+            " change how they are shown.",
+            mpl_interactions_DeprecationWarning,
+            stacklevel=2,
+        )
     if not is_color_image:
         dims = xarr.dims[:-2]
     else:
         dims = xarr.dims[:-3]
-    coords_list = [choose_datetime_nonsense(xarr.coords[d].values, timeunit=timeunit) for d in dims]
+    coords_list = [xarr[d].values for d in dims]
     axes = zip(dims, coords_list)
     return list(axes)
 
@@ -94,7 +196,7 @@ def get_hs_extent(xarr, is_color_image=False, origin="upper"):
     return extent
 
 
-def get_hs_fmts(xarr, units=None, is_color_image=False):
+def get_hs_fmts(xarr, units=None, is_color_image=False, timeunit="m"):
     """Get appropriate slider format strings from xarray coordinates.
 
     Parameters
@@ -106,6 +208,8 @@ def get_hs_fmts(xarr, units=None, is_color_image=False):
         as number of non-image dimensions in xarray.
     is_color_image : bool, default False
         Whether the individual images of the hyperstack are color images.
+    timeunit : str, default "m"
+        Truncation level for datetime and timedelta axes, see `CoordFormat`.
 
     Returns
     -------
@@ -118,7 +222,11 @@ def get_hs_fmts(xarr, units=None, is_color_image=False):
         dims = xarr.dims[:-3]
     fmt_strs = {}
     for i, d in enumerate(dims):
-        fmt_strs[d] = choose_fmt_str(xarr[d].dtype)
+        dtype = xarr[d].dtype
+        if np.issubdtype(dtype, "datetime64") or np.issubdtype(dtype, "timedelta64"):
+            fmt_strs[d] = CoordFormat(timeunit)
+        else:
+            fmt_strs[d] = choose_fmt_str(dtype)
         if units is not None and units[i] is not None:
             try:
                 fmt_strs[d] += f" {units[i]}"
@@ -1,4 +1,11 @@
+import time
+
+from matplotlib.backend_bases import TimerBase
+
 __all__ = [
+    "ManualTimer",
+    "ReadRecorder",
+    "fire_until",
     "set_param_values",
 ]
 
@@ -16,3 +23,42 @@ def set_param_values(controls, params):
                     obj.value = v
         else:
             slider.set_val(v)
+
+
+class ReadRecorder:
+    """Like an h5py dataset, indexing reads from "disk" and there is no squeeze."""
+
+    def __init__(self, arr):
+        self.arr = arr
+        self.shape = arr.shape
+        self.ndim = arr.ndim
+        self.dtype = arr.dtype
+        self.reads = []
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return self.arr[key]
+
+    def __array__(self, dtype=None, copy=None):
+        raise AssertionError("the whole array was loaded")
+
+
+class ManualTimer(TimerBase):
+    """A timer that only fires when told to, like one with an event loop."""
+
+    running = False
+
+    def _timer_start(self):
+        self.running = True
+
+    def _timer_stop(self):
+        self.running = False
+
+
+def fire_until(timer, done):
+    for _ in range(200):
+        timer._on_timer()
+        if done():
+            return
+        time.sleep(0.01)
+    raise TimeoutError
@@ -0,0 +1,20 @@
+import pytest
+
+from ._util import ManualTimer
+
+
+@pytest.fixture
+def manual_timers(monkeypatch):
+    """Make a figure's timers `ManualTimer`, returns the list they are collected in."""
+
+    def patch(fig):
+        timers = []
+
+        def new_timer(*args, **kwargs):
+            timers.append(ManualTimer(*args, **kwargs))
+            return timers[-1]
+
+        monkeypatch.setattr(fig.canvas, "new_timer", new_timer)
+        return timers
+
+    return patch
@@ -0,0 +1,185 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+import mpl_interactions.ipyplot as iplt
+from mpl_interactions.caching import (
+    CompressedLRUCache,
+    LRUCache,
+    SharedResultCache,
+    fingerprint,
+    function_fingerprint,
+)
+from mpl_interactions.controller import Controls
+
+
+def test_lru():
+    cache = LRUCache(2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"]
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    cache = LRUCache(None, max_bytes=100)
+    cache["a"] = np.zeros(5)
+    cache["b"] = np.zeros(5)
+    assert cache.nbytes == 80
+    cache["a"] = np.zeros(10)
+    assert list(cache) == ["a"]
+    assert cache.nbytes == 80
+    cache["c"] = "not an array"
+    assert list(cache) == ["a", "c"]
+
+
+def test_fingerprint():
+    assert fingerprint({"a": np.arange(3), "b": (1, 2)}) == fingerprint(
+        {"b": (1, 2), "a": np.arange(3)}
+    )
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(3.0))
+    hash(fingerprint({"a": [1, {"b": np.float64(2)}]}))
+
+    # arrays are keyed by a digest of their contents, computed once per array
+    x = np.linspace(0, 1, 100_000)
+    fp = fingerprint(x)
+    assert len(fp[-1]) == 16
+    assert fingerprint(x) is fp
+    assert fingerprint(x[::2]) == fingerprint(x[::2].copy()) != fingerprint(x[1::2])
+
+
+def make_f(scale):
+    def f(x, tau):
+        return np.sin(x * tau) * scale
+
+    return f
+
+
+def test_function_fingerprint():
+    assert function_fingerprint(make_f(1)) == function_fingerprint(make_f(1))
+    assert function_fingerprint(make_f(1)) != function_fingerprint(make_f(2))
+    assert function_fingerprint(np.sin) is np.sin
+
+
+def test_function_fingerprint_globals():
+    # as if running notebook cells
+    ns = {"np": np}
+    exec("def f(x, a):\n    return np.sin(x * a)", ns)
+    sin_fp = function_fingerprint(ns["f"])
+    exec("def f(x, a):\n    return np.cos(x * a)", ns)
+    assert function_fingerprint(ns["f"]) != sin_fp
+
+    # only a function that f calls changes
+    exec("def g(x):\n    return x * 2\ndef f(x):\n    return g(x)", ns)
+    fp = function_fingerprint(ns["f"])
+    exec("def g(x):\n    return x * 3\ndef f(x):\n    return g(x)", ns)
+    assert function_fingerprint(ns["f"]) != fp
+    exec("def g(x):\n    return x * 2\ndef f(x):\n    return g(x)", ns)
+    assert function_fingerprint(ns["f"]) == fp
+
+    # recursion
+    exec("def h(n):\n    return 1 if n < 2 else n * h(n - 1)", ns)
+    hash(function_fingerprint(ns["h"]))
+
+
+class _Calls(list):
+    """Hashable by identity, functions that read unhashable objects are not shared."""
+
+    __hash__ = object.__hash__
+
+
+# a global rather than in the closure as the closure is part of the fingerprint
+calls = _Calls()
+
+
+def test_shared_cache():
+    shared = SharedResultCache()
+    x = np.linspace(0, np.pi, 50)
+
+    def build():
+        def f(x, tau):
+            calls.append(tau)
+            return np.sin(x * tau)
+
+        fig = Figure()
+        ax = fig.add_subplot()
+        ctrls = Controls(backend="headless", shared_cache=shared, tau=np.linspace(1, 10, 10))
+        iplt.plot(x, f, ax=ax, controls=ctrls)
+        return ax, ctrls
+
+    (_, ctrls1), (ax2, ctrls2) = build(), build()
+    calls.clear()
+    ctrls1.set_params(tau=5)
+    ctrls2.set_params(tau=5)
+    assert calls == [5]
+    np.testing.assert_allclose(ax2.lines[0].get_ydata(), np.sin(x * 5))
+
+    # quotas are per Controls
+    ctrls1.shared_cache_quota = 2
+    for tau in [2, 3, 4]:
+        ctrls1.set_params(tau=tau)
+    assert shared.count(ctrls1._cache_owner) == 2
+    assert shared.count(ctrls2._cache_owner) == 0
+    calls.clear()
+    ctrls2.set_params(tau=4)
+    ctrls2.set_params(tau=2)
+    assert calls == [2]
+
+
+def test_shared_cache_identity_fingerprint():
+    shared = SharedResultCache()
+    x = np.linspace(0, np.pi, 50)
+    seen = []
+
+    def build():
+        # the same code reading a different list each time
+        log = []
+
+        def f(x, tau):
+            log.append(tau)
+            seen.append(tau)
+            return np.sin(x * tau)
+
+        ctrls = Controls(backend="headless", shared_cache=shared, tau=np.linspace(1, 10, 10))
+        iplt.plot(x, f, ax=Figure().add_subplot(), controls=ctrls)
+        return ctrls
+
+    ctrls1, ctrls2 = build(), build()
+    seen.clear()
+    ctrls1.set_params(tau=5)
+    ctrls2.set_params(tau=5)
+    # the lists are only known by their id which could be reused, so nothing is shared
+    assert seen == [5, 5]
+    assert len(shared) == 0
+
+
+def test_compressed_lru():
+    cache = CompressedLRUCache(2, codec="zlib")
+    frame = np.zeros((64, 64), dtype=np.uint16)
+    frame[10:20] = 7
+    cache["a"] = frame
+    out = cache["a"]
+    np.testing.assert_array_equal(out, frame)
+    assert out.dtype == frame.dtype
+    assert cache.nbytes < frame.nbytes / 10
+
+
+def test_shared_cache_positional_inputs():
+    shared = SharedResultCache()
+
+    def f(x, tau):
+        return x * tau
+
+    def build(x):
+        fig = Figure()
+        ax = fig.add_subplot()
+        ctrls = Controls(backend="headless", shared_cache=shared, tau=np.linspace(1, 10, 10))
+        iplt.plot(x, f, ax=ax, controls=ctrls)
+        return ax, ctrls
+
+    (ax1, ctrls1), (ax2, ctrls2) = build(np.linspace(0, 1, 5)), build(np.linspace(0, 100, 5))
+    ctrls1.set_params(tau=5)
+    ctrls2.set_params(tau=5)
+    np.testing.assert_allclose(ax1.lines[0].get_ydata(), np.linspace(0, 5, 5))
+    np.testing.assert_allclose(ax2.lines[0].get_ydata(), np.linspace(0, 500, 5))
+    assert ctrls1._cache_owner != ctrls2._cache_owner
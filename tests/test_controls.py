@@ -3,6 +3,7 @@ from pathlib import Path
 import ipywidgets as widgets
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.figure import Figure
 from matplotlib.widgets import Slider
 
 import mpl_interactions.ipyplot as iplt
@@ -69,3 +70,95 @@ def test_scalar_inside_context():
     # this shouldn't fail
     with ctrls:
         _ = iplt.scatter(x2, y2, s=ctrls["s"], ax=ax)
+
+
+def test_deferred_mpl_controls():
+    n_figs = len(plt.get_fignums())
+    ctrls = Controls(use_ipywidgets=False, tau=(0, 10), beta=np.linspace(0, 1, 11), c={"a", "b"})
+    # no figure until the widgets are needed
+    assert len(plt.get_fignums()) == n_figs
+
+    calls = []
+    ctrls.register_callback(lambda tau, beta: calls.append((tau, beta)), ["tau", "beta"])
+    ctrls.set_params(tau=5, beta=0.52)
+    # only called once for both params and snapped to the slider values
+    assert calls == [(5, 0.5)]
+    assert ctrls.params["beta"] == 0.5
+    assert len(plt.get_fignums()) == n_figs
+
+    # the widgets are created in the current state
+    assert ctrls.controls["tau"].val == 5
+    assert ctrls.controls["beta"].val == 5
+    assert len(plt.get_fignums()) == n_figs + 1
+    assert calls == [(5, 0.5)]
+    ctrls.set_params(beta=0.1)
+    assert ctrls.controls["beta"].val == 1
+    assert calls == [(5, 0.5), (5, 0.1)]
+    for fig in ctrls.control_figures:
+        plt.close(fig)
+
+
+def test_set_params_ipywidgets():
+    ctrls = Controls(use_ipywidgets=True, tau=(0, 10), r=("r", 0, 1, 11), c={"a", "b", "c"})
+    ctrls.set_params(tau=ctrls.params["tau"] + 0.3, r=(0.2, 0.5), c="c")
+    assert ctrls.params["c"] == "c"
+    np.testing.assert_allclose(ctrls.params["r"], [0.2, 0.5])
+    assert ctrls.controls["r"].children[0].value == (2, 5)
+    assert ctrls.controls["c"].value == "c"
+
+
+def test_headless_controls(tmp_path: Path):
+    fig = Figure()
+    ax = fig.add_subplot()
+    ctrls = Controls(backend="headless", tau=(1, 10), beta=np.linspace(1, 2, 5))
+    x = np.linspace(0, np.pi, 100)
+
+    def f(x, tau, beta):
+        return np.sin(x * tau) * beta
+
+    iplt.plot(x, f, ax=ax, controls=ctrls)
+    n_draws = []
+    fig.canvas.mpl_connect("draw_event", n_draws.append)
+    ctrls.set_params(tau=3, beta=1.5)
+    np.testing.assert_allclose(ax.lines[0].get_ydata(), f(x, 3, 1.5))
+    assert ctrls.controls == {}
+    assert ctrls.control_figures == []
+    # only drawn when saved
+    assert n_draws == []
+    ctrls.save_animation(str(tmp_path / "headless.gif"), fig, "beta")
+    assert (tmp_path / "headless.gif").exists()
+
+
+def test_render():
+    fig = Figure(figsize=(2, 2), dpi=50)
+    ax = fig.add_subplot()
+    ctrls = Controls(backend="headless", tau=np.linspace(1, 10, 10), render_cache_size=2)
+    x = np.linspace(0, np.pi, 100)
+    n_calls = []
+
+    def f(x, tau):
+        n_calls.append(tau)
+        return np.sin(x * tau)
+
+    iplt.plot(x, f, ax=ax, controls=ctrls)
+    n_calls.clear()
+
+    png = ctrls.render(fig, {"tau": 5})
+    assert png.startswith(b"\x89PNG")
+    assert ctrls.params["tau"] == 5
+    rgba = ctrls.render(fig, {"tau": 5}, format="rgba")
+    w, h = fig.canvas.get_width_height()
+    assert len(rgba) == w * h * 4
+    assert n_calls == [5]
+
+    # snapped to the same slider value so no new render
+    assert ctrls.render(fig, {"tau": 5.1}) is png
+    assert n_calls == [5]
+    assert ctrls.render(fig, {"tau": 2}) != png
+    assert ctrls.params["tau"] == 2
+    # the rgba frame was the least recently used so was evicted
+    assert len(ctrls.render_cache) == 2
+    ctrls.render(fig, {"tau": 5})
+    assert n_calls == [5, 2]
+    assert len(ctrls.render(fig, {"tau": 5}, format="rgba")) == len(rgba)
+    assert n_calls == [5, 2, 5]
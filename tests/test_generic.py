@@ -4,9 +4,12 @@ from os.path import dirname, realpath
 import matplotlib.pyplot as plt
 import numpy as np
 import PIL
+import pytest
 import xarray as xr
 
+from mpl_interactions.deprecations import mpl_interactions_DeprecationWarning
 from mpl_interactions.generic import heatmap_slicer, hyperslicer, image_segmenter
+from mpl_interactions.xarray_helpers import CoordFormat, get_hs_axes, get_hs_fmts
 
 
 # just smoketests here. hadn't set image comparison styling properly
@@ -70,3 +73,51 @@ def test_duplicate_axis_names():
 
     with hyperslicer(img_stack):
         hyperslicer(img_stack)
+
+
+def test_xarray_isel_and_lazy_formats(monkeypatch):
+    times = np.arange("2020-01-01", "2020-01-05", dtype="datetime64[D]").astype("datetime64[ns]")
+    data = np.random.rand(4, 3, 10, 10)
+    arr = xr.DataArray(
+        data, dims=("time", "z", "y", "x"), coords={"time": times, "z": [0.5, 1.5, 2.5]}
+    )
+    calls = []
+    isel = xr.DataArray.isel
+
+    def recording_isel(self, indexers=None, **kwargs):
+        calls.append(indexers)
+        return isel(self, indexers, **kwargs)
+
+    monkeypatch.setattr(xr.DataArray, "isel", recording_isel)
+    fig, ax = plt.subplots()
+    controls = hyperslicer(arr, ax=ax, display_controls=False)
+    controls.set_params(time=times[2], z=1.5)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[2, 1])
+    assert calls[-1] == {"time": 2, "z": 1}
+    # the coordinates are not converted, only their formatting is truncated
+    assert controls.params["time"] == times[2]
+    plt.close(fig)
+
+    fmts = get_hs_fmts(arr, units=[None, "um"])
+    assert fmts["time"].format(times[1]) == "2020-01-02T00:00"
+    assert fmts["z"] == "{:0.2f} um"
+    assert CoordFormat("m", " min").format(np.timedelta64(150, "s")) == "2 min"
+
+
+def test_get_hs_axes_timeunit():
+    deltas = np.arange(3) * np.timedelta64(90, "s")
+    arr = xr.DataArray(np.zeros((3, 4, 4)), dims=("t", "y", "x"), coords={"t": deltas})
+    ((name, values),) = get_hs_axes(arr)
+    assert name == "t"
+    np.testing.assert_array_equal(values, deltas)
+    with pytest.warns(mpl_interactions_DeprecationWarning, match="timeunit"):
+        get_hs_axes(arr, timeunit="s")
+
+
+def test_hyperslicer_positional_ax():
+    # new arguments go after the existing ones so positional calls still work
+    data = np.random.rand(3, 8, 8)
+    fig, ax = plt.subplots()
+    hyperslicer(data, None, None, None, None, True, ax)
+    assert len(ax.images) == 1
+    plt.close(fig)
@@ -0,0 +1,81 @@
+import importlib
+import json
+import subprocess
+import sys
+
+import pytest
+
+import mpl_interactions
+
+HEAVY_MODULES = [
+    "IPython",
+    "ipywidgets",
+    "matplotlib.animation",
+    "matplotlib.pyplot",
+    "matplotlib.widgets",
+]
+
+
+@pytest.mark.parametrize(
+    "statement, submodules",
+    [
+        ("import mpl_interactions", []),
+        ("from mpl_interactions import nearest_idx", ["deprecations", "utils"]),
+        (
+            "from mpl_interactions.controller import Controls",
+            ["caching", "controller", "helpers"],
+        ),
+    ],
+)
+def test_import_is_lazy(statement, submodules):
+    # run in a fresh interpreter as the test session has already imported everything
+    code = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    modules = set(json.loads(out.stdout))
+    heavy = [m for m in HEAVY_MODULES if m in modules]
+    assert heavy == [], f"{statement!r} imported {heavy}"
+    imported = {
+        m.split(".", 1)[1]
+        for m in modules
+        if m.startswith("mpl_interactions.") and m != "mpl_interactions._version"
+    }
+    assert imported == set(submodules)
+    if not submodules:
+        # nothing is needed until a name is used
+        assert "numpy" not in modules and "matplotlib" not in modules
+
+
+def _import_time(statement, repeat=3):
+    # the best of a few fresh interpreters, the test session has already imported everything
+    code = (
+        f"import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)"
+    )
+    return min(
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            ).stdout
+        )
+        for _ in range(repeat)
+    )
+
+
+def test_import_time():
+    # importing everything is what import mpl_interactions used to cost
+    eager = _import_time("import mpl_interactions.pyplot, mpl_interactions.generic")
+    for statement in [
+        "import mpl_interactions",
+        "from mpl_interactions import nearest_idx",
+        "from mpl_interactions.controller import Controls",
+    ]:
+        lazy = _import_time(statement)
+        print(f"{statement!r} took {lazy:.3f}s, importing everything took {eager:.3f}s")
+        assert lazy < eager / 2
+
+
+def test_lazy_names_match_all():
+    for module_name, names in mpl_interactions._lazy_submodules.items():
+        module = importlib.import_module(f"mpl_interactions.{module_name}")
+        assert names == module.__all__
+        for name in names:
+            assert getattr(mpl_interactions, name) is getattr(module, name)
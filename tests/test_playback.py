@@ -0,0 +1,116 @@
+import threading
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import mpl_interactions.ipyplot as iplt
+from mpl_interactions import Player, hyperslicer
+from mpl_interactions.controller import Controls
+
+from ._util import ReadRecorder
+
+
+def test_player_drops_frames():
+    data = np.random.rand(10, 8, 8)
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(data, ax=ax, slice_cache_size=4)
+    player = Player(ctrls, "axis0", fps=10)
+    assert player.step(now=0.0)
+    assert not player.step(now=0.05)
+    for t in [0.1, 0.2, 0.3]:
+        assert player.step(now=t)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[3])
+    assert player.dropped_frames == 0
+    assert abs(player.achieved_fps - 10) < 1e-6
+    # a slow frame - skip ahead to where we should be
+    assert player.step(now=0.75)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[7])
+    assert player.dropped_frames == 3
+    # loops around
+    player.step(now=1.2)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[2])
+    plt.close(fig)
+    for fig in ctrls.control_figures:
+        plt.close(fig)
+
+
+def test_player_reads_ahead():
+    data = ReadRecorder(np.random.rand(10, 8, 8))
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(data, ax=ax, read_ahead=0)
+    player = Player(ctrls, "axis0", fps=10, read_ahead=3)
+    player.step(now=0)
+    ctrls.set_params(axis0=3)
+    # 1, 2 and 3 were loaded in the background by the first step
+    assert sorted(r[0] for r in data.reads) == [0, 1, 2, 3]
+    plt.close(fig)
+    for fig in ctrls.control_figures:
+        plt.close(fig)
+
+
+def test_player_no_loop_and_prefetch():
+    x = np.linspace(0, 1, 10)
+    seen = []
+    done = threading.Event()
+
+    def prefetch(tau, **kwargs):
+        seen.append(tau)
+        if len(seen) == 2:
+            done.set()
+
+    fig, ax = plt.subplots()
+    ctrls = Controls(tau=np.arange(5))
+    iplt.plot(x, lambda x, tau: x * tau, ax=ax, controls=ctrls)
+    player = Player(ctrls, "tau", fps=1, loop=False, prefetch=prefetch)
+    player.step(now=0)
+    assert done.wait(5)
+    assert sorted(seen) == [1, 2]
+    player.step(now=100)
+    assert ctrls.params["tau"] == 4
+    assert not player.step(now=200)
+    plt.close(fig)
+    for fig in ctrls.control_figures:
+        plt.close(fig)
+
+
+def test_play_buttons(manual_timers):
+    widgets = pytest.importorskip("ipywidgets")
+    x = np.linspace(0, 1, 10)
+    fig, ax = plt.subplots()
+    timers = manual_timers(fig)
+    ctrls = Controls(play_buttons=True, use_ipywidgets=True, tau=np.arange(5))
+    iplt.plot(x, lambda x, tau: x * tau, ax=ax, controls=ctrls)
+    box = ctrls._controls["tau"]
+    (button,) = (w for w in box.children if isinstance(w, widgets.ToggleButton))
+    (slider,) = (w for w in box.children if isinstance(w, widgets.IntSlider))
+    button.value = True
+    player = ctrls._players["tau"]
+    assert timers == [player.timer]
+    assert player.timer.running
+    player.step(now=0)
+    player.step(now=0.25)
+    assert ctrls.params["tau"] == 2
+    assert slider.value == 2
+    np.testing.assert_allclose(ax.lines[0].get_ydata(), x * 2)
+    button.value = False
+    assert not player.timer.running
+    # starts again from where it was paused
+    button.value = True
+    assert ctrls._players["tau"] is player
+    player.step(now=10)
+    player.step(now=10.15)
+    assert ctrls.params["tau"] == 3
+    plt.close(fig)
+
+
+def test_player_continuous_headless():
+    ctrls = Controls(backend="headless", tau=(1.5, 10))
+    fig = plt.figure()
+    # no figure uses tau, the timer comes from the current figure
+    player = Player(ctrls, "tau", fps=10)
+    assert player.step(now=0)
+    assert ctrls.params["tau"] == 1.5
+    assert player.step(now=0.5)
+    np.testing.assert_allclose(ctrls.params["tau"], np.linspace(1.5, 10, 100)[5])
+    plt.close(fig)
@@ -0,0 +1,72 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+import mpl_interactions.ipyplot as iplt
+from mpl_interactions import FigurePool
+from mpl_interactions.controller import Controls, _controls_stack
+
+x = np.linspace(0, np.pi, 100)
+
+
+def f(x, tau):
+    return np.sin(x * tau)
+
+
+def build():
+    fig = Figure(figsize=(2, 2), dpi=50)
+    ax = fig.add_subplot()
+    ctrls = Controls(backend="headless", tau=np.linspace(1, 10, 10))
+    iplt.plot(x, f, ax=ax, controls=ctrls)
+    ax.set_ylim(-1, 1)
+    return fig, ctrls
+
+
+def test_pool_render_threads():
+    pool = FigurePool(build, size=3)
+    taus = [1, 2, 3, 4, 5, 6] * 3
+    with ThreadPoolExecutor(6) as ex:
+        frames = list(ex.map(lambda tau: pool.render({"tau": tau}, format="rgba"), taus))
+    assert len(pool) <= 3
+
+    fig, ctrls = build()
+    for tau, frame in zip(taus, frames):
+        assert frame == ctrls.render(fig, {"tau": tau}, format="rgba")
+
+
+def test_pool_checkout():
+    pool = FigurePool(build, size=1)
+    with pool.checkout() as (fig, ctrls):
+        assert isinstance(fig, Figure)
+        with pytest.raises(queue.Empty):
+            with pool.checkout(timeout=0.01):
+                pass
+    pool.fill()
+    assert len(pool) == 1
+    with pool.checkout() as (fig2, _):
+        assert fig2 is fig
+
+
+def test_controls_context_per_thread():
+    ctrls = Controls(backend="headless", tau=(0, 1))
+    barrier = threading.Barrier(2)
+    seen = []
+
+    def use():
+        with ctrls:
+            barrier.wait()
+            seen.append(len(_controls_stack.get()))
+            barrier.wait()
+        seen.append(len(_controls_stack.get()))
+
+    threads = [threading.Thread(target=use) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == [1, 1, 0, 0]
+    assert _controls_stack.get() == ()
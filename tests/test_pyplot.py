@@ -1,3 +1,6 @@
+import gc
+import weakref
+
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import __version__ as mpl_version
@@ -7,7 +10,7 @@ from packaging import version
 import mpl_interactions.ipyplot as iplt
 from mpl_interactions.pyplot import interactive_plot
 
-from ._util import set_param_values
+from ._util import ReadRecorder, set_param_values
 
 np.random.seed(1111111121)
 
@@ -103,3 +106,404 @@ def test_title():
     iplt.title("E={E:.2e}", controls=ctrls)
     assert ax.get_title() == expected
     plt.close()
+
+
+def test_keyed_plot_reuse():
+    fig, ax = plt.subplots()
+    ctrls = iplt.plot(x, f1, tau=tau, beta=beta, key="test-keyed")
+    line = ax.lines[0]
+
+    def f3(x, tau, beta):
+        return np.cos(x * tau) * beta
+
+    ctrls2 = iplt.plot(x, f3, tau=tau, beta=beta, key="test-keyed", color="red")
+    assert ctrls2 is ctrls
+    assert list(ax.lines) == [line]
+    np.testing.assert_allclose(line.get_ydata(), f3(x, **ctrls.params))
+    assert line.get_color() == "red"
+
+    # the new function will be used for future updates
+    set_param_values(ctrls, {"beta": 1.5})
+    np.testing.assert_allclose(line.get_ydata(), f3(x, **ctrls.params))
+
+    # new limits are applied when reusing
+    iplt.plot(x, f3, tau=tau, beta=beta, key="test-keyed", ylim=(-5, 5))
+    assert ax.get_ylim() == (-5, 5)
+    set_param_values(ctrls, {"beta": 2})
+    assert ax.get_ylim() == (-5, 5)
+
+    # different controls start over on the same axes
+    ctrls3 = iplt.plot(x, lambda x, tau: x * tau, tau=tau, key="test-keyed")
+    assert ctrls3 is not ctrls
+    assert len(ax.lines) == 1 and ax.lines[0] is not line
+    # and the old lines are no longer updated by the old controls
+    assert ctrls._update_funcs["tau"] == []
+    plt.close(fig)
+    for fig in [*ctrls.control_figures, *ctrls3.control_figures]:
+        plt.close(fig)
+
+
+def test_keyed_plot_closed_figure():
+    import mpl_interactions.pyplot as pyplot
+
+    fig, ax = plt.subplots()
+    ctrls = iplt.plot(x, f1, tau=tau, beta=beta, key="test-closed")
+    plt.close(fig)
+    # the closed figure isn't updated again, a new one is made
+    fig2, ax2 = plt.subplots()
+    ctrls2 = iplt.plot(x, f1, tau=tau, beta=beta, key="test-closed")
+    assert ctrls2 is not ctrls
+    assert len(ax.lines) == 0 and len(ax2.lines) == 1
+    assert pyplot._keyed_plots["test-closed"]() is fig2
+
+    # the closed figure isn't kept alive
+    ref = weakref.ref(fig)
+    for f in ctrls.control_figures:
+        plt.close(f)
+    del fig, ax, ctrls
+    gc.collect()
+    assert ref() is None
+
+    plt.close(fig2)
+    for f in ctrls2.control_figures:
+        plt.close(f)
+    del fig2, ax2, ctrls2
+    gc.collect()
+    assert pyplot._get_keyed_plot("test-closed") is None
+    assert "test-closed" not in pyplot._keyed_plots
+
+
+def test_imshow_sample_cmap():
+    fig, ax = plt.subplots()
+
+    def f(scale):
+        img = np.linspace(0, 1, 100 * 100).reshape(100, 100) * scale
+        img[0, 0] = 1000  # outlier that shouldn't affect the limits
+        return img
+
+    ctrls = iplt.imshow(f, scale=(1, 10, 10), autoscale_cmap="sample", cmap_percentiles=(0, 90))
+    vmin, vmax = ax.images[0].get_clim()
+    assert vmin < 0.01 and 0.8 < vmax < 1
+    ctrls.set_params(scale=10)
+    vmin, vmax = ax.images[0].get_clim()
+    assert vmin < 0.1 and 8 < vmax < 10
+    plt.close(fig)
+    for fig in ctrls.control_figures:
+        plt.close(fig)
+
+
+def test_hist_cache_edges():
+    data = np.random.randn(1000)
+
+    def f(loc, scale):
+        # clipped so the range stays the same
+        return np.clip(data * 5 * scale + loc, -3, 3)
+
+    fig, ax = plt.subplots()
+    controls = iplt.hist(f, bins=30, cache_edges=True, loc=(-1, 1), scale=(0.5, 1), ax=ax)
+    path = ax.collections[0].get_paths()[0]
+    edges = np.histogram_bin_edges(f(-1, 0.5), 30)
+    heights = path.vertices[1::5, 1]
+    np.testing.assert_array_equal(heights, np.histogram(f(-1, 0.5), edges)[0])
+
+    # the range is the same so the edges and the path are reused
+    controls.set_params(scale=0.75)
+    assert ax.collections[0].get_paths()[0] is path
+    np.testing.assert_array_equal(path.vertices[::5, 0], edges[:-1])
+    np.testing.assert_array_equal(path.vertices[1::5, 1], np.histogram(f(-1, 0.75), edges)[0])
+    plt.close(fig)
+
+
+def test_hist_cache_edges_nan(monkeypatch):
+    data = np.random.randn(1000)
+    data[::10] = np.nan
+    real_edges = np.histogram_bin_edges
+    calls = []
+
+    def histogram_bin_edges(*args, **kwargs):
+        calls.append(kwargs)
+        return real_edges(*args, **kwargs)
+
+    monkeypatch.setattr(np, "histogram_bin_edges", histogram_bin_edges)
+
+    def f(scale):
+        # clipped so the range stays the same
+        return np.clip(data * 50 * scale, -3, 3)
+
+    fig, ax = plt.subplots()
+    controls = iplt.hist(f, bins=30, cache_edges=True, scale=(0.5, 1), ax=ax)
+    path = ax.collections[0].get_paths()[0]
+    edges = real_edges([-3, 3], 30)
+    np.testing.assert_allclose(path.vertices[::5, 0], edges[:-1])
+    np.testing.assert_array_equal(path.vertices[1::5, 1], np.histogram(f(0.5), edges)[0])
+    assert len(calls) == 1
+
+    # the NaNs don't make the edges be worked out again
+    controls.set_params(scale=0.75)
+    assert len(calls) == 1
+    assert ax.collections[0].get_paths()[0] is path
+    np.testing.assert_array_equal(path.vertices[1::5, 1], np.histogram(f(0.75), edges)[0])
+    plt.close(fig)
+
+    # nor does data that is all NaN
+    fig, ax = plt.subplots()
+    controls = iplt.hist(lambda x: np.full(10, np.nan), bins=5, cache_edges=True, x=(0, 1), ax=ax)
+    controls.set_params(x=1)
+    assert len(calls) == 2
+    np.testing.assert_array_equal(ax.collections[0].get_paths()[0].vertices[1::5, 1], 0)
+    plt.close(fig)
+
+
+def test_hist_cache_edges_one_bin():
+    def f(loc):
+        return np.arange(10.0) + loc
+
+    fig, ax = plt.subplots()
+    controls = iplt.hist(f, bins=1, cache_edges=True, loc=(0, 1), ax=ax)
+    path = ax.collections[0].get_paths()[0]
+    np.testing.assert_array_equal(path.vertices[::5, 0], [0])
+    np.testing.assert_array_equal(path.vertices[1::5, 1], [10])
+    controls.set_params(loc=1)
+    path = ax.collections[0].get_paths()[0]
+    np.testing.assert_array_equal(path.vertices[::5, 0], [1])
+    np.testing.assert_array_equal(path.vertices[2::5, 0], [10])
+    np.testing.assert_array_equal(path.vertices[1::5, 1], [10])
+    plt.close(fig)
+
+
+def test_hist_positional_ax():
+    # the arguments added to hist come after the ones it always had
+    fig, ax = plt.subplots()
+    iplt.hist(np.arange(10), False, 5, None, ax)
+    assert len(ax.collections) == 1
+    np.testing.assert_array_equal(ax.collections[0].get_paths()[0].vertices[1::5, 1], 2)
+    plt.close(fig)
+
+
+def test_hist_chunks(tmp_path):
+    data = np.random.randn(10_000)
+    mm = np.memmap(tmp_path / "data.bin", dtype=data.dtype, mode="w+", shape=data.shape)
+    mm[:] = data
+
+    def f(loc):
+        # a generator of chunks
+        return (data[i : i + 1000] + loc for i in range(0, len(data), 1000))
+
+    fig, ax = plt.subplots()
+    controls = iplt.hist(f, bins=20, range=(-4, 5), loc=(0, 1), ax=ax)
+    edges = np.histogram_bin_edges([], 20, range=(-4, 5))
+    heights = ax.collections[0].get_paths()[0].vertices[1::5, 1]
+    np.testing.assert_array_equal(heights, np.histogram(data, edges)[0])
+    controls.set_params(loc=1)
+    heights = ax.collections[0].get_paths()[0].vertices[1::5, 1]
+    np.testing.assert_array_equal(heights, np.histogram(data + 1, edges)[0])
+    plt.close(fig)
+
+    # out of memory arrays are read in chunks, with a pass for the range
+    fig, ax = plt.subplots()
+    iplt.hist(mm, bins=20, chunk_size=999, density=True, ax=ax)
+    counts, edges = np.histogram(data, 20, density=True)
+    path = ax.collections[0].get_paths()[0]
+    np.testing.assert_allclose(path.vertices[::5, 0], edges[:-1])
+    np.testing.assert_allclose(path.vertices[1::5, 1], counts)
+    plt.close(fig)
+
+    # as are arrays without chunks that aren't in memory, e.g. a contiguous h5py dataset
+    arr = ReadRecorder(data)
+    fig, ax = plt.subplots()
+    iplt.hist(arr, bins=20, chunk_size=2500, ax=ax)
+    counts, edges = np.histogram(data, 20)
+    np.testing.assert_array_equal(ax.collections[0].get_paths()[0].vertices[1::5, 1], counts)
+    # one pass for the range and one for the counts
+    assert len(arr.reads) == 8
+    plt.close(fig)
+
+
+def test_hist2d(monkeypatch):
+    import mpl_interactions.pyplot as pyplot
+
+    x = np.random.randn(5000)
+    noise = np.random.randn(5000)
+    binned = []
+    bin_index = pyplot._bin_index
+    monkeypatch.setattr(
+        pyplot,
+        "_bin_index",
+        lambda values, *args: binned.append(values) or bin_index(values, *args),
+    )
+
+    def f(x, tau):
+        return x * tau + noise
+
+    fig, ax = plt.subplots()
+    controls = iplt.hist2d(x, f, bins=20, range=[(-4, 4), (-5, 5)], tau=(0, 2), ax=ax)
+    im = ax.get_images()[0]
+    expected, xedges, yedges = np.histogram2d(x, f(x, 0), bins=20, range=[(-4, 4), (-5, 5)])
+    np.testing.assert_array_equal(im.get_array(), expected.T)
+    assert len(binned) == 2
+
+    # only y changed so x is not binned again
+    controls.set_params(tau=1)
+    assert len(binned) == 3
+    np.testing.assert_array_equal(im.get_array(), np.histogram2d(x, f(x, 1), [xedges, yedges])[0].T)
+    plt.close(fig)
+
+    # uneven bins with weights are shown on a mesh
+    edges = [-4, -1, 0, 0.5, 4]
+
+    def w(scale):
+        return np.abs(noise) * scale
+
+    fig, ax = plt.subplots()
+    controls = iplt.hist2d(
+        x, noise, bins=[edges, edges], weights=w, density=True, scale=(1, 2), ax=ax
+    )
+    controls.set_params(scale=2)
+    expected = np.histogram2d(x, noise, [edges, edges], weights=w(2), density=True)[0]
+    np.testing.assert_allclose(ax.collections[0].get_array().reshape(4, 4), expected.T)
+    plt.close(fig)
+
+
+def test_plot_datalim_without_relim(monkeypatch):
+    x = np.linspace(0, 1, 100)
+
+    def f(x, tau):
+        y = np.sin(x * tau) + tau
+        y[::10] = np.nan
+        return y
+
+    fig, ax = plt.subplots()
+    ax.plot([-5, -4], [0.5, 2])
+    ax.axhspan(-1, 0.1)
+    controls = iplt.plot(x, f, tau=(1, 10), ylim="auto", ax=ax)
+    fig.canvas.draw()
+
+    relims = []
+    relim = ax.relim
+    monkeypatch.setattr(ax, "relim", lambda *args: relims.append(args) or relim(*args))
+
+    def expected():
+        bbox = ax.dataLim.frozen()
+        minpos = ax.dataLim.minpos.copy()
+        relim()
+        np.testing.assert_allclose(bbox.get_points(), ax.dataLim.get_points())
+        np.testing.assert_allclose(minpos, ax.dataLim.minpos)
+
+    # the rest of the axes is measured once
+    controls.set_params(tau=10)
+    assert len(relims) == 1
+    expected()
+    # nothing else changed since the draw so only the new data is measured
+    controls.set_params(tau=1)
+    assert len(relims) == 1
+    expected()
+
+    # a new artist means the rest of the axes is measured again
+    ax.plot([0, 20], [0, 20])
+    controls.set_params(tau=5)
+    assert len(relims) == 2
+    expected()
+    plt.close(fig)
+
+
+def test_plot_decimate():
+    x = np.linspace(0, 10, 200_000)
+    noise = np.random.randn(len(x))
+
+    def f(x, amp):
+        return np.sin(x) + noise * amp
+
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    controls = iplt.plot(x, f, amp=(0.1, 1), decimate="minmax", ylim="auto", ax=ax)
+    (line,) = ax.get_lines()
+    width = int(ax.bbox.width)
+    assert len(line.get_xdata()) <= 2 * width + 2
+    assert line.get_ydata().max() == f(x, 0.1).max()
+
+    controls.set_params(amp=1)
+    y = f(x, 1)
+    assert line.get_ydata().max() == y.max()
+    assert line.get_ydata().min() == y.min()
+    # the limits are of all of the data
+    assert ax.dataLim.y1 == y.max()
+
+    # zooming in shows the detail of the part in view
+    ax.set_xlim(2, 3)
+    xd, yd = line.get_xdata(), line.get_ydata()
+    assert xd[1] >= 2 and xd[-2] <= 3
+    in_view = (x >= 2) & (x <= 3)
+    assert yd.max() == y[in_view].max()
+    plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    iplt.plot(x, f, amp=(0.1, 1), decimate="lttb", ax=ax)
+    (line,) = ax.get_lines()
+    assert len(line.get_xdata()) == 2 * int(ax.bbox.width)
+    assert line.get_xdata()[0] == x[0] and line.get_xdata()[-1] == x[-1]
+    plt.close(fig)
+
+
+def test_lttb_decimate():
+    from mpl_interactions import lttb_decimate
+
+    x = np.arange(100_003.0)
+    y = np.zeros_like(x)
+    spikes = [5_000, 33_333, 70_001]
+    y[spikes] = [1, -2, 3]
+    xd, yd = lttb_decimate(x, y, 1000)
+    assert len(xd) == 1000
+    assert xd[0] == 0 and xd[-1] == x[-1]
+    assert (np.diff(xd) > 0).all()
+    # the spikes make the largest triangles of their buckets
+    assert set(spikes) <= set(xd)
+    np.testing.assert_array_equal(yd[np.isin(xd, spikes)], [1, -2, 3])
+
+
+def test_plot_decimate_log_axis():
+    x = np.logspace(0, 6, 200_000)
+    noise = np.random.randn(len(x))
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    ax.set_xscale("log")
+    iplt.plot(x, lambda x, amp: noise * amp, amp=(0.1, 1), decimate="minmax", ax=ax)
+    (line,) = ax.get_lines()
+    width = int(ax.bbox.width)
+    xd = line.get_xdata()
+    assert len(xd) <= 2 * width + 2
+    # binned evenly in display space, so each decade gets its share of the columns
+    assert (xd < 10).sum() >= width / 6
+    plt.close(fig)
+
+
+def test_keyed_plot_decimate_change():
+    x = np.linspace(0, 10, 10_000)
+
+    def f(x, amp):
+        return np.sin(x) * amp
+
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    n_callbacks = len(ax.callbacks.callbacks.get("xlim_changed", {}))
+    ctrls = iplt.plot(x, f, amp=(0.1, 1), decimate="minmax", key="decimated", ax=ax)
+    (line,) = ax.get_lines()
+    assert len(line.get_xdata()) < len(x)
+    assert len(ax.callbacks.callbacks["xlim_changed"]) == n_callbacks + 1
+    # turning decimation off starts over, without the old callbacks
+    iplt.plot(x, f, amp=(0.1, 1), decimate=None, key="decimated", ax=ax, controls=ctrls)
+    (new_line,) = ax.get_lines()
+    assert new_line is not line
+    assert len(new_line.get_xdata()) == len(x)
+    assert len(ax.callbacks.callbacks.get("xlim_changed", {})) == n_callbacks
+    ax.set_xlim(2, 3)
+    assert len(new_line.get_xdata()) == len(x)
+    plt.close(fig)
+
+
+def test_imshow_positional_ax():
+    # new arguments go after the existing ones so positional calls still work
+    fig, ax = plt.subplots()
+    ctrls = iplt.imshow(
+        lambda tau: np.ones((4, 4)) * tau, None, None, None, None, True, ax, tau=(1, 2)
+    )
+    assert len(ax.images) == 1
+    plt.close(fig)
+    for fig in ctrls.control_figures:
+        plt.close(fig)
@@ -0,0 +1,57 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from mpl_interactions import hyperslicer
+from mpl_interactions.pyramid import ImagePyramid, PyramidDisplay, block_average
+
+
+def test_block_average():
+    img = np.arange(5 * 4, dtype=np.uint8).reshape(5, 4)
+    out = block_average(img)
+    assert out.shape == (2, 2)
+    assert out.dtype == np.uint8
+    assert out[0, 0] == np.rint(img[:2, :2].mean())
+    rgb = np.random.rand(8, 8, 3)
+    assert block_average(rgb, 4).shape == (2, 2, 3)
+
+    pyramid = ImagePyramid(np.zeros((100, 300)))
+    assert pyramid.max_level == 6
+    assert pyramid.level(10).shape == (1, 4)
+    assert len(pyramid.levels) == 7
+
+
+def test_pyramid_display():
+    img = np.random.rand(2048, 1024)
+    fig, ax = plt.subplots(figsize=(2, 2), dpi=100)
+    im = ax.imshow(img)
+    full_xlim, full_ylim = ax.get_xlim(), ax.get_ylim()
+    display = PyramidDisplay(im)
+    # the axes are ~150 pixels wide, so there can be 4 times fewer columns
+    assert display.level == 2
+    assert im.get_array().shape == (512, 256)
+    # the view doesn't change
+    assert ax.get_xlim() == full_xlim
+    assert ax.get_ylim() == full_ylim
+    np.testing.assert_allclose(im.get_extent(), (-0.5, 1023.5, 2047.5, -0.5))
+
+    # zoom in to a small region: full resolution and only what is visible
+    ax.set_xlim(100, 150)
+    ax.set_ylim(250, 200)
+    assert display.level == 0
+    np.testing.assert_array_equal(im.get_array(), img[200:251, 100:151])
+    left, right, bottom, top = im.get_extent()
+    assert left <= 100 and right >= 150 and top <= 200 and bottom >= 250
+    plt.close(fig)
+
+
+def test_hyperslicer_pyramid():
+    data = np.random.rand(3, 512, 512)
+    fig, ax = plt.subplots(figsize=(1, 1), dpi=100)
+    ctrls = hyperslicer(data, ax=ax, pyramid=True)
+    ctrls.set_params(axis0=2)
+    shape = ax.images[0].get_array().shape
+    assert shape[0] < 512
+    np.testing.assert_allclose(
+        ax.images[0].get_array(), block_average(data[2], 512 // shape[0]), rtol=1e-6
+    )
+    plt.close(fig)
@@ -0,0 +1,528 @@
+import threading
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.backend_bases import MouseEvent
+
+from mpl_interactions import hyperslicer, ortho_slicer, video_slicer
+from mpl_interactions.slicing import (
+    ChunkCache,
+    Projector,
+    RoiTrace,
+    SliceLoader,
+    VideoFrames,
+    robust_limits,
+    sample_limits,
+    squeeze,
+)
+
+from ._util import ReadRecorder, fire_until
+
+
+class LazyArray:
+    """Minimal stand in for a lazy array like dask that records what is computed."""
+
+    def __init__(self, arr, gate=None):
+        self.arr = arr
+        self.gate = gate
+        self.computed = []
+
+    @property
+    def shape(self):
+        return self.arr.shape
+
+    @property
+    def ndim(self):
+        return self.arr.ndim
+
+    def __getitem__(self, key):
+        return _LazySlice(self, key)
+
+    def squeeze(self, axis=None):
+        # like dask, don't load anything to squeeze
+        assert 1 not in self.shape
+        return self
+
+
+class _LazySlice:
+    def __init__(self, parent, key):
+        self.parent = parent
+        self.key = key
+
+    def compute(self):
+        if self.parent.gate is not None:
+            self.parent.gate.wait()
+        self.parent.computed.append(self.key)
+        return self.parent.arr[self.key]
+
+
+def wait_for(loader):
+    for _ in range(200):
+        if loader.poll():
+            return
+        time.sleep(0.01)
+    raise TimeoutError
+
+
+def test_slice_loader_supersedes():
+    gate = threading.Event()
+    arr = LazyArray(np.arange(5 * 4 * 4).reshape(5, 4, 4), gate=gate)
+    loader = SliceLoader(arr, max_workers=1)
+    shown = []
+    assert not loader.request((0,), shown.append)
+    time.sleep(0.05)  # (0,) is now blocked in the worker
+    assert not loader.request((1,), shown.append)
+    assert not loader.request((2,), shown.append)
+    gate.set()
+    wait_for(loader)
+    # the superseded (1,) never started, (0,) did but isn't shown
+    assert len(shown) == 1
+    np.testing.assert_array_equal(shown[0], arr.arr[2])
+    assert sorted(arr.computed) == [(0,), (2,)]
+
+    # now cached so shown immediately without computing
+    assert loader.request((0,), shown.append)
+    assert len(arr.computed) == 2
+    loader.shutdown()
+
+
+def test_hyperslicer_lazy():
+    data = np.random.rand(3, 4, 10, 10)
+    arr = LazyArray(data)
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(arr, ax=ax, asynchronous=True, slice_cache_size=4)
+    # Agg has no event loop so this falls back to loading synchronously
+    ctrls.set_params(axis0=2, axis1=1)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[2, 1])
+    ctrls.set_params(axis0=0, axis1=0)
+    assert arr.computed == [(0, 0), (2, 1)]
+    plt.close(fig)
+
+
+def test_hyperslicer_dask(manual_timers):
+    da = pytest.importorskip("dask.array")
+    data = np.random.rand(4, 3, 10, 10)
+    arr = da.from_array(data, chunks=(1, 1, 10, 10))
+    fig, ax = plt.subplots()
+    timers = manual_timers(fig)
+    # asynchronous by default for dask arrays
+    ctrls = hyperslicer(arr, ax=ax)
+    im = ax.images[0]
+    assert type(im.get_array()) is not da.Array
+    np.testing.assert_array_equal(im.get_array(), data[0, 0])
+
+    ctrls.set_params(axis0=2, axis1=1)
+    # loaded in the background, the previous slice stays until the timer shows it
+    np.testing.assert_array_equal(im.get_array(), data[0, 0])
+    fire_until(timers[0], lambda: np.array_equal(im.get_array(), data[2, 1]))
+    # now in the slice cache so shown straight away
+    ctrls.set_params(axis0=0, axis1=0)
+    ctrls.set_params(axis0=2, axis1=1)
+    np.testing.assert_array_equal(im.get_array(), data[2, 1])
+    plt.close(fig)
+
+
+def test_hyperslicer_dask_xarray(manual_timers):
+    da = pytest.importorskip("dask.array")
+    xr = pytest.importorskip("xarray")
+    data = np.random.rand(5, 8, 6)
+    xarr = xr.DataArray(
+        da.from_array(data, chunks=(1, 8, 6)),
+        dims=("t", "y", "x"),
+        coords={"t": np.arange(5) * 10},
+    )
+    fig, ax = plt.subplots()
+    timers = manual_timers(fig)
+    ctrls = hyperslicer(xarr, ax=ax)
+    im = ax.images[0]
+    ctrls.set_params(t=30)
+    fire_until(timers[0], lambda: np.array_equal(im.get_array(), data[3]))
+    plt.close(fig)
+
+
+def test_squeezed_array():
+    data = np.random.rand(1, 3, 1, 8, 8)
+    arr = ReadRecorder(data)
+    squeezed = squeeze(arr)
+    assert squeezed.shape == (3, 8, 8)
+    np.testing.assert_array_equal(squeezed[2], data[0, 2, 0])
+    assert arr.reads == [(0, 2, 0, slice(None), slice(None))]
+    np.testing.assert_array_equal(squeezed[1, :, 3], data[0, 1, 0, :, 3])
+
+
+def test_hyperslicer_out_of_core(tmp_path):
+    data = np.random.rand(1, 3, 4, 8, 8)
+    arr = ReadRecorder(data)
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(arr, ax=ax)
+    assert arr.reads == [(0, 0, 0, slice(None), slice(None))]
+    ctrls.set_params(axis0=2, axis1=3)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[0, 2, 3])
+    assert len(arr.reads) == 2
+    plt.close(fig)
+
+    mm = np.memmap(tmp_path / "stack.dat", dtype=np.float32, mode="w+", shape=(1, 3, 8, 8))
+    mm[:] = 1
+    # a view of the file rather than a copy
+    assert np.shares_memory(squeeze(mm), mm)
+    fig, ax = plt.subplots()
+    hyperslicer(mm, ax=ax)
+    plt.close(fig)
+
+
+def test_compressed_read_ahead():
+    data = np.random.randint(0, 4, size=(6, 16, 16)).astype(np.uint16)
+    arr = ReadRecorder(data)
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(arr, ax=ax, compress_slices="zlib", read_ahead=2)
+    for i in [1, 2, 3, 4, 5, 0]:
+        ctrls.set_params(axis0=i)
+        np.testing.assert_array_equal(ax.images[0].get_array(), data[i])
+    # every frame is only read once, some of them ahead of being shown
+    assert sorted(r[0] for r in arr.reads) == list(range(6))
+    reads = len(arr.reads)
+    for i in range(6):
+        ctrls.set_params(axis0=i)
+        np.testing.assert_array_equal(ax.images[0].get_array(), data[i])
+    # the second loop comes from the compressed cache
+    assert len(arr.reads) == reads
+    plt.close(fig)
+
+
+def test_robust_limits():
+    rng = np.random.default_rng(0)
+    ints = rng.integers(0, 1000, size=(4, 3, 32, 32)).astype(np.uint16)
+    ints[0, 0, 0, 0] = 60000  # an outlier
+    np.testing.assert_array_equal(
+        robust_limits(ints, (2, 98)), np.percentile(ints, (2, 98), method="inverted_cdf")
+    )
+    per_axis = robust_limits(ReadRecorder(ints), (0, 100), axis=1)
+    np.testing.assert_array_equal(per_axis, np.stack([ints.min((0, 2, 3)), ints.max((0, 2, 3))]).T)
+
+    floats = rng.normal(size=(5, 64, 64))
+    floats[0, 0, 0] = np.nan
+    lims = robust_limits(floats, (2, 98), bins=4096)
+    expected = np.nanpercentile(floats, (2, 98))
+    np.testing.assert_allclose(lims, expected, atol=2 * np.ptp(floats[1:]) / 4096)
+
+    frame = rng.normal(size=(512, 512))
+    np.testing.assert_allclose(sample_limits(frame), np.percentile(frame, (2, 98)), atol=0.1)
+
+
+def test_limits_all_nan():
+    data = np.random.default_rng(0).random((3, 8, 8))
+    data[1] = np.nan
+    np.testing.assert_array_equal(robust_limits(np.full((2, 8, 8), np.nan)), (0, 1))
+    per_axis = robust_limits(data, (0, 100), axis=0)
+    np.testing.assert_array_equal(per_axis[1], (0, 1))
+    np.testing.assert_allclose(per_axis[2], (data[2].min(), data[2].max()), atol=1e-3)
+    np.testing.assert_array_equal(sample_limits(data[1]), (0, 1))
+    np.testing.assert_array_equal(sample_limits(data[1], fallback=(2, 3)), (2, 3))
+
+    # an all NaN slice keeps the previous limits
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(data, ax=ax, autoscale_cmap="sample", cmap_percentiles=(0, 100))
+    clim = ax.images[0].get_clim()
+    assert clim == (data[0].min(), data[0].max())
+    ctrls.set_params(axis0=1)
+    assert ax.images[0].get_clim() == clim
+    plt.close(fig)
+
+
+def test_hyperslicer_robust_cmap():
+    data = np.random.default_rng(0).random((3, 4, 16, 16))
+    data[:, 2] *= 10
+    fig, ax = plt.subplots()
+    hyperslicer(data, ax=ax, autoscale_cmap="global", cmap_percentiles=(0, 100))
+    assert ax.images[0].get_clim() == (data.min(), data.max())
+    plt.close(fig)
+
+    fig, ax = plt.subplots()
+    ctrls = hyperslicer(data, ax=ax, autoscale_cmap="axis1", cmap_percentiles=(0, 100))
+    ctrls.set_params(axis0=1, axis1=2)
+    # accurate to the width of the histogram bins
+    np.testing.assert_allclose(
+        ax.images[0].get_clim(), (data[:, 2].min(), data[:, 2].max()), atol=np.ptp(data) / 4096
+    )
+    plt.close(fig)
+
+
+def test_chunk_cache():
+    data = np.random.rand(2, 10, 12, 14)
+    arr = ReadRecorder(data)
+    cache = ChunkCache(arr, chunks=(4, 5, 6), max_workers=1)
+    np.testing.assert_array_equal(cache.plane(0, 5, (1,)), data[1, 5])
+    np.testing.assert_array_equal(cache.plane(1, 7, (1,)), data[1, :, 7])
+    np.testing.assert_array_equal(cache.plane(2, 13, (1,)), data[1, :, :, 13])
+    n_reads = len(arr.reads)
+    # 3 x 3 blocks for each plane, less the blocks they share
+    assert n_reads == 9 + (9 - 3) + (9 - 5)
+    # the neighbouring planes are in the same blocks
+    np.testing.assert_array_equal(cache.plane(0, 7, (1,)), data[1, 7])
+    np.testing.assert_array_equal(cache.plane(1, 9, (1,)), data[1, :, 9])
+    assert len(arr.reads) == n_reads
+    # another volume
+    np.testing.assert_array_equal(cache.plane(0, 5, (0,)), data[0, 5])
+    assert len(arr.reads) == n_reads + 9
+    # the default cap fits two sets of planes
+    assert cache.cache.max_bytes == 2 * (9 + 9 + 9) * 4 * 5 * 6 * 8
+    assert cache.cache.nbytes <= cache.cache.max_bytes
+
+
+def test_chunk_cache_unchunked():
+    data = np.random.rand(10, 12, 14)
+    # no chunks, like a memmap or a contiguous h5py dataset
+    arr = ReadRecorder(data)
+    cache = ChunkCache(arr, cache_bytes=2200)
+    np.testing.assert_array_equal(cache.plane(2, 13), data[:, :, 13])
+    np.testing.assert_array_equal(cache.plane(1, 7), data[:, 7])
+    # only the planes are read, not whole blocks
+    assert arr.reads == [(slice(None), slice(None), 13), (slice(None), 7, slice(None))]
+    np.testing.assert_array_equal(cache.plane(2, 13), data[:, :, 13])
+    assert len(arr.reads) == 2
+    # capped by size, the least recently used plane is dropped
+    cache.plane(2, 0)
+    assert cache.cache.nbytes <= 2200
+    cache.plane(2, 13)
+    assert len(arr.reads) == 3
+    cache.plane(1, 7)
+    assert len(arr.reads) == 4
+
+
+def test_ortho_slicer():
+    data = np.random.rand(3, 16, 20, 24)
+    arr = ReadRecorder(data)
+    fig = plt.figure()
+    controls = ortho_slicer(arr, fig=fig, chunks=(8, 8, 8), display_controls=False)
+    ax_xy, ax_yz, ax_xz = fig.axes[0], fig.axes[1], fig.axes[2]
+    im_xy, im_xz, im_yz = ax_xy.images[0], ax_xz.images[0], ax_yz.images[0]
+    np.testing.assert_array_equal(im_xy.get_array(), data[0, 0])
+    np.testing.assert_array_equal(im_xz.get_array(), data[0, :, 0])
+    np.testing.assert_array_equal(im_yz.get_array(), data[0, :, :, 0].T)
+
+    controls.set_params(z=10, y=5, x=17)
+    np.testing.assert_array_equal(im_xy.get_array(), data[0, 10])
+    np.testing.assert_array_equal(im_xz.get_array(), data[0, :, 5])
+    np.testing.assert_array_equal(im_yz.get_array(), data[0, :, :, 17].T)
+    assert ax_xy.lines[0].get_xdata()[0] == 17
+    assert ax_xy.lines[1].get_ydata()[0] == 5
+
+    # only the XY plane changes and it comes from blocks already read for the others
+    n_reads = len(arr.reads)
+    xz, yz = im_xz.get_array(), im_yz.get_array()
+    controls.set_params(z=12)
+    np.testing.assert_array_equal(im_xy.get_array(), data[0, 12])
+    assert im_xz.get_array() is xz
+    assert im_yz.get_array() is yz
+    assert len(arr.reads) == n_reads
+
+    controls.set_params(axis0=2)
+    np.testing.assert_array_equal(im_yz.get_array(), data[2, :, :, 17].T)
+    plt.close(fig)
+
+
+def test_projector():
+    data = np.random.rand(3, 20, 6, 6)
+    arr = ReadRecorder(data)
+    for mode, f in [("max", np.max), ("mean", np.mean), ("sum", np.sum)]:
+        proj = Projector(arr, 1, mode, block_size=4)
+        for start, stop in [(0, 19), (3, 17), (5, 6), (8, 11), (2, 2)]:
+            np.testing.assert_allclose(
+                proj[1, (start, stop)], f(data[1, start : stop + 1], axis=0), rtol=1e-12
+            )
+
+    proj = Projector(arr, 1, "max", block_size=4)
+    proj[0, (2, 17)]
+    arr.reads.clear()
+    # moving one end only reads the frames between it and the nearest block
+    proj[0, (2, 14)]
+    assert sorted(arr.reads) == [(0, 12), (0, 13), (0, 14)]
+    arr.reads.clear()
+    proj[0, (2, 18)]
+    assert arr.reads == [(0, 18)]
+
+
+def test_hyperslicer_projection():
+    data = np.random.randint(0, 1000, (2, 12, 8, 8)).astype(np.uint16)
+    fig, ax = plt.subplots()
+    controls = hyperslicer(
+        data, projections={"axis1": "mean"}, projection_block_size=3, ax=ax, display_controls=False
+    )
+    im = ax.images[0]
+    np.testing.assert_allclose(im.get_array(), data[0].mean(axis=0))
+    controls.set_params(axis0=1, axis1=(2, 9))
+    np.testing.assert_allclose(im.get_array(), data[1, 2:10].mean(axis=0))
+    plt.close(fig)
+
+
+def regions(reads):
+    return {(k[2].start, k[2].stop, k[3].start, k[3].stop) for k in reads}
+
+
+def test_roi_trace():
+    data = np.random.rand(2, 50, 20, 30)
+    arr = ReadRecorder(data)
+    tracer = RoiTrace(arr, 1, block_size=16)
+    np.testing.assert_allclose(
+        tracer.trace((1, 0), (2, 10, 5, 20)), data[1, :, 2:10, 5:20].mean((1, 2))
+    )
+    # one block of frames at a time
+    assert len(arr.reads) == 4
+
+    # growing and shrinking edges only reads the strips that changed
+    arr.reads.clear()
+    np.testing.assert_allclose(
+        tracer.trace((1, 0), (3, 12, 5, 22)), data[1, :, 3:12, 5:22].mean((1, 2))
+    )
+    assert regions(arr.reads) == {(2, 3, 5, 20), (10, 12, 5, 20), (3, 12, 20, 22)}
+
+    # a region somewhere else entirely is read directly
+    arr.reads.clear()
+    np.testing.assert_allclose(
+        tracer.trace((1, 0), (15, 20, 0, 3)), data[1, :, 15:20, 0:3].mean((1, 2))
+    )
+    assert regions(arr.reads) == {(15, 20, 0, 3)}
+
+    # cached
+    arr.reads.clear()
+    tracer.trace((1, 7), (15, 20, 0, 3))
+    assert arr.reads == []
+
+
+def drag(ax, start, end):
+    fig = ax.get_figure()
+    for name, xy in [
+        ("button_press_event", start),
+        ("motion_notify_event", end),
+        ("button_release_event", end),
+    ]:
+        x, y = ax.transData.transform(xy)
+        MouseEvent(name, fig.canvas, x, y, button=1)._process()
+
+
+def test_hyperslicer_roi_trace():
+    data = np.random.rand(3, 10, 16, 16)
+    fig, (ax, trace_ax) = plt.subplots(1, 2)
+    controls = hyperslicer(
+        data, ax=ax, roi_trace="axis1", trace_ax=trace_ax, display_controls=False
+    )
+    line = trace_ax.lines[0]
+    assert np.all(np.isnan(line.get_ydata()))
+    drag(ax, (2.1, 3.2), (7.8, 9.6))
+    np.testing.assert_allclose(line.get_ydata(), data[0, :, 3:11, 2:9].mean((1, 2)))
+    controls.set_params(axis0=2, axis1=4)
+    np.testing.assert_allclose(line.get_ydata(), data[2, :, 3:11, 2:9].mean((1, 2)))
+    assert trace_ax.lines[1].get_xdata()[0] == 4
+    plt.close(fig)
+
+
+def hover(ax, xy):
+    x, y = ax.transData.transform(xy)
+    MouseEvent("motion_notify_event", ax.get_figure().canvas, x, y)._process()
+
+
+def test_hyperslicer_cursor_profile():
+    data = np.random.rand(2, 40, 16, 16)
+    arr = ReadRecorder(data)
+    fig, (ax, profile_ax) = plt.subplots(1, 2)
+    controls = hyperslicer(
+        arr, ax=ax, cursor_profile="axis1", profile_ax=profile_ax, display_controls=False
+    )
+    line = profile_ax.lines[0]
+    arr.reads.clear()
+    hover(ax, (5.2, 3.9))
+    np.testing.assert_array_equal(line.get_ydata(), data[0, :, 4, 5])
+    # only the values at the pixel are read
+    assert arr.reads == [(0, slice(None), 4, 5)]
+
+    hover(ax, (10, 12))
+    np.testing.assert_array_equal(line.get_ydata(), data[0, :, 12, 10])
+    hover(ax, (5, 4))
+    np.testing.assert_array_equal(line.get_ydata(), data[0, :, 4, 5])
+    # recently hovered pixels are cached
+    assert len(arr.reads) == 2
+
+    controls.set_params(axis0=1)
+    np.testing.assert_array_equal(line.get_ydata(), data[1, :, 4, 5])
+    plt.close(fig)
+
+
+class FakeVideo:
+    """A video reader that records seeks and sequential decodes."""
+
+    def __init__(self, frames, keyframes=None):
+        self.frames = frames
+        if keyframes is not None:
+            self.keyframes = keyframes
+        self.pos = None
+        self.log = []
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_frame(self, i):
+        self.log.append(("seek", i))
+        self.pos = i
+        return self.frames[i]
+
+    def read_next(self):
+        self.pos += 1
+        self.log.append(("next", self.pos))
+        return self.frames[self.pos]
+
+
+def test_video_frames_seeking():
+    data = np.random.rand(100, 6, 8)
+    reader = FakeVideo(data, keyframes=[0, 25, 50, 75])
+    frames = VideoFrames(reader, read_ahead=0)
+    assert frames.shape == (100, 6, 8)
+    assert reader.log == [("seek", 0)]
+
+    # no keyframe in between so decode forward, keeping the frames on the way
+    np.testing.assert_array_equal(frames[3], data[3])
+    assert reader.log[1:] == [("next", 1), ("next", 2), ("next", 3)]
+    np.testing.assert_array_equal(frames[2], data[2])
+    assert len(reader.log) == 4
+
+    # past a keyframe, or backwards, seek
+    reader.log.clear()
+    np.testing.assert_array_equal(frames[30], data[30])
+    np.testing.assert_array_equal(frames[10], data[10])
+    assert reader.log == [("seek", 30), ("seek", 10)]
+
+    # without keyframes decode forward up to keyframe_interval frames
+    reader = FakeVideo(data)
+    frames = VideoFrames(reader, read_ahead=0, keyframe_interval=4)
+    frames[4]
+    frames[20]
+    assert reader.log == [("seek", 0), *[("next", i) for i in range(1, 5)], ("seek", 20)]
+    np.testing.assert_array_equal(frames[18:21, 2], data[18:21, 2])
+
+
+def test_video_frames_decode_ahead():
+    data = np.random.rand(50, 6, 8)
+    reader = FakeVideo(data)
+    frames = VideoFrames(reader, read_ahead=5)
+    frames[10]
+    for _ in range(200):
+        if all(i in frames.cache for i in range(11, 16)):
+            break
+        time.sleep(0.01)
+    assert all(i in frames.cache for i in range(11, 16))
+    np.testing.assert_array_equal(frames[13], data[13])
+    # decoded once, in the background
+    assert reader.log[:16] == [("seek", 0), *[("next", i) for i in range(1, 16)]]
+    assert ("seek", 13) not in reader.log
+    assert reader.log.count(("next", 13)) == 1
+    frames.shutdown()
+
+
+def test_video_slicer():
+    data = np.random.rand(20, 6, 8, 3)
+    fig, ax = plt.subplots()
+    controls = video_slicer(FakeVideo(data), ax=ax, read_ahead=0, display_controls=False)
+    controls.set_params(frame=7)
+    np.testing.assert_array_equal(ax.images[0].get_array(), data[7])
+    plt.close(fig)
@@ -0,0 +1,62 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from mpl_interactions import DashboardSpec, ImportRef
+
+x = np.linspace(0, np.pi, 100)
+
+
+def f(x, tau):
+    return np.sin(x * tau)
+
+
+def make_spec():
+    spec = DashboardSpec(figsize=(2, 2), dpi=50, tau=np.linspace(1, 10, 10))
+    spec.add("interactive_plot", x, f)
+    spec.add("interactive_title", "tau: {tau:.2f}")
+    return spec
+
+
+def test_import_ref():
+    assert ImportRef("numpy.sin").resolve() is np.sin
+    assert ImportRef.from_object(f) == ImportRef(f"{__name__}:f")
+    with pytest.raises(ValueError):
+        ImportRef.from_object(lambda x: x)
+
+
+def test_spec_pickle_build():
+    spec = pickle.loads(pickle.dumps(make_spec()))
+    fig, ctrls = spec.build()
+    ctrls.set_params(tau=3)
+    ax = fig.axes[0]
+    np.testing.assert_allclose(ax.lines[0].get_ydata(), f(x, 3))
+    assert ax.get_title() == "tau: 3.00"
+
+    spec = DashboardSpec()
+    with pytest.raises(ValueError):
+        spec.add("interactive_plot", x, lambda x, tau: x)
+
+
+def test_render_in_processes():
+    spec = make_spec()
+    params = [{"tau": tau} for tau in [1, 5, 1, 8]]
+    frames = spec.render_in_processes(params, format="rgba", max_workers=2)
+    fig, ctrls = spec.build()
+    for p, frame in zip(params, frames):
+        assert frame == ctrls.render(fig, p, format="rgba")
+
+
+def test_render_is_independent_of_order():
+    spec = make_spec()
+    fig, ctrls = spec.build()
+    a = ctrls.render(fig, {"tau": 1}, format="rgba")
+    ctrls.render(fig, {"tau": 8}, format="rgba")
+    ctrls.render_cache.clear()
+    # rendered again after a frame with larger limits
+    assert ctrls.render(fig, {"tau": 1}, format="rgba") == a
+    ylim = fig.axes[0].get_ylim()
+    fresh_fig, fresh_ctrls = spec.build()
+    assert fresh_ctrls.render(fresh_fig, {"tau": 1}, format="rgba") == a
+    assert fresh_fig.axes[0].get_ylim() == ylim